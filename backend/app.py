@@ -2,36 +2,64 @@ import os
 import io
 import random
 import numpy as np
-import torch
 import json
+import math
+import re
+import secrets
+import struct
+import hashlib
+import hmac
+import queue
+import threading
+import weakref
 import uuid
+import contextlib
+import copy
+import csv
+import functools
+import importlib.util
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from multiprocessing.managers import BaseManager, BaseProxy, State
 from datetime import datetime
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Request, Response, request, jsonify, send_file, send_from_directory, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
+from werkzeug.wsgi import ClosingIterator
 import tempfile
 import wave
 import time
+import zipfile
 import subprocess
+import shutil
 from pathlib import Path
 from typing import Optional
 
 # Set PyTorch attention implementation to avoid SDPA issues
 os.environ['PYTORCH_ATTENTION_IMPLEMENTATION'] = 'eager'
 os.environ['TRANSFORMERS_ATTENTION_IMPLEMENTATION'] = 'eager'
-torch.backends.cuda.enable_flash_sdp(False)
-torch.backends.cuda.enable_mem_efficient_sdp(False)
-torch.backends.cuda.enable_math_sdp(True)
 
 # Import TTS modules
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'chatterbox', 'src'))
+# Sibling modules, also when imported as backend.app (gunicorn)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from text_chunking import split_text_for_tts
 try:
-    from pymongo import MongoClient
-except Exception:
-    MongoClient = None
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Windows
 
 # Comprehensive monkey patch to force eager attention
 def patch_attention_implementation():
@@ -85,34 +113,33 @@ def patch_attention_implementation():
     except Exception as e:
         print(f"⚠️ Could not patch attention: {e}")
 
-patch_attention_implementation()
+# Capabilities this process serves (VAANI_CAPABILITIES, any of tts, vc, stt).
+# Torch, Chatterbox and faster-whisper are only imported on first use of a
+# capability that needs them, so e.g. an STT-only or voice-library-only
+# deployment never loads the TTS stack.
+CAPABILITIES = {name.strip() for name in os.environ.get('VAANI_CAPABILITIES', 'tts,vc,stt').split(',') if name.strip()}
+TORCH_CAPABILITIES = {'tts', 'vc'}
 
-# Try to import both TTS versions
-try:
-    from chatterbox.tts import ChatterboxTTS as OriginalChatterboxTTS
-    from chatterbox.vc import ChatterboxVC
-    ORIGINAL_TTS_AVAILABLE = True
-    print("✅ Original ChatterBox TTS imported successfully")
-except ImportError as e:
-    print(f"❌ Could not import Original ChatterBox TTS: {e}")
-    ORIGINAL_TTS_AVAILABLE = False
+def capability_enabled(name):
+    return name in CAPABILITIES
 
-try:
-    from chatterbox.mtl_tts import ChatterboxMultilingualTTS
-    MULTILINGUAL_TTS_AVAILABLE = True
-    print("✅ ResembleAI Chatterbox Multilingual TTS imported successfully")
-except ImportError as e:
-    print(f"❌ Could not import ResembleAI Chatterbox Multilingual TTS: {e}")
-    MULTILINGUAL_TTS_AVAILABLE = False
+# Checked without importing it; the import happens when STT or decoding first needs it
+FASTER_WHISPER_AVAILABLE = importlib.util.find_spec('faster_whisper') is not None
+if not FASTER_WHISPER_AVAILABLE:
+    print("⚠️ faster-whisper not available")
 
-try:
-    from faster_whisper import WhisperModel
-    FASTER_WHISPER_AVAILABLE = True
-    print("✅ faster-whisper available for STT")
-except ImportError as e:
-    WhisperModel = None
-    FASTER_WHISPER_AVAILABLE = False
-    print(f"⚠️ faster-whisper not available: {e}")
+# Resolved by import_tts_stack() the first time a TTS/VC model is loaded
+ORIGINAL_TTS_AVAILABLE = None
+MULTILINGUAL_TTS_AVAILABLE = None
+ChatterboxTTS = None
+ChatterboxVC = None
+TTS_ENGINE_CLASSES = {'original': None, 'multilingual': None}
+tts_stack_lock = threading.Lock()
+
+def is_tensor(obj):
+    """torch.is_tensor() without importing torch (nothing is a tensor before it is loaded)."""
+    torch = sys.modules.get('torch')
+    return torch is not None and torch.is_tensor(obj)
 
 # Mock TTS for fallback
 class MockMultilingualTTS:
@@ -125,6 +152,7 @@ class MockMultilingualTTS:
         return cls(device)
     
     def generate(self, text, audio_prompt_path=None, **kwargs):
+        import torch
         # Generate a simple sine wave as demo audio
         duration = 3  # 3 seconds demo
         t = np.linspace(0, duration, int(self.sr * duration))
@@ -147,6 +175,7 @@ class MockChatterboxVC:
         return cls(device)
     
     def generate(self, audio_path, target_voice_path=None):
+        import torch
         # Generate a simple modified sine wave as demo audio
         duration = 3  # 3 seconds demo
         t = np.linspace(0, duration, int(self.sr * duration))
@@ -162,32 +191,73 @@ class MockChatterboxVC:
         
         return torch.tensor(audio).unsqueeze(0)
 
-# Set up TTS and VC classes - Use Multilingual TTS for Hindi support
-# Set up TTS and VC classes - Use Multilingual TTS for Hindi support
 USE_LIGHTWEIGHT_TTS = os.environ.get('USE_LIGHTWEIGHT_TTS', 'false').lower() == 'true'
+# 'auto' sends English to the lighter original model and other languages to the multilingual one
+TTS_ENGINE_ROUTING = os.environ.get('TTS_ENGINE_ROUTING', 'original' if USE_LIGHTWEIGHT_TTS else 'auto').lower()
+
+def import_tts_stack():
+    """Import torch and the Chatterbox TTS/VC modules and pick the classes to use (once)."""
+    global ORIGINAL_TTS_AVAILABLE, MULTILINGUAL_TTS_AVAILABLE, ChatterboxTTS, ChatterboxVC
+    with tts_stack_lock:
+        if ChatterboxTTS is not None:
+            return
+        if 'compile' in parse_cpu_inference_mode():
+            # Read by inductor when it is first imported; keeps compiled kernels across restarts
+            os.environ.setdefault('TORCHINDUCTOR_CACHE_DIR', str(CPU_COMPILE_CACHE_DIR))
+            os.environ.setdefault('TORCHINDUCTOR_FX_GRAPH_CACHE', '1')
+        import torch
+        torch.backends.cuda.enable_flash_sdp(False)
+        torch.backends.cuda.enable_mem_efficient_sdp(False)
+        torch.backends.cuda.enable_math_sdp(True)
+        patch_attention_implementation()
 
-if MULTILINGUAL_TTS_AVAILABLE and not USE_LIGHTWEIGHT_TTS:
-    # Use Multilingual TTS for Hindi and other languages
-    ChatterboxTTS = ChatterboxMultilingualTTS
-    print("✅ Using ResembleAI Chatterbox Multilingual TTS (supports Hindi & 15+ languages)")
-elif ORIGINAL_TTS_AVAILABLE:
-    # Fallback to Original TTS (English only)
-    ChatterboxTTS = OriginalChatterboxTTS
-    print("⚠️ Using Original ChatterBox TTS (English only)")
-else:
-    # Use mock TTS as last resort
-    ChatterboxTTS = MockMultilingualTTS
-    print("⚠️ Using Mock TTS (no real TTS available)")
-
-if ORIGINAL_TTS_AVAILABLE:
-    print("✅ Using Original ChatterBox VC")
-else:
-    ChatterboxVC = MockChatterboxVC
-    print("⚠️ Using Mock VC (real VC not available)")
+        # Try to import both TTS versions
+        try:
+            from chatterbox.tts import ChatterboxTTS as OriginalChatterboxTTS
+            from chatterbox.vc import ChatterboxVC as OriginalChatterboxVC
+            ORIGINAL_TTS_AVAILABLE = True
+            print("✅ Original ChatterBox TTS imported successfully")
+        except ImportError as e:
+            print(f"❌ Could not import Original ChatterBox TTS: {e}")
+            ORIGINAL_TTS_AVAILABLE = False
+
+        try:
+            from chatterbox.mtl_tts import ChatterboxMultilingualTTS
+            MULTILINGUAL_TTS_AVAILABLE = True
+            print("✅ ResembleAI Chatterbox Multilingual TTS imported successfully")
+        except ImportError as e:
+            print(f"❌ Could not import ResembleAI Chatterbox Multilingual TTS: {e}")
+            MULTILINGUAL_TTS_AVAILABLE = False
+
+        # Set up TTS and VC classes - Use Multilingual TTS for Hindi support
+        if ORIGINAL_TTS_AVAILABLE:
+            ChatterboxVC = OriginalChatterboxVC
+            print("✅ Using Original ChatterBox VC")
+        else:
+            ChatterboxVC = MockChatterboxVC
+            print("⚠️ Using Mock VC (real VC not available)")
+
+        # Both engines can be loaded side by side; requests are routed by language
+        TTS_ENGINE_CLASSES['original'] = OriginalChatterboxTTS if ORIGINAL_TTS_AVAILABLE else None
+        TTS_ENGINE_CLASSES['multilingual'] = ChatterboxMultilingualTTS if MULTILINGUAL_TTS_AVAILABLE else None
+
+        if MULTILINGUAL_TTS_AVAILABLE and not USE_LIGHTWEIGHT_TTS:
+            # Use Multilingual TTS for Hindi and other languages
+            ChatterboxTTS = ChatterboxMultilingualTTS
+            print("✅ Using ResembleAI Chatterbox Multilingual TTS (supports Hindi & 15+ languages)")
+        elif ORIGINAL_TTS_AVAILABLE:
+            # Fallback to Original TTS (English only)
+            ChatterboxTTS = OriginalChatterboxTTS
+            print("⚠️ Using Original ChatterBox TTS (English only)")
+        else:
+            # Use mock TTS as last resort
+            ChatterboxTTS = MockMultilingualTTS
+            print("⚠️ Using Mock TTS (no real TTS available)")
 
 # Initialize Flask with static folder pointing to React build
 app = Flask(__name__, static_folder='../dist', static_url_path='')
 CORS(app)
+sock = Sock(app) if Sock else None
 
 @app.route('/')
 def serve_index():
@@ -206,53 +276,311 @@ VOICE_LIB_DIR = Path(os.environ.get('VOICE_STORAGE_PATH', Path(__file__).resolve
 VOICE_METADATA_PATH = VOICE_LIB_DIR / 'metadata.json'
 VOICE_LIB_DIR.mkdir(parents=True, exist_ok=True)
 
-def read_voice_library():
-    if not VOICE_METADATA_PATH.exists():
-        return []
-    try:
-        with VOICE_METADATA_PATH.open('r') as f:
-            data = json.load(f)
-        if isinstance(data, list):
-            return data
-        return data.get('samples', [])
-    except Exception as exc:
-        print(f"⚠️ Could not read voice library: {exc}")
-        return []
+class JSONVoiceLibrary:
+    """Voice library kept in metadata.json, with an in-process index by id.
 
-def write_voice_library(samples):
-    try:
-        payload = {'samples': samples}
-        with VOICE_METADATA_PATH.open('w') as f:
-            json.dump(payload, f, indent=2)
-    except Exception as exc:
-        print(f"⚠️ Could not write voice library: {exc}")
-
-# Configuration - Enable Mac GPU (MPS) for faster processing
-if torch.cuda.is_available():
-    DEVICE = "cuda"
-    print("🚀 Using NVIDIA GPU (CUDA)")
-elif torch.backends.mps.is_available():
-    DEVICE = "mps"
-    print("🚀 Using Mac GPU (MPS)")
-else:
-    DEVICE = "cpu"
-    print("⚠️ Using CPU (slower)")
+    The file is only re-parsed when its mtime or size changes, so other
+    gunicorn workers' writes are picked up without reading it on every
+    request. Writes take an exclusive lock on a sidecar lock file, re-read the
+    current contents and atomically replace the file.
+    """
+
+    def __init__(self, metadata_path):
+        self.metadata_path = Path(metadata_path)
+        self.lock_path = self.metadata_path.with_name(self.metadata_path.name + '.lock')
+        self._samples = []
+        self._index = {}
+        self._signature = None
+        self._lock = threading.RLock()
+
+    def _file_signature(self):
+        try:
+            stat = self.metadata_path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_file(self):
+        try:
+            with self.metadata_path.open('r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return []
+        return data if isinstance(data, list) else data.get('samples', [])
+
+    def _refresh(self, force=False):
+        signature = self._file_signature()
+        if not force and signature == self._signature:
+            return
+        try:
+            samples = self._read_file()
+        except Exception as exc:
+            # Keep serving the last good copy rather than an empty library
+            print(f"⚠️ Could not read voice library: {exc}")
+            return
+        self._samples = samples
+        self._index = {sample.get('id'): sample for sample in samples}
+        self._signature = signature
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        with self._lock:
+            self.metadata_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _write(self, samples):
+        tmp_path = self.metadata_path.with_name(f"{self.metadata_path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with tmp_path.open('w') as f:
+                json.dump({'samples': samples}, f, indent=2)
+            os.replace(tmp_path, self.metadata_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        self._samples = samples
+        self._index = {sample.get('id'): sample for sample in samples}
+        self._signature = self._file_signature()
+
+    def get(self, voice_id):
+        with self._lock:
+            self._refresh()
+            return self._index.get(voice_id)
+
+    def list(self, offset=0, limit=None):
+        """Return (samples[offset:offset + limit], total count)."""
+        with self._lock:
+            self._refresh()
+            end = None if limit is None else offset + limit
+            return list(self._samples[offset:end]), len(self._samples)
+
+    def add(self, sample):
+        with self._file_lock():
+            self._refresh(force=True)
+            self._write(self._samples + [sample])
+
+    def replace(self, samples):
+        with self._file_lock():
+            self._write(list(samples))
+
+    def remove(self, voice_id):
+        """Delete a voice's metadata; returns the removed sample, or None if there was none."""
+        with self._file_lock():
+            self._refresh(force=True)
+            removed = self._index.get(voice_id)
+            if removed is not None:
+                self._write([sample for sample in self._samples if sample.get('id') != voice_id])
+        return removed
+
+    def stats(self):
+        return {'backend': 'json', 'path': str(self.metadata_path), 'entries': len(self._samples)}
+
+class MongoVoiceLibrary:
+    """Voice library metadata in the voice_samples MongoDB collection.
+
+    Audio files stay in VOICE_LIB_DIR; only the metadata moves. An empty
+    collection is seeded from metadata.json. Seeding only inserts voices
+    missing by id, so workers starting together cannot duplicate or drop any.
+    """
+
+    def __init__(self, db, seed_from=None):
+        self.collection = db['voice_samples']
+        self.collection.create_index('id', unique=True)
+        self.collection.create_index('createdAt')
+        if seed_from is not None and self.collection.estimated_document_count() == 0:
+            samples, _ = seed_from.list()
+            self.seed(samples)
+
+    def get(self, voice_id):
+        return self.collection.find_one({'id': voice_id}, {'_id': False})
+
+    def list(self, offset=0, limit=None):
+        cursor = self.collection.find({}, {'_id': False}).sort([('createdAt', 1), ('_id', 1)]).skip(offset)
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return list(cursor), self.collection.count_documents({})
+
+    def add(self, sample):
+        self.collection.insert_one(dict(sample))
+
+    def remove(self, voice_id):
+        return self.collection.find_one_and_delete({'id': voice_id}, {'_id': False})
+
+    def seed(self, samples):
+        """Insert the samples whose id is not in the collection yet; existing documents are left alone."""
+        for sample in samples:
+            self.collection.update_one({'id': sample['id']}, {'$setOnInsert': dict(sample)}, upsert=True)
+
+    def stats(self):
+        try:
+            entries = self.collection.estimated_document_count()
+        except Exception as exc:
+            return {'backend': 'mongo', 'collection': self.collection.full_name, 'error': str(exc)}
+        return {'backend': 'mongo', 'collection': self.collection.full_name, 'entries': entries}
+
+json_voice_library = JSONVoiceLibrary(VOICE_METADATA_PATH)
+_voice_library = None
+_voice_library_lock = threading.Lock()
+
+def get_voice_library():
+    """The configured voice library store (VOICE_LIBRARY_BACKEND=json|mongo).
+
+    The Mongo store falls back to metadata.json while MongoDB is unreachable
+    and is retried on the next call.
+    """
+    global _voice_library
+    if _voice_library is not None:
+        return _voice_library
+    with _voice_library_lock:
+        if _voice_library is not None:
+            return _voice_library
+        if VOICE_LIBRARY_BACKEND != 'mongo':
+            _voice_library = json_voice_library
+            return _voice_library
+        db = get_mongo_db()
+        if db is None:
+            return json_voice_library
+        try:
+            _voice_library = MongoVoiceLibrary(db, seed_from=json_voice_library)
+            print("✅ Voice library stored in MongoDB")
+        except Exception as exc:
+            print(f"⚠️ Could not use MongoDB for the voice library: {exc}")
+            return json_voice_library
+        return _voice_library
+
+def find_voice_sample(voice_id):
+    return get_voice_library().get(voice_id)
+
+# Torch device for TTS/VC, detected when first needed (importing torch to ask is slow)
+DEVICE = None
+
+def get_device():
+    global DEVICE
+    if DEVICE is None:
+        import torch
+        # Configuration - Enable Mac GPU (MPS) for faster processing
+        if torch.cuda.is_available():
+            DEVICE = "cuda"
+            print("🚀 Using NVIDIA GPU (CUDA)")
+        elif torch.backends.mps.is_available():
+            DEVICE = "mps"
+            print("🚀 Using Mac GPU (MPS)")
+        else:
+            DEVICE = "cpu"
+            print("⚠️ Using CPU (slower)")
+    return DEVICE
 
 UPLOAD_FOLDER = tempfile.gettempdir()
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'flac', 'm4a', 'ogg'}
 STT_MODEL_NAME = os.environ.get('STT_MODEL_NAME', 'large-v3')
-STT_DEVICE = os.environ.get('STT_DEVICE', 'cuda' if torch.cuda.is_available() else 'cpu')
-STT_COMPUTE_TYPE = os.environ.get('STT_COMPUTE_TYPE', 'float16' if STT_DEVICE.startswith('cuda') else 'int8')
+STT_MODE = os.environ.get('STT_MODE', 'single').lower()  # 'tiered': draft model first, STT_MODEL_NAME only where unsure
+STT_DRAFT_MODEL_NAME = os.environ.get('STT_DRAFT_MODEL_NAME', 'base')
+STT_REFINE_MAX_LOG_PROB = float(os.environ.get('STT_REFINE_MAX_LOG_PROB', -0.5))
+STT_REFINE_MIN_NO_SPEECH_PROB = float(os.environ.get('STT_REFINE_MIN_NO_SPEECH_PROB', 0.4))
+STT_REFINE_PADDING_SECONDS = float(os.environ.get('STT_REFINE_PADDING_SECONDS', 0.2))
+STT_DEVICE = os.environ.get('STT_DEVICE')  # detected by resolve_stt_device() when unset
+STT_COMPUTE_TYPE = os.environ.get('STT_COMPUTE_TYPE')
+STT_CPU_THREADS = int(os.environ.get('STT_CPU_THREADS', 0))
+STT_NUM_WORKERS = int(os.environ.get('STT_NUM_WORKERS', 1))
+STT_SAMPLE_RATE = 16000
+STT_LONG_CHUNK_SECONDS = float(os.environ.get('STT_LONG_CHUNK_SECONDS', 30))
+STT_LONG_MIN_SILENCE_MS = int(os.environ.get('STT_LONG_MIN_SILENCE_MS', 500))
+STT_STREAM_INPUT_RATE = int(os.environ.get('SAMPLE_RATE', STT_SAMPLE_RATE))
+STT_CHUNK_SECONDS = float(os.environ.get('STT_CHUNK_SECONDS', 3))
+STT_STREAM_PARTIAL_MS = int(os.environ.get('STT_STREAM_PARTIAL_MS', 500))
+STT_STREAM_ENDPOINT_MS = int(os.environ.get('STT_STREAM_ENDPOINT_MS', 600))
+STT_STREAM_VAD_THRESHOLD = float(os.environ.get('STT_STREAM_VAD_THRESHOLD', 0.01))
+STT_STREAM_SESSION_TTL_SECONDS = int(os.environ.get('STT_STREAM_SESSION_TTL_SECONDS', 120))
+TTS_MAX_TEXT_CHARS = int(os.environ.get('TTS_MAX_TEXT_CHARS', 50000))
+TTS_LONGFORM_MIN_CHARS = int(os.environ.get('TTS_LONGFORM_MIN_CHARS', 400))
+TTS_LONGFORM_SEGMENT_CHARS = int(os.environ.get('TTS_LONGFORM_SEGMENT_CHARS', 300))
+TTS_LONGFORM_CROSSFADE_MS = float(os.environ.get('TTS_LONGFORM_CROSSFADE_MS', 30))
+TTS_LONGFORM_PARAGRAPH_PAUSE_MS = float(os.environ.get('TTS_LONGFORM_PARAGRAPH_PAUSE_MS', 350))
+TTS_LONGFORM_PARALLELISM = int(os.environ.get('TTS_LONGFORM_PARALLELISM', 4))
+TTS_COND_CACHE_MAX_MB = float(os.environ.get('TTS_COND_CACHE_MAX_MB', 256))
+TTS_COND_CACHE_PERSIST = os.environ.get('TTS_COND_CACHE_PERSIST', 'false').lower() == 'true'
+TTS_COND_CACHE_DIR = VOICE_LIB_DIR / 'conditionals'
+VC_TARGET_CACHE_MAX_MB = float(os.environ.get('VC_TARGET_CACHE_MAX_MB', 128))
+TTS_BATCHING_ENABLED = os.environ.get('TTS_BATCHING', 'true').lower() == 'true'
+TTS_RESULT_CACHE_ENABLED = os.environ.get('TTS_RESULT_CACHE', 'true').lower() == 'true'
+TTS_RESULT_CACHE_MAX_MB = float(os.environ.get('TTS_RESULT_CACHE_MAX_MB', 128))
+TTS_RESULT_CACHE_DISK_MAX_MB = float(os.environ.get('TTS_RESULT_CACHE_DISK_MAX_MB', 1024))
+TTS_RESULT_CACHE_DIR = Path(os.environ.get('TTS_RESULT_CACHE_DIR', Path(tempfile.gettempdir()) / 'vaani_tts_cache'))
+TTS_MODEL_VERSION = os.environ.get('TTS_MODEL_VERSION')  # default: the cached Hugging Face checkpoint revision
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_MAX_QUEUE = int(os.environ.get('JOB_MAX_QUEUE', 32))
+JOB_RESULT_TTL_SECONDS = int(os.environ.get('JOB_RESULT_TTL_SECONDS', 3600))
+JOB_RESULTS_DIR = Path(os.environ.get('JOB_RESULTS_DIR', Path(tempfile.gettempdir()) / 'vaani_jobs'))
+ADMISSION_CONTROL_ENABLED = os.environ.get('ADMISSION_CONTROL', 'true').lower() == 'true'
+ADMISSION_CONCURRENCY = int(os.environ.get('ADMISSION_CONCURRENCY', 2))
+# Requests whose estimated queueing delay is over this are answered 429 (0: never reject)
+ADMISSION_MAX_WAIT_SECONDS = float(os.environ.get('ADMISSION_MAX_WAIT_SECONDS', 30))
+# Requests still queued after this long are answered 503, whatever the estimate said (0: wait forever)
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT_SECONDS', 120))
+# Reverse proxies in front of the app whose X-Forwarded-For is trusted for the client address
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 0))
+# Used to guess the duration of compressed uploads without decoding them (128 kbit/s)
+ADMISSION_UPLOAD_BYTES_PER_SECOND = float(os.environ.get('ADMISSION_UPLOAD_BYTES_PER_SECOND', 16000))
+TTS_BULK_MAX_ITEMS = int(os.environ.get('TTS_BULK_MAX_ITEMS', 5000))
+TTS_BULK_IN_FLIGHT = int(os.environ.get('TTS_BULK_IN_FLIGHT', 8))
+MODEL_SERVER_ADDRESS = os.environ.get('MODEL_SERVER_ADDRESS')
+MODEL_SERVER_AUTHKEY = os.environ.get('MODEL_SERVER_AUTHKEY')  # required for TCP addresses
+# A task without a reply after this long fails instead of holding its web thread forever
+MODEL_SERVER_TIMEOUT_SECONDS = float(os.environ.get('MODEL_SERVER_TIMEOUT_SECONDS', 600))
+MODEL_SERVER_WORKERS = os.environ.get('MODEL_SERVER_WORKERS')  # default: default_model_worker_specs()
+MODEL_SERVER_THREADS = int(os.environ.get('MODEL_SERVER_THREADS', 2))
 MONGO_URI = os.environ.get('MONGO_URI')
 MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'vaani')
+CPU_INFERENCE_MODE = os.environ.get('CPU_INFERENCE_MODE', 'fp32').lower()
+CPU_THREADS = int(os.environ.get('CPU_THREADS', 0))
+CPU_INTEROP_THREADS = int(os.environ.get('CPU_INTEROP_THREADS', 1))
+CPU_COMPILE_CACHE_DIR = Path(os.environ.get('CPU_COMPILE_CACHE_DIR', VOICE_LIB_DIR / 'compile_cache'))
+MODEL_WARMUP_ENABLED = os.environ.get('MODEL_WARMUP', 'true').lower() == 'true'
+MODEL_WARMUP_MODELS = [name.strip() for name in os.environ.get('MODEL_WARMUP_MODELS', 'tts,vc,stt').split(',') if name.strip()]
+VOICE_LIBRARY_BACKEND = os.environ.get('VOICE_LIBRARY_BACKEND', 'json').lower()
+VOICE_LIST_MAX_LIMIT = int(os.environ.get('VOICE_LIST_MAX_LIMIT', 500))
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+MP3_BITRATE = os.environ.get('MP3_BITRATE', '128k')
+OPUS_BITRATE = os.environ.get('OPUS_BITRATE', '48k')
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB max file size
+AUDIO_SPILL_MB = float(os.environ.get('AUDIO_SPILL_MB', 16))
+VC_SOURCE_SAMPLE_RATE = 16000  # rate of the speech tokenizer that reads VC source audio
+VC_WINDOW_SECONDS = float(os.environ.get('VC_WINDOW_SECONDS', 10))
+VC_WINDOW_OVERLAP_SECONDS = float(os.environ.get('VC_WINDOW_OVERLAP_SECONDS', 0.5))
+VC_WINDOW_PARALLELISM = int(os.environ.get('VC_WINDOW_PARALLELISM', 4))
+DUB_QUEUE_SIZE = int(os.environ.get('DUB_QUEUE_SIZE', 4))
+DUB_MAX_SPEEDUP = float(os.environ.get('DUB_MAX_SPEEDUP', 1.3))
+DUB_REFERENCE_SECONDS = float(os.environ.get('DUB_REFERENCE_SECONDS', 10))
+
+class AudioUploadRequest(Request):
+    """Keeps uploads up to AUDIO_SPILL_MB in memory; only larger ones spill to an anonymous temp file."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=int(AUDIO_SPILL_MB * 1024 * 1024), mode='rb+', dir=UPLOAD_FOLDER)
+
+app.request_class = AudioUploadRequest
+
+def spool_upload(file_storage):
+    """Copy an upload into a spooled file owned by the caller.
+
+    The request closes its own upload files when it is torn down, so a
+    response that reads the source while streaming needs its own copy.
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=int(AUDIO_SPILL_MB * 1024 * 1024), mode='rb+', dir=UPLOAD_FOLDER)
+    file_storage.stream.seek(0)
+    shutil.copyfileobj(file_storage.stream, spooled)
+    spooled.seek(0)
+    return spooled
 
 # Global model instances
-tts_model = None
-vc_model = None
-stt_model: Optional["WhisperModel"] = None
 mongo_client = None
 mongo_db = None
 mongo_status = {'connected': False, 'error': 'Not initialized'}
@@ -260,7 +588,414 @@ mongo_status = {'connected': False, 'error': 'Not initialized'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def requires_capability(name):
+    """Answer 503 from a route whose capability is switched off in VAANI_CAPABILITIES."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not capability_enabled(name):
+                return jsonify({'error': f'{name.upper()} is not enabled on this server'}), 503
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Metrics in the Prometheus text format, served from /metrics. Each process
+# (gunicorn worker, model-server worker) keeps its own.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+RTF_BUCKETS = (0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10)
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + '}'
+
+class Metric:
+    def __init__(self, name, help_text, metric_type):
+        self.name = name
+        self.help_text = help_text
+        self.metric_type = metric_type
+        self._lock = threading.Lock()
+        metrics_registry.append(self)
+
+    def samples(self):
+        """(suffix, labels, value) triples for the exposition."""
+        return []
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.metric_type}']
+        for suffix, labels, value in self.samples():
+            lines.append(f'{self.name}{suffix}{format_labels(labels)} {value:.10g}')
+        return lines
+
+class Gauge(Metric):
+    """A settable gauge, or one read from collect() at scrape time."""
+
+    def __init__(self, name, help_text, collect=None, metric_type='gauge'):
+        super().__init__(name, help_text, metric_type)
+        self._values = {}
+        self._collect = collect
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[tuple(labels.items())] = value
+
+    def samples(self):
+        if self._collect:
+            try:
+                return [('', labels, value) for labels, value in self._collect() if value is not None]
+            except Exception as exc:
+                print(f"⚠️ Could not collect {self.name}: {exc}")
+                return []
+        with self._lock:
+            return [('', dict(key), value) for key, value in self._values.items()]
+
+class Histogram(Metric):
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, 'histogram')
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.items())
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (bucket_counts, total, count) in self._series.items():
+                labels = dict(key)
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    samples.append(('_bucket', {**labels, 'le': f'{bound:g}'}, bucket_count))
+                samples.append(('_bucket', {**labels, 'le': '+Inf'}, count))
+                samples.append(('_sum', labels, total))
+                samples.append(('_count', labels, count))
+        return samples
+
+metrics_registry = []
+
+http_request_seconds = Histogram('vaani_http_request_duration_seconds', 'Time from request start until the response is fully written')
+stage_seconds = Histogram('vaani_stage_duration_seconds', 'Time spent in each stage of the inference pipeline')
+tts_rtf = Histogram('vaani_tts_real_time_factor', 'TTS generation seconds per second of generated audio', buckets=RTF_BUCKETS)
+model_load_seconds = Gauge('vaani_model_load_seconds', 'How long each model took to load')
+
+@contextlib.contextmanager
+def stage_timer(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - started, stage=stage)
+
+def instrument_stage(obj, method_name, stage):
+    """Time every call of obj.method_name (e.g. a model's t3.inference) as stage."""
+    method = getattr(obj, method_name, None)
+    if method is None or getattr(method, '_vaani_stage', None):
+        return
+
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        with stage_timer(stage):
+            return method(*args, **kwargs)
+
+    timed._vaani_stage = stage
+    setattr(obj, method_name, timed)
+
+def render_metrics():
+    lines = []
+    for metric in metrics_registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+class LRUCache:
+    """Thread-safe LRU cache bounded by the total size of its values."""
+
+    def __init__(self, max_bytes, sizeof=len):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if key in self._items:
+                self.current_bytes -= self._sizes.pop(key)
+                del self._items[key]
+            self._items[key] = value
+            self._sizes[key] = size
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                evicted_key, _ = self._items.popitem(last=False)
+                self.current_bytes -= self._sizes.pop(evicted_key)
+        return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._items:
+                return default
+            self.current_bytes -= self._sizes.pop(key)
+            return self._items.pop(key)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._items),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+def tensor_nbytes(obj):
+    """Approximate memory held by the tensors/arrays inside obj (dataclasses, dicts, lists)."""
+    if is_tensor(obj):
+        return obj.element_size() * obj.nelement()
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, dict):
+        return sum(tensor_nbytes(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(tensor_nbytes(value) for value in obj)
+    if hasattr(obj, '__dict__'):
+        return sum(tensor_nbytes(value) for value in vars(obj).values())
+    return 0
+
+def write_temp_audio(audio_bytes, suffix=None):
+    """Write audio bytes to a uniquely named file in the upload folder and return its path."""
+    with stage_timer('upload_save'):
+        fd, temp_path = tempfile.mkstemp(suffix=suffix or '.wav', dir=app.config['UPLOAD_FOLDER'])
+        with os.fdopen(fd, 'wb') as f:
+            f.write(audio_bytes)
+    return temp_path
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def hash_file(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+# Models keep per-request state (e.g. the speaker conditionals), so every
+# generate call on a model instance runs under that model's lock.
+model_locks = weakref.WeakKeyDictionary()
+model_locks_guard = threading.Lock()
+
+def get_model_lock(model):
+    with model_locks_guard:
+        lock = model_locks.get(model)
+        if lock is None:
+            lock = model_locks[model] = threading.RLock()
+        return lock
+
+class SamplingLock:
+    """Shared/exclusive lock over the process-wide RNGs.
+
+    Chatterbox samples from the global torch RNG and takes no generator, so a
+    seeded generation is only reproducible if nothing else samples between
+    its reseed and its last draw. Seeded generations hold the lock
+    exclusively; unseeded TTS and VC hold it shared, so they still overlap
+    with each other. Waiting seeded generations go before new shared holders.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._shared = 0
+        self._exclusive = False
+        self._exclusive_waiting = 0
+
+    @contextlib.contextmanager
+    def shared(self):
+        with self._condition:
+            self._condition.wait_for(lambda: not self._exclusive and not self._exclusive_waiting)
+            self._shared += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._shared -= 1
+                self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def exclusive(self):
+        with self._condition:
+            self._exclusive_waiting += 1
+            try:
+                self._condition.wait_for(lambda: not self._exclusive and not self._shared)
+            finally:
+                self._exclusive_waiting -= 1
+            self._exclusive = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._exclusive = False
+                self._condition.notify_all()
+
+# Taken after the model lock and released before it, so it never waits on one
+sampling_lock = SamplingLock()
+
+def sampling_guard(seed=0):
+    return sampling_lock.exclusive() if seed else sampling_lock.shared()
+
+class DiskLRUCache:
+    """Directory of cached blobs, evicted by least recent use once over max_bytes."""
+
+    def __init__(self, directory, max_bytes, suffix='.bin'):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._total_bytes = None
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return self.directory / f"{key}{self.suffix}"
+
+    def _scan(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return [(entry.stat().st_mtime, entry.stat().st_size, entry) for entry in self.directory.glob(f"*{self.suffix}")]
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # mtime doubles as the recency marker for eviction
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            try:
+                if self._total_bytes is None:
+                    self._total_bytes = sum(size for _, size, _ in self._scan())
+                path = self._path(key)
+                previous = path.stat().st_size if path.exists() else 0
+                tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+                self._total_bytes += len(data) - previous
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+            except OSError as exc:
+                print(f"⚠️ Could not write disk cache entry: {exc}")
+
+    def _evict(self):
+        for _, size, entry in sorted(self._scan(), key=lambda item: item[0]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                entry.unlink()
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'directory': str(self.directory),
+            'bytes': self._total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+        }
+
+class TTSResultCache:
+    """Generated WAV bytes keyed by a hash of everything that determines them.
+
+    Lookups go to the in-memory LRU first and fall back to the on-disk tier,
+    promoting disk hits back into memory.
+    """
+
+    def __init__(self, memory_max_bytes, disk_directory, disk_max_bytes):
+        self.memory = LRUCache(memory_max_bytes)
+        self.disk = DiskLRUCache(disk_directory, disk_max_bytes, suffix='.wav')
+
+    @staticmethod
+    def make_key(engine, build, text, language, voice_hash, params, seed):
+        # The disk tier outlives the process, so the key also names the model build
+        payload = json.dumps({
+            'model': engine,
+            'build': build,
+            'text': text,
+            'language': language,
+            'voice': voice_hash,
+            'params': params,
+            'seed': seed,
+        }, sort_keys=True, ensure_ascii=False)
+        return hash_bytes(payload.encode('utf-8'))
+
+    def get(self, key):
+        data = self.memory.get(key)
+        if data is None:
+            data = self.disk.get(key)
+            if data is not None:
+                self.memory.put(key, data)
+        return data
+
+    def put(self, key, data):
+        self.memory.put(key, data)
+        self.disk.put(key, data)
+
+    def stats(self):
+        return {'enabled': TTS_RESULT_CACHE_ENABLED, 'memory': self.memory.stats(), 'disk': self.disk.stats()}
+
+speaker_conditioning_cache = LRUCache(int(TTS_COND_CACHE_MAX_MB * 1024 * 1024), sizeof=tensor_nbytes)
+vc_target_cache = LRUCache(int(VC_TARGET_CACHE_MAX_MB * 1024 * 1024), sizeof=tensor_nbytes)
+tts_result_cache = TTSResultCache(
+    int(TTS_RESULT_CACHE_MAX_MB * 1024 * 1024),
+    TTS_RESULT_CACHE_DIR,
+    int(TTS_RESULT_CACHE_DISK_MAX_MB * 1024 * 1024)
+)
+default_tts_conditionals = weakref.WeakKeyDictionary()
+default_vc_ref_dicts = weakref.WeakKeyDictionary()
+model_builds = weakref.WeakKeyDictionary()
+voice_content_hashes = {}
+
 def set_seed(seed: int):
+    import torch
     torch.manual_seed(seed)
     torch.cuda.manual_seed(seed)
     torch.cuda.manual_seed_all(seed)
@@ -275,7 +1010,9 @@ def get_mongo_db():
     if not MONGO_URI:
         mongo_status = {'connected': False, 'error': 'MONGO_URI not set'}
         return None
-    if MongoClient is None:
+    try:
+        from pymongo import MongoClient
+    except Exception:
         mongo_status = {'connected': False, 'error': 'pymongo not installed'}
         return None
     try:
@@ -293,49 +1030,454 @@ def get_mongo_db():
         print(f"⚠️ MongoDB connection failed: {exc}")
     return mongo_db
 
-def load_tts_model():
-    global tts_model
-    if tts_model is None:
-        model_name = "Original ChatterBox TTS" if ORIGINAL_TTS_AVAILABLE else "ResembleAI Multilingual TTS"
-        print(f"Loading {model_name} model...")
+def resolve_stt_device():
+    """Fill in STT_DEVICE/STT_COMPUTE_TYPE when not configured, asking CTranslate2 rather than torch."""
+    global STT_DEVICE, STT_COMPUTE_TYPE
+    if STT_DEVICE is None:
+        import ctranslate2
+        STT_DEVICE = 'cuda' if ctranslate2.get_cuda_device_count() > 0 else 'cpu'
+    if STT_COMPUTE_TYPE is None:
+        STT_COMPUTE_TYPE = 'float16' if STT_DEVICE.startswith('cuda') else 'int8'
+
+# CPU inference mode (CPU_INFERENCE_MODE): 'fp32' keeps the models as loaded;
+# 'int8' dynamically quantizes the linear layers of the T3 transformer and
+# the S3Gen flow decoder, 'compile' runs the flow estimator and the HiFi-GAN
+# decoder through torch.compile, and 'int8+compile' does both. Only applied
+# when the models run on the CPU.
+
+CPU_INFERENCE_OPTIONS = {'fp32', 'int8', 'compile'}
+cpu_threads_configured = False
+
+def parse_cpu_inference_mode(mode=None):
+    options = set((mode or CPU_INFERENCE_MODE).split('+'))
+    unknown = options - CPU_INFERENCE_OPTIONS
+    if unknown:
+        raise ValueError(f"Unknown CPU_INFERENCE_MODE option(s): {', '.join(sorted(unknown))}")
+    return options - {'fp32'}
+
+def configure_cpu_threads():
+    """Intra-op threads on every available core, few inter-op threads (set once per process)."""
+    global cpu_threads_configured
+    if cpu_threads_configured or IS_MODEL_SERVER_WORKER:
+        return  # model-server workers size their pools in configure_model_worker
+    import torch
+    available = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    torch.set_num_threads(CPU_THREADS or available)
+    try:
+        torch.set_num_interop_threads(CPU_INTEROP_THREADS)
+    except RuntimeError:
+        pass  # already fixed once any parallel work has run
+    cpu_threads_configured = True
+
+def quantize_linear_layers(module):
+    """Dynamic int8 quantization of every nn.Linear in module, in place."""
+    import torch
+    engines = torch.backends.quantized.supported_engines
+    if torch.backends.quantized.engine not in engines or torch.backends.quantized.engine == 'none':
+        torch.backends.quantized.engine = 'fbgemm' if 'fbgemm' in engines else 'qnnpack'
+    torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+def compile_method(obj, method_name):
+    """Route obj.method_name through torch.compile, falling back to eager if compilation fails."""
+    method = getattr(obj, method_name, None)
+    if method is None or getattr(method, '_vaani_compiled', False):
+        return
+    import torch
+    compiled = torch.compile(method, dynamic=True)
+
+    @functools.wraps(method)
+    def run(*args, **kwargs):
         try:
-            tts_model = ChatterboxTTS.from_pretrained(DEVICE)
-            print(f"✅ {model_name} model loaded successfully")
-        except Exception as e:
-            print(f"❌ {model_name} model failed: {e}")
-            print("📝 Using mock TTS")
-            tts_model = MockMultilingualTTS.from_pretrained(DEVICE)
-    return tts_model
+            return compiled(*args, **kwargs)
+        except Exception as exc:
+            # Compilation happens on the first call, so this is where an unsupported graph shows up
+            print(f"⚠️ torch.compile failed for {type(obj).__name__}.{method_name}, using eager mode: {exc}")
+            setattr(obj, method_name, method)
+            return method(*args, **kwargs)
 
-def load_vc_model():
-    global vc_model
-    if vc_model is None:
-        print("Loading VC model...")
+    run._vaani_compiled = True
+    setattr(obj, method_name, run)
+
+def optimize_for_cpu(model, mode=None):
+    """Apply the CPU inference mode to a loaded Chatterbox TTS or VC model."""
+    options = parse_cpu_inference_mode(mode)
+    if not options or get_device() != 'cpu':
+        return
+    s3gen = getattr(model, 's3gen', None)
+    if s3gen is None:
+        return  # the mocks have nothing to optimize
+    configure_cpu_threads()
+    flow_decoder = getattr(getattr(s3gen, 'flow', None), 'decoder', None)
+    with get_model_lock(model):
+        if 'int8' in options:
+            for module in (getattr(model, 't3', None), flow_decoder):
+                if module is not None:
+                    quantize_linear_layers(module)
+        if 'compile' in options:
+            compile_method(getattr(flow_decoder, 'estimator', None), 'forward')
+            compile_method(getattr(s3gen, 'mel2wav', None), 'decode')
+    print(f"⚙️ {type(model).__name__} set up for CPU inference: {'+'.join(sorted(options))}")
+
+def checkpoint_revision(model):
+    """Commit of the Hugging Face checkpoint a Chatterbox model was loaded from, if cached."""
+    repo_id = getattr(sys.modules.get(type(model).__module__), 'REPO_ID', None)
+    if not repo_id:
+        return None
+    try:
+        from huggingface_hub import constants
+    except ImportError:
+        return None
+    ref = Path(constants.HF_HUB_CACHE) / f"models--{repo_id.replace('/', '--')}" / 'refs' / 'main'
+    try:
+        return ref.read_text().strip() or None
+    except OSError:
+        return None
+
+def model_build(model):
+    """Everything besides the request that decides a model's output."""
+    build = model_builds.get(model)
+    if build is None:
+        from importlib import metadata
         try:
-            vc_model = ChatterboxVC.from_pretrained(DEVICE)
-            print("✅ VC model loaded successfully")
-        except Exception as e:
-            print(f"❌ VC model failed: {e}")
-            vc_model = MockChatterboxVC.from_pretrained(DEVICE)
-    return vc_model
+            package = metadata.version('chatterbox-tts')
+        except metadata.PackageNotFoundError:
+            package = None
+        applied = get_device() == 'cpu' and getattr(model, 's3gen', None) is not None
+        build = {
+            'package': package,
+            'checkpoint': TTS_MODEL_VERSION or checkpoint_revision(model),
+            'cpu_inference_mode': ('+'.join(sorted(parse_cpu_inference_mode())) if applied else None) or 'fp32',
+        }
+        model_builds[model] = build
+    return build
 
-def load_stt_model():
-    global stt_model
+# Models live in a registry with a memory budget. Warm-up threads and
+# requests may ask for a model at the same time; each is loaded once, under
+# its own lock, and only published when fully set up. When loading one would
+# go over MODEL_RAM_BUDGET_MB / MODEL_VRAM_BUDGET_MB, the least recently used
+# others are evicted first.
+
+MODEL_RAM_BUDGET_MB = float(os.environ.get('MODEL_RAM_BUDGET_MB', 0))  # 0: unlimited
+MODEL_VRAM_BUDGET_MB = float(os.environ.get('MODEL_VRAM_BUDGET_MB', 0))
+MODEL_IDLE_EVICT_SECONDS = float(os.environ.get('MODEL_IDLE_EVICT_SECONDS', 0))  # 0: only evict for memory
+# Bearer token for DELETE /api/models/<name>; unset, the route is disabled
+MODEL_ADMIN_TOKEN = os.environ.get('MODEL_ADMIN_TOKEN')
+
+def module_nbytes(model):
+    """Bytes of parameters and buffers in the torch modules a model wrapper holds."""
+    total = 0
+    for value in vars(model).values():
+        if hasattr(value, 'parameters') and hasattr(value, 'buffers'):
+            for tensor in list(value.parameters()) + list(value.buffers()):
+                total += tensor.element_size() * tensor.nelement()
+    return total
+
+def whisper_nbytes(name):
+    """Size of a Whisper model's files, as an estimate of what it takes when loaded."""
+    try:
+        if os.path.isdir(name):
+            path = Path(name)
+        else:
+            from faster_whisper.utils import download_model
+            path = Path(download_model(name, local_files_only=True))
+        return sum(entry.stat().st_size for entry in path.rglob('*') if entry.is_file())
+    except Exception:
+        return 0
+
+class ModelEntry:
+    def __init__(self, model, nbytes, pool, load_seconds):
+        self.model = model
+        self.nbytes = nbytes
+        self.pool = pool
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+
+class ModelRegistry:
+    """Loaded models by name, within RAM/VRAM budgets; idle ones are evicted in LRU order.
+
+    Loaders are registered once per name. An evicted model is freed when the
+    last request still using it finishes, and is loaded again on next use.
+    """
+
+    def __init__(self, ram_budget_bytes=0, vram_budget_bytes=0, idle_seconds=0):
+        self.budgets = {'ram': ram_budget_bytes, 'vram': vram_budget_bytes}
+        self.idle_seconds = idle_seconds
+        self._loaders = {}
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._load_locks = {}
+        self._counters = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, loader, sizeof=module_nbytes, pool=None):
+        """loader() returns the model; pool() names the memory it lands in ('ram' or 'vram')."""
+        with self._lock:
+            self._loaders[name] = (loader, sizeof, pool or (lambda: 'ram'))
+            self._load_locks.setdefault(name, threading.Lock())
+            self._counters.setdefault(name, {'loads': 0, 'evictions': 0, 'hits': 0})
+
+    def __contains__(self, name):
+        with self._lock:
+            return name in self._entries
+
+    def peek(self, name):
+        """The model if it is loaded, without loading it or counting a use."""
+        with self._lock:
+            entry = self._entries.get(name)
+            return entry.model if entry else None
+
+    def get(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None:
+                return self._touch(name, entry)
+            load_lock = self._load_locks[name]
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(name)
+                if entry is not None:
+                    return self._touch(name, entry)
+                loader, sizeof, pool = self._loaders[name]
+                pool = pool()
+                self._evict_idle()
+                # Make room for the size seen on a previous load before loading again
+                self._make_room(pool, self._sizes.get(name, 0), keep=name)
+            started = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - started
+            nbytes = sizeof(model)
+            with self._lock:
+                self._entries[name] = ModelEntry(model, nbytes, pool, load_seconds)
+                self._sizes[name] = nbytes
+                self._counters[name]['loads'] += 1
+                self._make_room(pool, 0, keep=name)
+            model_load_seconds.set(load_seconds, model=name)
+            print(f"📦 Loaded model {name} ({nbytes / 1024 / 1024:.0f} MB {pool}) in {load_seconds:.1f}s")
+            return model
+
+    def put(self, name, model, pool='ram'):
+        """Install an already built model (e.g. a mock) under name."""
+        with self._lock:
+            self._counters.setdefault(name, {'loads': 0, 'evictions': 0, 'hits': 0})
+            self._load_locks.setdefault(name, threading.Lock())
+            self._entries[name] = ModelEntry(model, module_nbytes(model), pool, 0.0)
+
+    def evict(self, name):
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry is None:
+                return False
+            self._counters[name]['evictions'] += 1
+        print(f"🗑️ Evicted model {name} ({entry.nbytes / 1024 / 1024:.0f} MB {entry.pool})")
+        release = entry.pool == 'vram'
+        del entry
+        if release and 'torch' in sys.modules:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        return True
+
+    def _touch(self, name, entry):
+        entry.last_used = time.time()
+        self._entries.move_to_end(name)
+        self._counters[name]['hits'] += 1
+        return entry.model
+
+    def _used(self, pool):
+        return sum(entry.nbytes for entry in self._entries.values() if entry.pool == pool)
+
+    def _make_room(self, pool, incoming, keep):
+        budget = self.budgets.get(pool) or 0
+        if not budget:
+            return
+        for name in list(self._entries):
+            if self._used(pool) + incoming <= budget:
+                return
+            if name != keep and self._entries[name].pool == pool:
+                self.evict(name)
+        if self._used(pool) + incoming > budget:
+            print(f"⚠️ Model {keep} alone exceeds the {pool} budget of {budget / 1024 / 1024:.0f} MB")
+
+    def _evict_idle(self):
+        if not self.idle_seconds:
+            return
+        cutoff = time.time() - self.idle_seconds
+        for name in [name for name, entry in self._entries.items() if entry.last_used < cutoff]:
+            self.evict(name)
+
+    def stats(self):
+        with self._lock:
+            now = time.time()
+            models = {}
+            for name, counters in self._counters.items():
+                entry = self._entries.get(name)
+                models[name] = {
+                    **counters,
+                    'loaded': entry is not None,
+                    'type': type(entry.model).__name__ if entry else None,
+                    'bytes': entry.nbytes if entry else self._sizes.get(name),
+                    'pool': entry.pool if entry else None,
+                    'load_seconds': round(entry.load_seconds, 3) if entry else None,
+                    'idle_seconds': round(now - entry.last_used, 1) if entry else None,
+                }
+            pools = {
+                pool: {'used_bytes': self._used(pool), 'budget_bytes': budget or None}
+                for pool, budget in self.budgets.items()
+            }
+        return {'pools': pools, 'models': models, 'lru_order': list(self._entries)}
+
+model_registry = ModelRegistry(
+    int(MODEL_RAM_BUDGET_MB * 1024 * 1024),
+    int(MODEL_VRAM_BUDGET_MB * 1024 * 1024),
+    MODEL_IDLE_EVICT_SECONDS
+)
+
+def torch_memory_pool():
+    return 'vram' if get_device() == 'cuda' else 'ram'
+
+def _load_tts_engine(engine):
+    import_tts_stack()
+    model_class = TTS_ENGINE_CLASSES.get(engine)
+    model_name = "Original ChatterBox TTS" if engine == 'original' else "ResembleAI Multilingual TTS"
+    print(f"Loading {model_name} model...")
+    try:
+        if model_class is None:
+            raise RuntimeError(f'{model_name} is not installed')
+        model = model_class.from_pretrained(get_device())
+        remember_default_conditionals(model)
+        print(f"✅ {model_name} model loaded successfully")
+    except Exception as e:
+        print(f"❌ {model_name} model failed: {e}")
+        print("📝 Using mock TTS")
+        model = MockMultilingualTTS.from_pretrained(get_device())
+    optimize_for_cpu(model)
+    instrument_stage(getattr(model, 't3', None), 'inference', 'tts_token_generation')
+    instrument_stage(getattr(model, 's3gen', None), 'inference', 'tts_vocoder')
+    return model
+
+def _load_vc():
+    import_tts_stack()
+    print("Loading VC model...")
+    try:
+        model = ChatterboxVC.from_pretrained(get_device())
+        if getattr(model, 'ref_dict', None) is not None:
+            default_vc_ref_dicts[model] = model.ref_dict
+        print("✅ VC model loaded successfully")
+    except Exception as e:
+        print(f"❌ VC model failed: {e}")
+        model = MockChatterboxVC.from_pretrained(get_device())
+    optimize_for_cpu(model)
+    instrument_stage(getattr(model, 's3gen', None), 'inference', 'vc_vocoder')
+    return model
+
+def _create_whisper_model(name):
     if not FASTER_WHISPER_AVAILABLE:
         raise RuntimeError("faster-whisper is not installed. Please run `pip install faster-whisper`.")
-    if stt_model is None:
-        print(f"Loading Whisper STT model '{STT_MODEL_NAME}' on {STT_DEVICE} ({STT_COMPUTE_TYPE})...")
-        stt_model = WhisperModel(
-            STT_MODEL_NAME,
-            device=STT_DEVICE,
-            compute_type=STT_COMPUTE_TYPE
-        )
-        print("✅ Whisper STT model loaded successfully")
-    return stt_model
+    from faster_whisper import WhisperModel
+    resolve_stt_device()
+    print(f"Loading Whisper STT model '{name}' on {STT_DEVICE} ({STT_COMPUTE_TYPE})...")
+    model = WhisperModel(
+        name,
+        device=STT_DEVICE,
+        compute_type=STT_COMPUTE_TYPE,
+        cpu_threads=STT_CPU_THREADS,
+        # Number of transcribe() calls the model can serve in parallel
+        num_workers=STT_NUM_WORKERS
+    )
+    print(f"✅ Whisper STT model '{name}' loaded successfully")
+    return model
+
+def stt_memory_pool():
+    return 'vram' if (STT_DEVICE or '').startswith('cuda') else 'ram'
+
+for _engine in TTS_ENGINE_CLASSES:
+    model_registry.register(f'tts_{_engine}', functools.partial(_load_tts_engine, _engine), pool=torch_memory_pool)
+model_registry.register('vc', _load_vc, pool=torch_memory_pool)
+model_registry.register('stt', lambda: _create_whisper_model(STT_MODEL_NAME),
+                        sizeof=lambda model: whisper_nbytes(STT_MODEL_NAME), pool=stt_memory_pool)
+model_registry.register('stt_draft', lambda: _create_whisper_model(STT_DRAFT_MODEL_NAME),
+                        sizeof=lambda model: whisper_nbytes(STT_DRAFT_MODEL_NAME), pool=stt_memory_pool)
+
+def tts_engine_for_language(language=None):
+    """TTS engine ('original' or 'multilingual') that should serve a request language."""
+    if TTS_ENGINE_ROUTING in TTS_ENGINE_CLASSES:
+        return TTS_ENGINE_ROUTING
+    return 'original' if (language or 'en').split('-')[0].lower() == 'en' else 'multilingual'
+
+def tts_engines_in_use():
+    return list(TTS_ENGINE_CLASSES) if TTS_ENGINE_ROUTING not in TTS_ENGINE_CLASSES else [TTS_ENGINE_ROUTING]
+
+def load_tts_engine(engine):
+    name = f'tts_{engine}'
+    if name not in model_registry:
+        import_tts_stack()
+        if TTS_ENGINE_CLASSES.get(engine) is None:
+            # Serve from whichever engine is installed rather than load a second copy of it
+            engine = next((other for other, model_class in TTS_ENGINE_CLASSES.items() if model_class is not None), engine)
+            name = f'tts_{engine}'
+    return model_registry.get(name)
+
+def load_tts_model(language=None):
+    return load_tts_engine(tts_engine_for_language(language))
+
+def load_vc_model():
+    return model_registry.get('vc')
+
+def load_stt_model():
+    return model_registry.get('stt')
+
+def load_stt_draft_model():
+    """The small Whisper model of tiered transcription."""
+    return model_registry.get('stt_draft')
+
+def segment_to_dict(segment, offset=0.0):
+    """Serialize a faster-whisper segment, shifting its timestamps by offset seconds."""
+    return {
+        'id': segment.id,
+        'start': segment.start + offset,
+        'end': segment.end + offset,
+        'text': segment.text.strip(),
+        'avg_log_prob': segment.avg_log_prob,
+        'no_speech_prob': segment.no_speech_prob,
+    }
+
+def plan_audio_chunks(audio, sample_rate=STT_SAMPLE_RATE, max_chunk_seconds=STT_LONG_CHUNK_SECONDS,
+                      min_silence_ms=STT_LONG_MIN_SILENCE_MS):
+    """Group VAD speech regions into (start, end) sample ranges of at most max_chunk_seconds.
+
+    Chunks are cut in the silences between speech regions; a single region
+    longer than the limit is split at fixed intervals.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    max_samples = int(max_chunk_seconds * sample_rate)
+    vad_options = VadOptions(min_silence_duration_ms=min_silence_ms, max_speech_duration_s=max_chunk_seconds)
+    regions = get_speech_timestamps(audio, vad_options)
 
-def transcribe_audio_file(audio_path: str, language: Optional[str] = None, task: str = 'transcribe'):
-    """Run Whisper transcription on the provided audio file."""
-    model = load_stt_model()
+    chunks = []
+    for region in regions:
+        start, end = region['start'], region['end']
+        if chunks and end - chunks[-1][0] <= max_samples:
+            chunks[-1] = (chunks[-1][0], end)
+            continue
+        while end - start > max_samples:
+            chunks.append((start, start + max_samples))
+            start += max_samples
+        chunks.append((start, end))
+    return chunks
+
+def transcribe_audio_file(audio, language: Optional[str] = None, task: str = 'transcribe', on_segment=None,
+                          mode: Optional[str] = None, compare: bool = False):
+    """Run Whisper transcription on an audio file path or 16 kHz float32 array.
+
+    on_segment, if given, is called with (segment_dict, info) as each segment
+    is decoded; it may raise to abort the transcription. mode 'tiered' (or
+    STT_MODE) drafts with the small model and refines unsure segments; compare
+    then also times the full model alone (see transcribe_tiered).
+    """
+    if (mode or STT_MODE) == 'tiered':
+        return transcribe_tiered(audio, language=language, task=task, on_segment=on_segment, compare=compare)
     transcription_kwargs = {
         'vad_filter': True,
         'beam_size': 5
@@ -345,182 +1487,3186 @@ def transcribe_audio_file(audio_path: str, language: Optional[str] = None, task:
     if task in {'transcribe', 'translate'}:
         transcription_kwargs['task'] = task
 
-    segments, info = model.transcribe(audio_path, **transcription_kwargs)
+    segments, info = whisper_transcribe(audio, **transcription_kwargs)
 
     assembled_segments = []
     collected_text = []
     for segment in segments:
-        text = segment.text.strip()
-        if text:
-            collected_text.append(text)
-        assembled_segments.append({
-            'id': segment.id,
-            'start': segment.start,
-            'end': segment.end,
-            'text': text,
-            'avg_log_prob': segment.avg_log_prob,
-            'no_speech_prob': segment.no_speech_prob,
-        })
+        assembled_segments.append(segment)
+        if segment['text']:
+            collected_text.append(segment['text'])
+        if on_segment:
+            on_segment(segment, info)
 
     return {
         'text': ' '.join(collected_text).strip(),
         'segments': assembled_segments,
-        'language': info.language,
-        'language_probability': info.language_probability,
-        'duration': info.duration
+        'language': info['language'],
+        'language_probability': info['language_probability'],
+        'duration': info['duration']
     }
 
-def save_audio_to_wav(audio_data, sample_rate):
-    """Convert audio data to WAV format and return as bytes"""
-    buffer = io.BytesIO()
-    
-    # Ensure audio_data is numpy array
-    if torch.is_tensor(audio_data):
-        audio_data = audio_data.cpu().numpy()
-    
-    # Normalize audio data to 16-bit range
-    if audio_data.dtype != np.int16:
-        audio_data = (audio_data * 32767).astype(np.int16)
-    
-    # Create WAV file in memory
-    with wave.open(buffer, 'wb') as wav_file:
-        wav_file.setnchannels(1)  # Mono
-        wav_file.setsampwidth(2)  # 16-bit
-        wav_file.setframerate(sample_rate)
-        wav_file.writeframes(audio_data.tobytes())
-    
-    buffer.seek(0)
-    return buffer
+class RunningAverage:
+    """Exponentially weighted average of a measurement; None until the first sample."""
 
-@app.route('/api/stt/transcribe', methods=['POST'])
-def stt_transcribe():
-    if not FASTER_WHISPER_AVAILABLE:
-        return jsonify({'error': 'faster-whisper is not installed on this server.'}), 500
+    def __init__(self, weight=0.2):
+        self.weight = weight
+        self.value = None
+        self._lock = threading.Lock()
 
-    if 'audio' not in request.files:
-        return jsonify({'error': 'Audio file is required (multipart form field "audio").'}), 400
+    def update(self, sample):
+        with self._lock:
+            self.value = sample if self.value is None else self.value + self.weight * (sample - self.value)
 
-    audio_file = request.files['audio']
-    if not audio_file or not audio_file.filename:
-        return jsonify({'error': 'Invalid audio file.'}), 400
+def needs_refinement(segment):
+    return (segment['avg_log_prob'] < STT_REFINE_MAX_LOG_PROB
+            or segment['no_speech_prob'] > STT_REFINE_MIN_NO_SPEECH_PROB)
 
-    if not allowed_file(audio_file.filename):
-        return jsonify({'error': f'Unsupported file type: {audio_file.filename}'}), 400
+def refine_segment(audio, segment, language, task):
+    """Re-decode one draft segment with the full model; returns the segment with the refined text."""
+    padding = int(STT_REFINE_PADDING_SECONDS * STT_SAMPLE_RATE)
+    start = max(0, int(segment['start'] * STT_SAMPLE_RATE) - padding)
+    end = min(len(audio), int(segment['end'] * STT_SAMPLE_RATE) + padding)
+    kwargs = {'beam_size': 5, 'vad_filter': False, 'language': language, 'condition_on_previous_text': False}
+    if task in {'transcribe', 'translate'}:
+        kwargs['task'] = task
+    started = time.perf_counter()
+    pieces, _ = whisper_transcribe(audio[start:end], **kwargs)
+    pieces = list(pieces)
+    seconds = time.perf_counter() - started
+    refined = dict(segment, draft_text=segment['text'], refined=True)
+    refined['text'] = ' '.join(piece['text'] for piece in pieces if piece['text']).strip()
+    if pieces:
+        refined['avg_log_prob'] = float(np.mean([piece['avg_log_prob'] for piece in pieces]))
+        refined['no_speech_prob'] = float(np.max([piece['no_speech_prob'] for piece in pieces]))
+    return refined, seconds
 
-    language = request.form.get('language') or None
-    task = request.form.get('task', 'transcribe')
+def transcribe_tiered(audio, language=None, task='transcribe', on_segment=None, compare=False):
+    """Two-pass transcription: STT_DRAFT_MODEL_NAME for everything, STT_MODEL_NAME for unsure segments.
 
-    temp_filename = secure_filename(audio_file.filename)
-    temp_path = os.path.join(app.config['UPLOAD_FOLDER'], temp_filename)
-    audio_file.save(temp_path)
+    A segment is re-decoded when its avg_log_prob is below
+    STT_REFINE_MAX_LOG_PROB or its no_speech_prob above
+    STT_REFINE_MIN_NO_SPEECH_PROB. Refinements run while the draft pass goes
+    on; segments are still reported in order. The result has the same fields
+    as transcribe_audio_file plus a 'tiered' summary of what was refined and
+    the time spent in each pass. With compare, the same audio is then also
+    decoded by the full model alone and the summary reports that time and the
+    measured speedup; this doubles the work, so it is opt-in.
+    """
+    if isinstance(audio, (str, os.PathLike)):
+        audio = decode_audio_source(audio, STT_SAMPLE_RATE)
+    started = time.perf_counter()
+    transcription_kwargs = {'vad_filter': True, 'beam_size': 5}
+    if language:
+        transcription_kwargs['language'] = language
+    if task in {'transcribe', 'translate'}:
+        transcription_kwargs['task'] = task
+
+    segments, info = whisper_transcribe(audio, tier='draft', **transcription_kwargs)
+    pending = deque()
+    assembled_segments = []
+    refine_seconds = 0.0
+    refine_executor = ThreadPoolExecutor(max_workers=max(1, STT_NUM_WORKERS), thread_name_prefix='vaani-stt-refine')
+
+    def emit(segment):
+        assembled_segments.append(segment)
+        if on_segment:
+            on_segment(segment, info)
 
     try:
-        result = transcribe_audio_file(temp_path, language=language, task=task)
-        if not result['text']:
-            return jsonify({'text': '', 'segments': [], 'language': result['language'], 'language_probability': result['language_probability'], 'duration': result['duration']}), 200
-        return jsonify(result)
-    except Exception as exc:
-        print(f"STT error: {exc}")
-        return jsonify({'error': f'STT failed: {exc}'}), 500
+        for segment in segments:
+            if needs_refinement(segment) and segment['end'] > segment['start']:
+                pending.append(refine_executor.submit(refine_segment, audio, segment, info['language'], task))
+            else:
+                pending.append(segment)
+            # Report everything that is settled, in order
+            while pending and (isinstance(pending[0], dict) or pending[0].done()):
+                item = pending.popleft()
+                if not isinstance(item, dict):
+                    item, seconds = item.result()
+                    refine_seconds += seconds
+                emit(item)
+        draft_seconds = time.perf_counter() - started
+        while pending:
+            item = pending.popleft()
+            if not isinstance(item, dict):
+                item, seconds = item.result()
+                refine_seconds += seconds
+            emit(item)
     finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        for item in pending:
+            if not isinstance(item, dict):
+                item.cancel()
+        refine_executor.shutdown(wait=False)
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
-    get_mongo_db()
-    return jsonify({
-        'status': 'healthy',
-        'device': DEVICE,
-        'multilingual_tts_available': MULTILINGUAL_TTS_AVAILABLE,
-        'tts_loaded': tts_model is not None,
-        'vc_loaded': vc_model is not None,
-        'tts_model_type': str(type(tts_model).__name__) if tts_model else None,
-        'vc_model_type': str(type(vc_model).__name__) if vc_model else None,
-        'mongo': mongo_status
-    })
+    total_seconds = time.perf_counter() - started
+    refined = [segment for segment in assembled_segments if segment.get('refined')]
+    summary = {
+        'draft_model': STT_DRAFT_MODEL_NAME,
+        'refine_model': STT_MODEL_NAME,
+        'segments_refined': len(refined),
+        'segments_total': len(assembled_segments),
+        'refined_seconds': round(sum(segment['end'] - segment['start'] for segment in refined), 3),
+        'draft_seconds': round(draft_seconds, 3),
+        'refine_seconds': round(refine_seconds, 3),
+        'total_seconds': round(total_seconds, 3),
+    }
+    if compare:
+        # The single-model decode this request would otherwise have been
+        full_started = time.perf_counter()
+        full_segments, _ = whisper_transcribe(audio, **transcription_kwargs)
+        full_text = ' '.join(segment['text'] for segment in full_segments if segment['text']).strip()
+        full_seconds = time.perf_counter() - full_started
+        summary.update(
+            full_model_seconds=round(full_seconds, 3),
+            speedup=round(full_seconds / total_seconds, 2) if total_seconds else None,
+            full_model_text=full_text,
+        )
+    return {
+        'text': ' '.join(segment['text'] for segment in assembled_segments if segment['text']).strip(),
+        'segments': assembled_segments,
+        'language': info['language'],
+        'language_probability': info['language_probability'],
+        'duration': info['duration'],
+        'tiered': summary,
+    }
 
-@app.route('/api/tts/generate', methods=['POST'])
-def generate_tts():
-    try:
-        # Get text input
-        text = request.form.get('text', '').strip()
+def transcribe_long_audio(audio, language=None, task='transcribe', max_workers=STT_NUM_WORKERS):
+    """Transcribe long audio in VAD-split chunks across parallel workers.
+
+    audio is a 16 kHz float32 array. Yields event dicts: one 'info' event,
+    then 'segment' events in timeline order as soon as every earlier chunk is
+    done, and a final 'done' event with the full text.
+    """
+    started = time.time()
+    duration = len(audio) / STT_SAMPLE_RATE
+    chunks = plan_audio_chunks(audio)
+    yield {'type': 'info', 'duration': duration, 'chunks': len(chunks), 'workers': max_workers}
+
+    transcription_kwargs = {'beam_size': 5}
+    if task in {'transcribe', 'translate'}:
+        transcription_kwargs['task'] = task
+
+    def transcribe_chunk(index, chunk_language):
+        start, end = chunks[index]
+        segments, info = whisper_transcribe(audio[start:end], language=chunk_language, **transcription_kwargs)
+        offset = start / STT_SAMPLE_RATE
+        segments = list(segments)
+        for segment in segments:
+            segment['start'] += offset
+            segment['end'] += offset
+        return segments, info
+
+    collected_text = []
+    segment_count = 0
+    language_probability = None
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='vaani-stt')
+    try:
+        futures = []
+        for index in range(len(chunks)):
+            if index == 1 and not language:
+                # Detect the language on the first chunk so every chunk decodes consistently
+                _, first_info = futures[0].result()
+                language = first_info['language']
+            futures.append(executor.submit(transcribe_chunk, index, language))
+
+        for index, future in enumerate(futures):
+            chunk_segments, info = future.result()
+            if language_probability is None:
+                language = language or info['language']
+                language_probability = info['language_probability']
+            for segment in chunk_segments:
+                segment_count += 1
+                segment['id'] = segment_count
+                segment['chunk'] = index
+                if segment['text']:
+                    collected_text.append(segment['text'])
+                yield dict(type='segment', **segment)
+    finally:
+        # Stops queued chunks when the client goes away mid-stream
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    yield {
+        'type': 'done',
+        'text': ' '.join(collected_text).strip(),
+        'segments': segment_count,
+        'language': language,
+        'language_probability': language_probability,
+        'duration': duration,
+        'elapsed': time.time() - started,
+    }
+
+def resample_audio(audio, orig_rate, target_rate):
+    """Linear-interpolation resampling for mono float32 audio."""
+    if orig_rate == target_rate or not len(audio):
+        return audio.astype(np.float32, copy=False)
+    target_length = int(round(len(audio) * target_rate / orig_rate))
+    return np.interp(
+        np.linspace(0, len(audio) - 1, target_length), np.arange(len(audio)), audio
+    ).astype(np.float32)
+
+def pcm16_bytes_to_float(pcm_bytes, input_rate=STT_SAMPLE_RATE, output_rate=STT_SAMPLE_RATE):
+    """Decode little-endian 16-bit mono PCM into float32 samples at output_rate."""
+    usable = len(pcm_bytes) - len(pcm_bytes) % 2
+    audio = np.frombuffer(pcm_bytes[:usable], dtype='<i2').astype(np.float32) / 32768.0
+    return resample_audio(audio, input_rate, output_rate)
+
+def _decode_wav(source, sample_rate):
+    with wave.open(source, 'rb') as wav_file:
+        if wav_file.getsampwidth() != 2:
+            raise ValueError('Only 16-bit PCM WAV can be decoded without faster-whisper or librosa')
+        channels = wav_file.getnchannels()
+        rate = wav_file.getframerate()
+        audio = np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype='<i2').astype(np.float32) / 32768.0
+    if channels > 1:
+        audio = audio.reshape(-1, channels).mean(axis=1)
+    return resample_audio(audio, rate, sample_rate)
+
+def decode_audio_source(source, sample_rate, suffix='.wav'):
+    """Decode a file path or binary stream into mono float32 samples at sample_rate.
+
+    Uses PyAV (through faster-whisper) when available, then librosa, then the
+    stdlib wave reader. A stream is only written to a uniquely named temp
+    file when librosa's audioread fallback needs a real path.
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    if FASTER_WHISPER_AVAILABLE:
+        from faster_whisper import decode_audio
+        return decode_audio(source, sampling_rate=sample_rate)
+    try:
+        import librosa
+    except ImportError:
+        return _decode_wav(source, sample_rate)
+    try:
+        audio, _ = librosa.load(source, sr=sample_rate, mono=True)
+    except Exception:
+        if not hasattr(source, 'read'):
+            raise
+        source.seek(0)
+        temp_path = write_temp_audio(source.read(), suffix)
+        try:
+            audio, _ = librosa.load(temp_path, sr=sample_rate, mono=True)
+        finally:
+            remove_files(temp_path)
+    return audio.astype(np.float32, copy=False)
+
+def decode_audio_upload(file_storage, sample_rate):
+    """Decode an upload straight from the request stream (no temp file)."""
+    with stage_timer('upload_decode'):
+        return decode_audio_source(file_storage.stream, sample_rate, suffix=Path(file_storage.filename or '').suffix)
+
+def supports_array_vc(model):
+    """ChatterboxVC can be driven with arrays through its tokenizer and S3Gen; the mock cannot."""
+    s3gen = getattr(model, 's3gen', None)
+    return s3gen is not None and hasattr(s3gen, 'tokenizer') and hasattr(model, 'watermarker')
+
+def compute_vc_target(model, target_audio):
+    """Speaker reference (ref_dict) for VC from target audio decoded at model.sr."""
+    import torch
+    target_audio = target_audio[:getattr(model, 'DEC_COND_LEN', len(target_audio))]
+    with get_model_lock(model), torch.inference_mode():
+        return model.s3gen.embed_ref(torch.from_numpy(target_audio).float(), model.sr, device=model.device)
+
+def export_vc_target(ref_dict):
+    """ref_dict with its tensors as numpy arrays, so it can be pickled to other processes without torch."""
+    return {key: value.detach().cpu().numpy() if is_tensor(value) else value for key, value in ref_dict.items()}
+
+def import_vc_target(model, ref):
+    import torch
+    return {key: torch.from_numpy(value).to(model.device) if isinstance(value, np.ndarray) else value for key, value in ref.items()}
+
+def prepare_vc_target(model, target):
+    """Resolve a target voice for convert_voice.
+
+    target is None (model default) or a dict with either a 'path', the
+    uploaded 'bytes' and 'suffix', or a speaker reference already computed
+    by vc_embed_target under 'ref'. Returns (target_ref, target_voice_path,
+    temp_path); temp_path must be removed by the caller.
+    """
+    if target is None:
+        return None, None, None
+    if target.get('ref') is not None and supports_array_vc(model):
+        return import_vc_target(model, target['ref']), None, None
+    if supports_array_vc(model):
+        source = target['path'] if target.get('path') else io.BytesIO(target['bytes'])
+        return compute_vc_target(model, decode_audio_source(source, model.sr, suffix=target.get('suffix'))), None, None
+    if target.get('path'):
+        return None, target['path'], None
+    temp_path = write_temp_audio(target['bytes'], target.get('suffix'))
+    return None, temp_path, temp_path
+
+def convert_voice(model, source_audio, target_ref=None, target_voice_path=None):
+    """Convert 16 kHz float32 source samples to the target voice (or the model's default voice)."""
+    if not supports_array_vc(model):
+        # Path-based models (like the mock) get the decoded source spilled once
+        source_path = write_temp_audio(save_audio_to_wav(source_audio, VC_SOURCE_SAMPLE_RATE).getvalue())
+        try:
+            with get_model_lock(model), sampling_guard():
+                return model.generate(source_path, target_voice_path=target_voice_path)
+        finally:
+            remove_files(source_path)
+
+    import torch
+    with get_model_lock(model), torch.inference_mode(), sampling_guard():
+        ref_dict = target_ref if target_ref is not None else default_vc_ref_dicts.get(model, model.ref_dict)
+        if ref_dict is None:
+            raise ValueError('A target voice is required for this VC model')
+        audio_16 = torch.from_numpy(source_audio).float().to(model.device)[None, ]
+        s3_tokens, _ = model.s3gen.tokenizer(audio_16)
+        wav, _ = model.s3gen.inference(speech_tokens=s3_tokens, ref_dict=ref_dict)
+        wav = wav.squeeze(0).detach().cpu().numpy()
+        watermarked_wav = model.watermarker.apply_watermark(wav, sample_rate=model.sr)
+    return torch.from_numpy(watermarked_wav).unsqueeze(0)
+
+def waveform_to_numpy(wav):
+    """Flatten a model output (tensor or array) to a 1-D float32 numpy array."""
+    if is_tensor(wav):
+        wav = wav.detach().cpu().numpy()
+    return np.asarray(wav, dtype=np.float32).reshape(-1)
+
+# Inference entry points used by the routes. They run on this process's
+# models, or on the model-server pool when MODEL_SERVER_ADDRESS is set.
+
+def _local_tts_generate_async(text, language, params, voice=None, seed=0):
+    model = load_tts_model(language)
+    conditionals, reference_audio_path, temp_audio_path = resolve_tts_voice(model, voice, params['exaggeration'])
+    inner = submit_tts(model, text, language, params, conditionals, reference_audio_path, seed)
+    result = Future()
+
+    def finish(done):
+        remove_files(temp_audio_path)
+        if result.cancelled():
+            return
+        if done.cancelled():
+            result.cancel()
+        elif done.exception() is not None:
+            result.set_exception(done.exception())
+        else:
+            result.set_result((waveform_to_numpy(done.result()), model.sr))
+
+    result.add_done_callback(lambda f: f.cancelled() and inner.cancel())
+    inner.add_done_callback(finish)
+    return result
+
+def _local_tts_info(language=None):
+    model = load_tts_model(language)
+    return {'name': type(model).__name__, 'sample_rate': model.sr, 'build': model_build(model)}
+
+def _local_vc_convert(source_audio, target=None):
+    model = load_vc_model()
+    target_ref, target_voice_path, temp_target_path = prepare_vc_target(model, target)
+    try:
+        with stage_timer('vc_convert'):
+            wav = convert_voice(model, source_audio, target_ref, target_voice_path)
+    finally:
+        remove_files(temp_target_path)
+    return waveform_to_numpy(wav), model.sr
+
+def _local_vc_embed_target(target):
+    model = load_vc_model()
+    if target is None or target.get('ref') is not None or not supports_array_vc(model):
+        return target
+    with stage_timer('vc_target'):
+        target_ref, _, _ = prepare_vc_target(model, target)
+    return {'ref': export_vc_target(target_ref)}
+
+def _local_vc_info():
+    model = load_vc_model()
+    return {'name': type(model).__name__, 'sample_rate': model.sr}
+
+_vc_executor = None
+_vc_executor_pid = None
+
+def _local_vc_convert_async(source_audio, target=None):
+    # One thread: conversions hold the model lock anyway, but decoding and
+    # sending the previous window overlap with the current one
+    global _vc_executor, _vc_executor_pid
+    if _vc_executor is None or _vc_executor_pid != os.getpid():
+        _vc_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='vaani-vc')
+        _vc_executor_pid = os.getpid()
+    return _vc_executor.submit(_local_vc_convert, source_audio, target)
+
+def _local_whisper_transcribe(audio, tier='full', **kwargs):
+    model = load_stt_draft_model() if tier == 'draft' else load_stt_model()
+    started = time.perf_counter()
+    segments, info = model.transcribe(audio, **kwargs)
+    info = {'language': info.language, 'language_probability': info.language_probability, 'duration': info.duration}
+
+    # Lazy, so callers can report progress segment by segment
+    def timed_segments():
+        try:
+            for segment in segments:
+                yield segment_to_dict(segment)
+        finally:
+            stage_seconds.observe(time.perf_counter() - started, stage='stt_draft' if tier == 'draft' else 'stt_transcribe')
+
+    return timed_segments(), info
+
+def tts_generate_async(text, language, params, voice=None, seed=0):
+    """Queue a TTS generation; the Future resolves to (float32 samples, sample_rate)."""
+    if model_server_enabled():
+        return model_server_client().submit('tts', text, language, params, voice, seed)
+    return _local_tts_generate_async(text, language, params, voice, seed)
+
+def tts_generate(text, language, params, voice=None, seed=0):
+    return tts_generate_async(text, language, params, voice, seed).result()
+
+def tts_engine_info(language=None):
+    """Name and output sample rate of the TTS engine serving requests in language."""
+    if model_server_enabled():
+        return model_server_client().info()['tts'][tts_engine_for_language(language)]
+    return _local_tts_info(language)
+
+def vc_convert(source_audio, target=None):
+    """Convert 16 kHz source samples to the target voice; returns (float32 samples, sample_rate)."""
+    if model_server_enabled():
+        return model_server_client().call('vc', source_audio, target)
+    return _local_vc_convert(source_audio, target)
+
+def vc_convert_async(source_audio, target=None):
+    """Queue a conversion; the Future resolves to (float32 samples, sample_rate)."""
+    if model_server_enabled():
+        return model_server_client().submit('vc', source_audio, target)
+    return _local_vc_convert_async(source_audio, target)
+
+def vc_embed_target(target):
+    """Compute the speaker reference of a target voice once, for reuse across many conversions."""
+    if model_server_enabled():
+        return model_server_client().call('vc_target', target)
+    return _local_vc_embed_target(target)
+
+def vc_engine_info():
+    """Name and output sample rate of the VC engine serving requests."""
+    if model_server_enabled():
+        return model_server_client().info()['vc']
+    return _local_vc_info()
+
+def whisper_transcribe(audio, **kwargs):
+    """Whisper transcribe() returning (iterable of segment dicts, info dict)."""
+    if model_server_enabled():
+        if isinstance(audio, (str, os.PathLike)):
+            audio = decode_audio_source(audio, STT_SAMPLE_RATE)
+        return model_server_client().call('stt', audio, kwargs)
+    return _local_whisper_transcribe(audio, **kwargs)
+
+# Model-server pool: one process owns the weights for each device and the
+# web workers send it inference tasks, so gunicorn can run many web workers
+# without each loading its own copy of every model.
+
+IS_MODEL_SERVER_WORKER = False
+
+class ModelServerManager(BaseManager):
+    pass
+
+ModelServerManager.register('get_task_queue')
+ModelServerManager.register('get_reply_queue')
+
+def parse_model_server_address(address):
+    """'host:port' for TCP, anything else is a unix socket path."""
+    host, _, port = address.rpartition(':')
+    if host and port.isdigit():
+        return host, int(port)
+    return address
+
+def model_server_authkey(address, create=False):
+    """Shared secret of the model server at address.
+
+    Tasks are pickled, so anyone holding the key can run code in the server.
+    MODEL_SERVER_AUTHKEY is used when set. Otherwise a unix-socket server
+    generates a random key into ``<socket>.key`` (readable by its user only)
+    for the web workers to read; TCP addresses require an explicit key.
+    """
+    if MODEL_SERVER_AUTHKEY:
+        return MODEL_SERVER_AUTHKEY.encode('utf-8')
+    if not isinstance(parse_model_server_address(address), str):
+        raise RuntimeError('Set MODEL_SERVER_AUTHKEY to use a TCP MODEL_SERVER_ADDRESS')
+    key_path = Path(f'{address}.key')
+    if create:
+        key_path.unlink(missing_ok=True)
+        with os.fdopen(os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'w') as handle:
+            handle.write(secrets.token_hex(32))
+    return key_path.read_text().strip().encode('utf-8')
+
+def parse_cpu_list(spec):
+    cores = []
+    for part in spec.split(','):
+        start, _, end = part.partition('-')
+        cores.extend(range(int(start), int(end or start) + 1))
+    return cores
+
+def parse_model_worker_specs(spec):
+    """'cpu:0-7;cpu:8-15;cuda:0' -> [('cpu', [0..7]), ('cpu', [8..15]), ('cuda:0', None)]."""
+    workers = []
+    for entry in filter(None, (part.strip() for part in spec.split(';'))):
+        device, _, cores = entry.partition(':')
+        if device == 'cuda':
+            workers.append((f'cuda:{cores or 0}', None))
+        elif device == 'cpu':
+            workers.append(('cpu', parse_cpu_list(cores) if cores else None))
+        else:
+            raise ValueError(f'Unknown model worker device: {entry}')
+    return workers
+
+def default_model_worker_specs():
+    """One worker per GPU, else a single CPU worker."""
+    if CAPABILITIES & TORCH_CAPABILITIES:
+        import torch
+        gpu_count = torch.cuda.device_count()
+    elif capability_enabled('stt') and FASTER_WHISPER_AVAILABLE:
+        import ctranslate2
+        gpu_count = ctranslate2.get_cuda_device_count()
+    else:
+        gpu_count = 0
+    return ';'.join([f'cuda:{index}' for index in range(gpu_count)] or ['cpu'])
+
+def model_server_enabled():
+    return bool(MODEL_SERVER_ADDRESS) and not IS_MODEL_SERVER_WORKER
+
+def run_model_task(kind, args):
+    if kind == 'tts':
+        return _local_tts_generate_async(*args).result()
+    if kind == 'vc':
+        return _local_vc_convert(*args)
+    if kind == 'vc_target':
+        return _local_vc_embed_target(*args)
+    if kind == 'stt':
+        audio, kwargs = args
+        segments, info = _local_whisper_transcribe(audio, **kwargs)
+        return list(segments), info
+    if kind == 'info':
+        return {
+            'tts': {
+                engine: _local_tts_info('en' if engine == 'original' else None)
+                for engine in tts_engines_in_use()
+            } if capability_enabled('tts') else None,
+            'vc': _local_vc_info() if capability_enabled('vc') else None,
+        }
+    raise ValueError(f'Unknown model task: {kind}')
+
+def configure_model_worker(device, cores):
+    """Pin this process to its device and CPU cores before any model is used."""
+    global IS_MODEL_SERVER_WORKER, DEVICE, STT_DEVICE, STT_COMPUTE_TYPE, STT_CPU_THREADS
+    IS_MODEL_SERVER_WORKER = True
+    if cores and hasattr(os, 'sched_setaffinity'):
+        available = os.sched_getaffinity(0)
+        if not available.intersection(cores):
+            print(f"⚠️ Model worker cores {cores} are not available; using {sorted(available)}")
+            cores = sorted(available)
+        cores = sorted(available.intersection(cores))
+        os.sched_setaffinity(0, cores)
+    threads = len(cores) if cores else os.cpu_count()
+    if CAPABILITIES & TORCH_CAPABILITIES:
+        import torch
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass
+    if device.startswith('cuda'):
+        # CUDA_VISIBLE_DEVICES was narrowed to this worker's GPU before spawning
+        DEVICE = 'cuda'
+        STT_DEVICE = 'cuda'
+    else:
+        DEVICE = 'cpu'
+        STT_DEVICE = 'cpu'
+        STT_CPU_THREADS = STT_CPU_THREADS or threads
+    STT_COMPUTE_TYPE = os.environ.get('STT_COMPUTE_TYPE', 'float16' if STT_DEVICE == 'cuda' else 'int8')
+    return cores
+
+def model_server_worker(index, device, cores, address, authkey):
+    cores = configure_model_worker(device, cores)
+    if MODEL_WARMUP_ENABLED:
+        # Warm up before taking tasks so none waits on a cold model
+        model_warmup.run()
+    manager = ModelServerManager(address=address, authkey=authkey)
+    manager.connect()
+    print(f"🧠 Model worker {index} ready on {device}" + (f" (cores {cores[0]}-{cores[-1]})" if cores else ''))
+
+    def serve():
+        tasks = manager.get_task_queue()
+        while True:
+            try:
+                client_id, task_id, kind, args = tasks.get()
+            except (EOFError, ConnectionError):
+                return
+            try:
+                reply = (task_id, True, run_model_task(kind, args))
+            except Exception as exc:
+                reply = (task_id, False, f'{type(exc).__name__}: {exc}')
+            manager.get_reply_queue(client_id).put(reply)
+
+    threads = [threading.Thread(target=serve, daemon=True) for _ in range(MODEL_SERVER_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def run_model_server():
+    """Serve the models to web workers (``python app.py model-server``)."""
+    global DEVICE
+    if not MODEL_SERVER_ADDRESS:
+        raise SystemExit('Set MODEL_SERVER_ADDRESS (host:port or a unix socket path) to run the model server')
+    address = parse_model_server_address(MODEL_SERVER_ADDRESS)
+    try:
+        authkey = model_server_authkey(MODEL_SERVER_ADDRESS, create=True)
+    except RuntimeError as exc:
+        raise SystemExit(str(exc))
+    if isinstance(address, str) and os.path.exists(address):
+        os.remove(address)
+    worker_specs = MODEL_SERVER_WORKERS or default_model_worker_specs()
+    workers = parse_model_worker_specs(worker_specs)
+
+    task_queue = queue.Queue()
+    reply_queues = {}
+    reply_queues_lock = threading.Lock()
+
+    def get_reply_queue(client_id):
+        with reply_queues_lock:
+            return reply_queues.setdefault(client_id, queue.Queue())
+
+    class Manager(ModelServerManager):
+        pass
+
+    Manager.register('get_task_queue', callable=lambda: task_queue)
+    Manager.register('get_reply_queue', callable=get_reply_queue)
+    # Binds the address now; workers connect as soon as serve_forever() runs
+    server = Manager(address=address, authkey=authkey).get_server()
+
+    cpu_workers = [spec for spec in workers if spec[0] == 'cpu']
+    fork_available = 'fork' in multiprocessing.get_all_start_methods()
+    if cpu_workers and fork_available and CAPABILITIES & TORCH_CAPABILITIES:
+        # Forked CPU workers share these weights copy-on-write instead of each
+        # loading their own. One thread keeps OpenMP from starting a pool that
+        # would not survive the fork.
+        import torch
+        DEVICE = 'cpu'
+        torch.set_num_threads(1)
+        if capability_enabled('tts'):
+            for engine in tts_engines_in_use():
+                load_tts_engine(engine)
+        if capability_enabled('vc'):
+            load_vc_model()
+
+    processes = []
+    for index, (device, cores) in enumerate(workers):
+        if device == 'cpu' and fork_available:
+            context = multiprocessing.get_context('fork')
+        else:
+            # CUDA cannot be used across fork(), so GPU workers start fresh
+            context = multiprocessing.get_context('spawn')
+        previous_visible = os.environ.get('CUDA_VISIBLE_DEVICES')
+        if device.startswith('cuda'):
+            os.environ['CUDA_VISIBLE_DEVICES'] = device.split(':', 1)[1]
+        process = context.Process(
+            target=model_server_worker,
+            args=(index, device, cores, address, authkey),
+            daemon=True
+        )
+        process.start()
+        if previous_visible is None:
+            os.environ.pop('CUDA_VISIBLE_DEVICES', None)
+        else:
+            os.environ['CUDA_VISIBLE_DEVICES'] = previous_visible
+        processes.append(process)
+
+    print(f"🧠 Model server listening on {MODEL_SERVER_ADDRESS} with {len(processes)} workers: {worker_specs}")
+    try:
+        server.serve_forever()
+    finally:
+        for process in processes:
+            process.terminate()
+
+class ModelServerClient:
+    """Sends inference tasks to the model server and resolves their Futures.
+
+    A task without a reply within timeout fails with TimeoutError (e.g. when
+    a model worker died), and a lost connection fails every pending task with
+    ConnectionError; the next submit() connects again.
+    """
+
+    def __init__(self, address, authkey=None, timeout=MODEL_SERVER_TIMEOUT_SECONDS, poll_seconds=1.0):
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.poll_seconds = poll_seconds
+        self._pid = None
+        self._manager = None
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._info = None
+
+    def _connect(self):
+        # Connections and the reply thread do not survive a fork, so each
+        # gunicorn worker process sets up its own
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            authkey = self.authkey or model_server_authkey(self.address)
+            address = parse_model_server_address(self.address)
+            # Proxies share per-thread connections by address; after a drop those are dead
+            BaseProxy._address_to_local.pop(address, None)
+            manager = ModelServerManager(address=address, authkey=authkey)
+            manager.connect()
+            self._manager = manager
+            self.client_id = uuid.uuid4().hex
+            self._tasks = manager.get_task_queue()
+            self._replies = manager.get_reply_queue(self.client_id)
+            self._pending = {}
+            self._pid = os.getpid()
+            threading.Thread(target=self._dispatch_replies, args=(self._replies, self._pending), daemon=True).start()
+            print(f"🔌 Connected to model server at {self.address}")
+
+    def _dispatch_replies(self, replies, pending):
+        while True:
+            try:
+                task_id, ok, payload = replies.get(timeout=self.poll_seconds)
+            except queue.Empty:
+                self._expire(pending)
+                continue
+            except (EOFError, OSError) as exc:
+                self._disconnected(pending, exc)
+                return
+            future, _ = pending.pop(task_id, (None, None))
+            if future is None:
+                continue
+            try:
+                if ok:
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RuntimeError(payload))
+            except InvalidStateError:
+                pass  # cancelled by the caller; the result is dropped
+
+    def _expire(self, pending):
+        now = time.monotonic()
+        for task_id, (future, deadline) in list(pending.items()):
+            if deadline < now and pending.pop(task_id, None) is not None:
+                self._fail(future, TimeoutError(f'No reply from the model server within {self.timeout:.0f}s'))
+
+    def _disconnected(self, pending, exc):
+        with self._lock:
+            if self._pending is pending:
+                self._pid = None
+                self._info = None
+                # Dropped proxies must not decref objects on a restarted server, whose ids may coincide
+                self._manager._state.value = State.SHUTDOWN
+        print(f"⚠️ Lost connection to model server at {self.address}: {exc}")
+        while pending:
+            _, (future, _) = pending.popitem()
+            self._fail(future, ConnectionError(f'Lost connection to the model server: {exc}'))
+
+    @staticmethod
+    def _fail(future, exc):
+        try:
+            future.set_exception(exc)
+        except InvalidStateError:
+            pass
+
+    def submit(self, kind, *args):
+        self._connect()
+        future = Future()
+        task_id = uuid.uuid4().hex
+        pending = self._pending
+        pending[task_id] = (future, time.monotonic() + self.timeout)
+        try:
+            self._tasks.put((self.client_id, task_id, kind, args))
+        except (EOFError, OSError) as exc:
+            pending.pop(task_id, None)
+            self._disconnected(pending, exc)
+            raise ConnectionError(f'Lost connection to the model server: {exc}') from exc
+        return future
+
+    def call(self, kind, *args):
+        # The reply thread fails the future at the deadline; the margin covers its polling
+        return self.submit(kind, *args).result(timeout=self.timeout + 2 * self.poll_seconds)
+
+    def info(self):
+        if self._info is None:
+            self._info = self.call('info')
+        return self._info
+
+    def stats(self):
+        return {
+            'address': self.address,
+            'connected': self._pid == os.getpid(),
+            'pending': len(self._pending) if self._pid == os.getpid() else 0,
+            'timeout_seconds': self.timeout,
+        }
+
+_model_server_client = None
+
+def model_server_client():
+    global _model_server_client
+    if _model_server_client is None:
+        _model_server_client = ModelServerClient(MODEL_SERVER_ADDRESS)
+    return _model_server_client
+
+# Startup warm-up: each web worker (or model-server worker) loads its models
+# in parallel in the background and runs one short inference on each, so
+# the first real request does not pay for downloads, weight loading and
+# kernel setup. /api/ready reports when that has finished.
+
+WARMUP_TEXT = 'Hello, this is a warm-up.'
+MODEL_SERVER_RETRY_SECONDS = 2
+
+def warm_up_tts():
+    for engine in tts_engines_in_use():
+        model = load_tts_engine(engine)
+        submit_tts(model, WARMUP_TEXT, 'en', parse_tts_params({}), None, None, 0).result()
+
+def warm_up_vc():
+    _local_vc_convert(np.zeros(VC_SOURCE_SAMPLE_RATE, dtype=np.float32))
+
+def warm_up_stt():
+    tiers = ['full', 'draft'] if STT_MODE == 'tiered' else ['full']
+    for tier in tiers:
+        segments, _ = _local_whisper_transcribe(np.zeros(STT_SAMPLE_RATE, dtype=np.float32), tier=tier, beam_size=1, vad_filter=False)
+        list(segments)
+
+def warm_up_model_server():
+    # The model server warms its own workers; here we only wait until it answers
+    while True:
+        try:
+            return model_server_client().info()
+        except Exception as exc:
+            print(f"⏳ Model server not reachable yet: {exc}")
+            time.sleep(MODEL_SERVER_RETRY_SECONDS)
+
+WARMUP_TASKS = {
+    'tts': warm_up_tts,
+    'vc': warm_up_vc,
+    'stt': warm_up_stt,
+    'model_server': warm_up_model_server,
+}
+
+class ModelWarmup:
+    """Loads and warms up the models of this process in parallel background threads."""
+
+    def __init__(self, models=MODEL_WARMUP_MODELS):
+        self.models = models
+        self.state = {}
+        self._pid = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    def targets(self):
+        if model_server_enabled():
+            return ['model_server']
+        unknown = [name for name in self.models if name not in WARMUP_TASKS]
+        if unknown:
+            print(f"⚠️ Unknown warm-up models ignored: {', '.join(unknown)}")
+        return [name for name in self.models if capability_enabled(name)
+                and (name in {'tts', 'vc'} or (name == 'stt' and FASTER_WHISPER_AVAILABLE))]
+
+    def start(self):
+        """Start warming up in the background, once per process (threads do not survive a fork)."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._reset()
+        threading.Thread(target=self.run, name='vaani-warmup', daemon=True).start()
+
+    def run(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                self._pid = os.getpid()
+                self._reset()
+        names = list(self.state)
+        if names:
+            print(f"🔥 Warming up models: {', '.join(names)}")
+            with ThreadPoolExecutor(max_workers=len(names), thread_name_prefix='vaani-warmup') as executor:
+                for name in names:
+                    executor.submit(self._warm, name)
+        self._done.set()
+
+    def _reset(self):
+        self.state = {name: {'status': 'pending', 'seconds': None, 'error': None} for name in self.targets()}
+        self._done.clear()
+
+    def _warm(self, name):
+        entry = self.state[name]
+        entry['status'] = 'warming'
+        started = time.perf_counter()
+        try:
+            WARMUP_TASKS[name]()
+            entry['status'] = 'ready'
+            print(f"✅ {name} warmed up in {time.perf_counter() - started:.1f}s")
+        except Exception as exc:
+            entry['status'] = 'failed'
+            entry['error'] = str(exc)
+            print(f"❌ {name} warm-up failed: {exc}")
+        entry['seconds'] = round(time.perf_counter() - started, 3)
+
+    @property
+    def ready(self):
+        if not MODEL_WARMUP_ENABLED:
+            return True
+        return self._done.is_set() and all(entry['status'] == 'ready' for entry in self.state.values())
+
+    def wait(self, timeout=None):
+        return not MODEL_WARMUP_ENABLED or self._done.wait(timeout)
+
+    def to_dict(self):
+        return {
+            'ready': self.ready,
+            'enabled': MODEL_WARMUP_ENABLED,
+            'models': {name: dict(entry) for name, entry in self.state.items()},
+        }
+
+model_warmup = ModelWarmup()
+
+def start_model_warmup():
+    """Warm up this process's models in the background.
+
+    Called by the server entry points (``python app.py`` and the gunicorn
+    post_worker_init hook in gunicorn.conf.py), never on import, so tools
+    that import the module do not start loading models.
+    """
+    if MODEL_WARMUP_ENABLED:
+        model_warmup.start()
+
+class StreamingTranscriber:
+    """Incremental Whisper decoding over a live 16 kHz PCM stream.
+
+    Audio is classified in 30 ms frames by an energy VAD. While speech is
+    active the current utterance is re-decoded greedily every
+    STT_STREAM_PARTIAL_MS to produce partial hypotheses (less often if a decode
+    takes longer than that). An utterance becomes final after
+    STT_STREAM_ENDPOINT_MS of silence, or once it reaches STT_CHUNK_SECONDS, in
+    which case it is cut at the quietest frame of its last second and the rest
+    carries over.
+    """
+
+    FRAME_MS = 30
+    PREROLL_FRAMES = 10
+
+    def __init__(self, language=None, task='transcribe', input_rate=STT_STREAM_INPUT_RATE):
+        self.language = language
+        self.task = task if task in {'transcribe', 'translate'} else 'transcribe'
+        self.input_rate = input_rate
+        self.frame_samples = STT_SAMPLE_RATE * self.FRAME_MS // 1000
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.preroll = []
+        self.utterance = []
+        self.utterance_start = 0
+        self.stream_samples = 0
+        self.silence_ms = 0
+        self.samples_since_partial = 0
+        self.last_decode_seconds = 0.0
+        self.finals = []
+        self.last_activity = time.time()
+        self.lock = threading.Lock()
+
+    def feed(self, pcm_bytes):
+        """Add PCM audio and return the partial/final events it produced."""
+        with self.lock:
+            self.last_activity = time.time()
+            events = []
+            self.pending = np.concatenate([self.pending, pcm16_bytes_to_float(pcm_bytes, self.input_rate)])
+            while len(self.pending) >= self.frame_samples:
+                frame = self.pending[:self.frame_samples]
+                self.pending = self.pending[self.frame_samples:]
+                self.stream_samples += self.frame_samples
+                event = self._process_frame(frame)
+                if event:
+                    events.append(event)
+
+            partial_due = max(STT_STREAM_PARTIAL_MS / 1000.0, self.last_decode_seconds) * STT_SAMPLE_RATE
+            if self.utterance and self.samples_since_partial >= partial_due:
+                self.samples_since_partial = 0
+                text = self._decode(np.concatenate(self.utterance), final=False)
+                if text:
+                    events.append(self._event('partial', text, self._utterance_samples()))
+            return events
+
+    def finish(self):
+        """Flush the stream and return the remaining final event, if any."""
+        with self.lock:
+            if not self.utterance:
+                return []
+            event = self._finalize(len(self.utterance))
+            return [event] if event else []
+
+    def _utterance_samples(self):
+        return sum(len(frame) for frame in self.utterance)
+
+    def _process_frame(self, frame):
+        voiced = float(np.sqrt(np.mean(frame ** 2))) >= STT_STREAM_VAD_THRESHOLD
+        if not self.utterance:
+            if not voiced:
+                # Keep a little audio from before the onset so the first word is not clipped
+                self.preroll = (self.preroll + [frame])[-self.PREROLL_FRAMES:]
+                return None
+            self.utterance = self.preroll + [frame]
+            self.preroll = []
+            self.utterance_start = self.stream_samples - self._utterance_samples()
+            self.silence_ms = 0
+            self.samples_since_partial = self._utterance_samples()
+            return None
+
+        self.utterance.append(frame)
+        self.samples_since_partial += len(frame)
+        self.silence_ms = 0 if voiced else self.silence_ms + self.FRAME_MS
+        if self.silence_ms >= STT_STREAM_ENDPOINT_MS:
+            return self._finalize(len(self.utterance))
+        if self._utterance_samples() >= STT_CHUNK_SECONDS * STT_SAMPLE_RATE:
+            window = self.utterance[-(1000 // self.FRAME_MS):]
+            quietest = int(np.argmin([np.mean(f ** 2) for f in window]))
+            return self._finalize(len(self.utterance) - len(window) + quietest + 1)
+        return None
+
+    def _finalize(self, frame_count):
+        committed, carry = self.utterance[:frame_count], self.utterance[frame_count:]
+        audio = np.concatenate(committed)
+        text = self._decode(audio, final=True)
+        event = self._event('final', text, len(audio)) if text else None
+        if text:
+            self.finals.append(text)
+        self.utterance_start += len(audio)
+        self.utterance = carry
+        self.samples_since_partial = sum(len(f) for f in carry)
+        self.silence_ms = 0
+        return event
+
+    def _decode(self, audio, final):
+        kwargs = {
+            'task': self.task,
+            'vad_filter': False,
+            'without_timestamps': True,
+            'condition_on_previous_text': False,
+        }
+        if self.language:
+            kwargs['language'] = self.language
+        if final:
+            kwargs['beam_size'] = 5
+            if self.finals:
+                kwargs['initial_prompt'] = ' '.join(self.finals[-3:])
+        else:
+            kwargs['beam_size'] = 1
+        started = time.time()
+        segments, info = whisper_transcribe(audio, **kwargs)
+        text = ' '.join(segment['text'] for segment in segments).strip()
+        self.last_decode_seconds = time.time() - started
+        if final and not self.language:
+            # Lock the detected language for the rest of the stream
+            self.language = info['language']
+        return text
+
+    def _event(self, kind, text, length):
+        return {
+            'type': kind,
+            'text': text,
+            'start': self.utterance_start / STT_SAMPLE_RATE,
+            'end': (self.utterance_start + length) / STT_SAMPLE_RATE,
+            'language': self.language,
+            'latency_ms': round(self.last_decode_seconds * 1000, 1),
+        }
+
+live_stt_sessions = {}
+live_stt_sessions_lock = threading.Lock()
+
+def expire_live_stt_sessions():
+    """Drop sessions idle for STT_STREAM_SESSION_TTL_SECONDS; runs on every session request."""
+    cutoff = time.time() - STT_STREAM_SESSION_TTL_SECONDS
+    with live_stt_sessions_lock:
+        for session_id in [sid for sid, t in live_stt_sessions.items() if t.last_activity < cutoff]:
+            del live_stt_sessions[session_id]
+
+# Output encoding. Float model output is clipped and converted to 16-bit PCM
+# a chunk at a time and streamed to the client behind a WAV header, or piped
+# through ffmpeg for the compressed formats.
+
+PCM_CHUNK_SAMPLES = 65536
+AUDIO_OUTPUT_FORMATS = {
+    'wav': {'mimetype': 'audio/wav', 'extension': '.wav'},
+    'flac': {'mimetype': 'audio/flac', 'extension': '.flac', 'ffmpeg': ['-c:a', 'flac', '-f', 'flac']},
+    'mp3': {'mimetype': 'audio/mpeg', 'extension': '.mp3',
+            'ffmpeg': ['-c:a', 'libmp3lame', '-b:a', MP3_BITRATE, '-f', 'mp3']},
+    # Opus only takes a few sample rates, so resample to its native 48 kHz
+    'opus': {'mimetype': 'audio/ogg', 'extension': '.opus',
+             'ffmpeg': ['-ar', '48000', '-c:a', 'libopus', '-b:a', OPUS_BITRATE, '-f', 'ogg']},
+}
+
+def parse_output_format(form, default='wav'):
+    """Validated ``format`` field of a request; raises ValueError for unknown or unavailable formats."""
+    output_format = (form.get('format') or default).lower()
+    if output_format not in AUDIO_OUTPUT_FORMATS:
+        raise ValueError(f"Unsupported output format: {output_format} (use {', '.join(AUDIO_OUTPUT_FORMATS)})")
+    if output_format != 'wav' and not shutil.which(FFMPEG_BINARY):
+        raise ValueError(f'Output format {output_format} needs ffmpeg, which is not installed on this server')
+    return output_format
+
+def pcm16_blocks(audio_data, chunk_samples=PCM_CHUNK_SAMPLES):
+    """Yield int16 blocks of a model output, converting and clipping one chunk at a time.
+
+    The float scratch buffer is reused between chunks, so converting a long
+    clip never holds more than one chunk of intermediate floats.
+    """
+    if isinstance(audio_data, np.ndarray) and audio_data.dtype == np.int16:
+        for start in range(0, len(audio_data), chunk_samples):
+            yield audio_data[start:start + chunk_samples]
+        return
+    audio = waveform_to_numpy(audio_data)
+    scratch = np.empty(min(chunk_samples, len(audio)), dtype=np.float32)
+    spent = 0.0
+    for start in range(0, len(audio), chunk_samples):
+        started = time.perf_counter()
+        block = scratch[:min(chunk_samples, len(audio) - start)]
+        np.multiply(audio[start:start + len(block)], 32767, out=block)
+        # Without clipping, samples outside [-1, 1] would wrap around
+        np.clip(block, -32768, 32767, out=block)
+        pcm = block.astype(np.int16)
+        spent += time.perf_counter() - started
+        yield pcm
+    stage_seconds.observe(spent, stage='wav_encode')
+
+def iter_pcm16(audio_data, chunk_samples=PCM_CHUNK_SAMPLES):
+    """Yield 16-bit little-endian PCM bytes of a model output."""
+    for block in pcm16_blocks(audio_data, chunk_samples):
+        yield block.astype('<i2', copy=False).tobytes()
+
+def audio_to_pcm16(audio_data):
+    """Convert a model output (tensor or array) to a 16-bit PCM numpy array"""
+    if isinstance(audio_data, np.ndarray) and audio_data.dtype == np.int16:
+        return audio_data
+    audio = waveform_to_numpy(audio_data)
+    pcm = np.empty(len(audio), dtype=np.int16)
+    offset = 0
+    for block in pcm16_blocks(audio):
+        pcm[offset:offset + len(block)] = block
+        offset += len(block)
+    return pcm
+
+def iter_wav(audio_data, sample_rate):
+    """A complete WAV file as a header followed by PCM chunks."""
+    if not (isinstance(audio_data, np.ndarray) and audio_data.dtype == np.int16):
+        audio_data = waveform_to_numpy(audio_data)
+    yield wav_stream_header(sample_rate, data_bytes=len(audio_data) * 2)
+    yield from iter_pcm16(audio_data)
+
+def save_audio_to_wav(audio_data, sample_rate):
+    """Convert audio data to WAV format and return as bytes"""
+    buffer = io.BytesIO()
+    for chunk in iter_wav(audio_data, sample_rate):
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+def read_wav_bytes(data):
+    """(int16 samples, sample_rate) of a mono 16-bit WAV produced by save_audio_to_wav."""
+    with wave.open(io.BytesIO(data), 'rb') as wav_file:
+        return np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype='<i2'), wav_file.getframerate()
+
+def iter_ffmpeg(arguments, input_chunks, description, stage):
+    """Run ffmpeg writing to pipe:1 and yield its output as it comes out.
+
+    input_chunks are fed to pipe:0; pass None when the arguments name an input file.
+    """
+    command = [FFMPEG_BINARY, '-hide_banner', '-loglevel', 'error', *arguments]
+    stdin = subprocess.DEVNULL if input_chunks is None else subprocess.PIPE
+    process = subprocess.Popen(command, stdin=stdin, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def feed():
+        try:
+            for chunk in input_chunks:
+                process.stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            pass  # ffmpeg exited early; its exit status is reported below
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    # Writing from another thread keeps ffmpeg's stdout from filling up while we feed it
+    feeder = threading.Thread(target=feed, name='vaani-ffmpeg-feed', daemon=True)
+    if input_chunks is not None:
+        feeder.start()
+    # stderr is drained as it is written too, or a chatty ffmpeg blocks on a full pipe
+    errors = []
+    drainer = threading.Thread(target=lambda: errors.append(process.stderr.read()), name='vaani-ffmpeg-stderr', daemon=True)
+    drainer.start()
+    started = time.perf_counter()
+    try:
+        for chunk in iter(lambda: process.stdout.read(PCM_CHUNK_SAMPLES), b''):
+            yield chunk
+        if input_chunks is not None:
+            feeder.join()
+        if process.wait() != 0:
+            drainer.join()
+            raise RuntimeError(f"ffmpeg {description} failed: {b''.join(errors).decode('utf-8', 'replace').strip()}")
+        stage_seconds.observe(time.perf_counter() - started, stage=stage)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        drainer.join()
+        process.stdout.close()
+        process.stderr.close()
+
+def iter_ffmpeg_encode(pcm_chunks, sample_rate, output_format):
+    """Pipe 16-bit mono PCM through ffmpeg and yield the encoded bytes as they come out."""
+    arguments = [
+        '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0',
+        *AUDIO_OUTPUT_FORMATS[output_format]['ffmpeg'], 'pipe:1'
+    ]
+    return iter_ffmpeg(arguments, pcm_chunks, f'{output_format} encoding', 'audio_encode')
+
+def iter_ffmpeg_decode(source, sample_rate, block_size=1024 * 1024):
+    """Decode a file path or binary stream with ffmpeg, yielding mono float32 blocks at sample_rate as they are decoded."""
+    if hasattr(source, 'read'):
+        source.seek(0)
+        input_chunks, input_name = iter(lambda: source.read(block_size), b''), 'pipe:0'
+    else:
+        input_chunks, input_name = None, str(source)
+    arguments = ['-i', input_name, '-vn', '-f', 'f32le', '-ac', '1', '-ar', str(sample_rate), 'pipe:1']
+    remainder = b''
+    for chunk in iter_ffmpeg(arguments, input_chunks, 'decoding', 'upload_decode'):
+        chunk = remainder + chunk
+        usable = len(chunk) - len(chunk) % 4
+        remainder = chunk[usable:]
+        if usable:
+            yield np.frombuffer(chunk[:usable], dtype='<f4')
+
+def iter_encoded_audio(audio_data, sample_rate, output_format):
+    if output_format == 'wav':
+        return iter_wav(audio_data, sample_rate)
+    return iter_ffmpeg_encode(iter_pcm16(audio_data), sample_rate, output_format)
+
+def encode_audio_bytes(audio_data, sample_rate, output_format='wav'):
+    return b''.join(iter_encoded_audio(audio_data, sample_rate, output_format))
+
+def wav_stream_header(sample_rate, channels=1, sample_width=2, data_bytes=None):
+    """RIFF/WAV header; without data_bytes it is for a stream whose final length is not known yet.
+
+    The RIFF and data chunk sizes are then set to 0xFFFFFFFF, which browsers,
+    ffmpeg and most players treat as "read until end of stream".
+    """
+    byte_rate = sample_rate * channels * sample_width
+    block_align = channels * sample_width
+    data_size = 0xFFFFFFFF if data_bytes is None else data_bytes
+    riff_size = 0xFFFFFFFF if data_bytes is None else 36 + data_bytes
+    return (
+        b'RIFF' + struct.pack('<I', riff_size) + b'WAVE'
+        + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate, byte_rate, block_align, sample_width * 8)
+        + b'data' + struct.pack('<I', data_size)
+    )
+
+# Long-form synthesis. Long text is planned into segments at sentence and
+# paragraph boundaries, a bounded number of segments are generated concurrently
+# (queued on the model's scheduler locally or spread over the model-server pool) with the same voice and seed,
+# and stitched back together with short crossfades at matched loudness.
+
+def plan_longform_segments(text, language='en', max_chars=None):
+    """[(segment text, pause in ms after it)] for long text; paragraphs end with a longer pause."""
+    max_chars = max_chars or TTS_LONGFORM_SEGMENT_CHARS
+    paragraphs = [paragraph.strip() for paragraph in re.split(r'\n\s*\n', text) if paragraph.strip()]
+    segments = []
+    for paragraph in paragraphs:
+        chunks = split_text_for_tts(paragraph, language, max_chars=max_chars, min_chars=max_chars // 3)
+        segments.extend((chunk, 0.0) for chunk in chunks)
+        segments[-1] = (segments[-1][0], TTS_LONGFORM_PARAGRAPH_PAUSE_MS)
+    if segments:
+        segments[-1] = (segments[-1][0], 0.0)
+    return segments or [(text.strip(), 0.0)]
+
+def trim_silence(audio, sample_rate, threshold=0.01, keep_ms=40):
+    """Drop leading and trailing near-silence, keeping keep_ms of it at each end."""
+    loud = np.flatnonzero(np.abs(audio) > threshold)
+    if len(loud) == 0:
+        return audio
+    keep = int(sample_rate * keep_ms / 1000)
+    return audio[max(0, loud[0] - keep):loud[-1] + keep + 1]
+
+def match_loudness(pieces, max_gain=2.0):
+    """Scale segments towards their median RMS so neighbouring segments do not jump in level."""
+    levels = [float(np.sqrt(np.mean(np.square(piece)))) if len(piece) else 0.0 for piece in pieces]
+    voiced = [level for level in levels if level > 1e-4]
+    if not voiced:
+        return pieces
+    target = float(np.median(voiced))
+    return [
+        piece * float(np.clip(target / level, 1 / max_gain, max_gain)) if level > 1e-4 else piece
+        for piece, level in zip(pieces, levels)
+    ]
+
+def stitch_segments(pieces, pauses_ms, sample_rate, crossfade_ms=None):
+    """Join float segments with an equal-power crossfade, or with silence where a pause is wanted."""
+    crossfade_ms = TTS_LONGFORM_CROSSFADE_MS if crossfade_ms is None else crossfade_ms
+    fade = int(sample_rate * crossfade_ms / 1000)
+    total = sum(len(piece) for piece in pieces) + sum(int(sample_rate * pause / 1000) for pause in pauses_ms[:-1])
+    output = np.zeros(total, dtype=np.float32)
+    position = 0
+    for index, piece in enumerate(pieces):
+        overlap = min(fade, position, len(piece)) if index and not pauses_ms[index - 1] else 0
+        if overlap:
+            ramp = np.linspace(0.0, np.pi / 2, overlap, dtype=np.float32)
+            position -= overlap
+            output[position:position + overlap] *= np.cos(ramp)
+            output[position:position + overlap] += piece[:overlap] * np.sin(ramp)
+            piece = piece[overlap:]
+            position += overlap
+        output[position:position + len(piece)] = piece
+        position += len(piece)
+        if index < len(pieces) - 1:
+            position += int(sample_rate * pauses_ms[index] / 1000)
+    return output[:position]
+
+def synthesize_longform(text, language, params, voice=None, seed=0, on_segment=None, should_stop=None, in_flight=None):
+    """Generate long text as concurrently synthesized, crossfaded segments; returns (float32 samples, sample_rate).
+
+    Up to in_flight (TTS_LONGFORM_PARALLELISM) segments are queued at once,
+    so inference workers stay busy without one long text filling the queue
+    ahead of other requests. on_segment(done, total) reports progress;
+    should_stop() is polled between segments.
+    """
+    segments = plan_longform_segments(text, language)
+    in_flight = max(1, TTS_LONGFORM_PARALLELISM if in_flight is None else in_flight)
+    upcoming = iter(segments)
+    pending = deque()
+    pieces = []
+    sample_rate = None
+
+    def queue_next():
+        segment = next(upcoming, None)
+        if segment is not None:
+            pending.append(tts_generate_async(segment[0], language, params, voice, seed))
+
+    try:
+        for _ in range(in_flight):
+            queue_next()
+        while pending:
+            if should_stop is not None and should_stop():
+                raise JobCancelled()
+            wav, sample_rate = pending.popleft().result()
+            queue_next()
+            pieces.append(wav)
+            if on_segment is not None:
+                on_segment(len(pieces), len(segments))
+    finally:
+        for future in pending:
+            future.cancel()
+
+    with stage_timer('tts_stitch'):
+        pieces = match_loudness([trim_silence(piece, sample_rate) for piece in pieces])
+        audio = stitch_segments(pieces, [pause for _, pause in segments], sample_rate)
+    return audio, sample_rate
+
+# Windowed voice conversion. The source is decoded in overlapping windows as
+# it is read, every window is converted with a target speaker reference that
+# is computed once, and the converted windows are crossfaded over their
+# overlap, so memory and time to first audio do not grow with clip length.
+
+def iter_source_blocks(source, suffix=None):
+    """Decoded 16 kHz blocks of a VC source: incrementally through ffmpeg, else decoded in one go."""
+    if shutil.which(FFMPEG_BINARY):
+        decoded_any = False
+        try:
+            for block in iter_ffmpeg_decode(source, VC_SOURCE_SAMPLE_RATE):
+                decoded_any = True
+                yield block
+            return
+        except RuntimeError as exc:
+            # Some containers (like m4a with the index at the end) cannot be read from a pipe
+            if decoded_any:
+                raise
+            print(f"⚠️ Incremental decoding failed, decoding the whole source: {exc}")
+    yield decode_audio_source(source, VC_SOURCE_SAMPLE_RATE, suffix=suffix)
+
+def iter_vc_windows(source, suffix=None):
+    """Yield overlapping VC_WINDOW_SECONDS windows of 16 kHz source audio from a path or stream."""
+    window = max(1, int(VC_WINDOW_SECONDS * VC_SOURCE_SAMPLE_RATE))
+    overlap = min(int(VC_WINDOW_OVERLAP_SECONDS * VC_SOURCE_SAMPLE_RATE), window // 2)
+    buffer = np.zeros(0, dtype=np.float32)
+    emitted = False
+    for block in iter_source_blocks(source, suffix):
+        buffer = np.concatenate([buffer, block])
+        while len(buffer) >= window:
+            yield buffer[:window]
+            emitted = True
+            buffer = buffer[window - overlap:]
+    # The tail is only new audio if it goes past the overlap already converted
+    if len(buffer) > overlap or (not emitted and len(buffer)):
+        yield buffer
+
+def crossfade_windows(converted):
+    """Overlap-add consecutive (samples, sample_rate) windows, yielding finished float32 audio as it is known."""
+    held = None
+    for audio, sample_rate in converted:
+        overlap = int(min(VC_WINDOW_OVERLAP_SECONDS, VC_WINDOW_SECONDS / 2) * sample_rate)
+        if held is not None:
+            length = min(len(held), len(audio))
+            ramp = np.linspace(0.0, np.pi / 2, length, dtype=np.float32)
+            yield held[:length] * np.cos(ramp) + audio[:length] * np.sin(ramp)
+            if len(held) > length:
+                yield held[length:]
+            audio = audio[length:]
+        # The end of this window is held back to be blended with the start of the next
+        cut = max(0, len(audio) - overlap)
+        if cut:
+            yield audio[:cut]
+        held = audio[cut:]
+    if held is not None and len(held):
+        yield held
+
+def convert_voice_windows(windows, target, in_flight=1):
+    """Convert windows in order with up to in_flight more queued ahead; yields (samples, sample_rate)."""
+    pending = deque()
+    try:
+        for window in windows:
+            pending.append(vc_convert_async(window, target))
+            if len(pending) > in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+def iter_windowed_vc(source, target=None, suffix=None, in_flight=1):
+    """Converted audio of a path or stream source as float32 chunks, in order."""
+    target = vc_embed_target(target)
+    return crossfade_windows(convert_voice_windows(iter_vc_windows(source, suffix), target, in_flight))
+
+# Dubbing. Whisper segments are handed to TTS as soon as each is decoded,
+# through a bounded queue that holds STT back when TTS falls behind. The
+# synthesized lines are fitted into their original start/end slots and the
+# track is streamed in timeline order, so the total time approaches the
+# slower of the two stages instead of their sum.
+
+def time_stretch(audio, rate, frame=1024):
+    """Speed audio up by rate without changing pitch (librosa when installed, else windowed overlap-add)."""
+    if rate <= 1.0 or len(audio) < frame:
+        return audio
+    try:
+        import librosa
+        return librosa.effects.time_stretch(audio, rate=rate).astype(np.float32, copy=False)
+    except ImportError:
+        pass
+    hop_out = frame // 4
+    hop_in = hop_out * rate
+    window = np.hanning(frame).astype(np.float32)
+    frames = int((len(audio) - frame) / hop_in) + 1
+    output = np.zeros(hop_out * (frames - 1) + frame, dtype=np.float32)
+    weight = np.zeros_like(output)
+    for index in range(frames):
+        start = int(index * hop_in)
+        output[index * hop_out:index * hop_out + frame] += audio[start:start + frame] * window
+        weight[index * hop_out:index * hop_out + frame] += window
+    return output / np.maximum(weight, 1e-3)
+
+def fit_to_slot(audio, sample_rate, slot_seconds, max_speedup=None):
+    """Trim a synthesized line and speed it up (at most max_speedup) so it fits slot_seconds."""
+    max_speedup = DUB_MAX_SPEEDUP if max_speedup is None else max_speedup
+    audio = trim_silence(audio, sample_rate)
+    slot = int(slot_seconds * sample_rate)
+    if slot > 0 and len(audio) > slot:
+        audio = time_stretch(audio, min(len(audio) / slot, max_speedup))
+    return audio
+
+def source_voice_reference(audio, seconds=None):
+    """The opening of the source as a TTS voice, so the dub keeps the original speaker."""
+    clip = audio[:int((seconds or DUB_REFERENCE_SECONDS) * STT_SAMPLE_RATE)]
+    wav_bytes = save_audio_to_wav(clip, STT_SAMPLE_RATE).getvalue()
+    return {'hash': hash_bytes(wav_bytes), 'bytes': wav_bytes, 'suffix': '.wav'}
+
+class DubbingPipeline:
+    """STT producer feeding TTS through a bounded queue; iterate it for the dubbed track in order.
+
+    Iteration yields float32 chunks at sample_rate: silence up to each
+    segment's start, then the synthesized line fitted to its slot. A line that
+    still overruns its slot after the capped speed-up delays the ones after it.
+    Without a target language the TTS engine depends on the detected one, so
+    sample_rate may be None and is then set from the first synthesized line.
+    """
+
+    _DONE = object()
+
+    def __init__(self, audio, sample_rate, params, voice=None, seed=0, language=None, target_language=None, task='transcribe'):
+        self.audio = audio
+        self.sample_rate = sample_rate
+        self.params = params
+        self.voice = voice
+        self.seed = seed
+        self.language = language
+        self.target_language = target_language
+        self.task = task
+        self.segments = queue.Queue(maxsize=max(1, DUB_QUEUE_SIZE))
+        self.stopped = threading.Event()
+        self.duration = len(audio) / STT_SAMPLE_RATE
+        self.segment_count = 0
+        self.detected_language = None
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.segments.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise JobCancelled()
+
+    def _transcribe(self):
+        def on_segment(segment, info):
+            if not segment['text']:
+                return
+            self.detected_language = info['language']
+            language = self.target_language or info['language']
+            # Queued before blocking on the queue, so TTS starts on this line right away
+            future = tts_generate_async(segment['text'], language, self.params, self.voice, self.seed)
+            try:
+                self._put((segment, future))
+            except JobCancelled:
+                future.cancel()
+                raise
+
+        try:
+            result = transcribe_audio_file(self.audio, language=self.language, task=self.task, on_segment=on_segment)
+            self.detected_language = result['language']
+            self._put(self._DONE)
+        except JobCancelled:
+            pass
+        except Exception as exc:
+            try:
+                self._put(exc)
+            except JobCancelled:
+                pass
+
+    def __iter__(self):
+        producer = threading.Thread(target=self._transcribe, name='vaani-dub-stt', daemon=True)
+        producer.start()
+        cursor = 0
+        try:
+            while True:
+                item = self.segments.get()
+                if item is self._DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                segment, future = item
+                wav, sample_rate = future.result()
+                if self.sample_rate is None:
+                    self.sample_rate = sample_rate
+                with stage_timer('dub_fit'):
+                    line = fit_to_slot(wav, self.sample_rate, segment['end'] - segment['start'])
+                start = max(cursor, int(segment['start'] * self.sample_rate))
+                if start > cursor:
+                    yield np.zeros(start - cursor, dtype=np.float32)
+                yield line
+                cursor = start + len(line)
+                self.segment_count += 1
+            if self.sample_rate is None:
+                # Nothing was said: the engine of the detected language sets the rate
+                self.sample_rate = tts_engine_info(self.target_language or self.detected_language)['sample_rate']
+            end = int(self.duration * self.sample_rate)
+            if end > cursor:
+                yield np.zeros(end - cursor, dtype=np.float32)
+        finally:
+            # On early exit, stop STT and drop the lines already queued for TTS
+            self.stopped.set()
+            while True:
+                try:
+                    item = self.segments.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, tuple):
+                    item[1].cancel()
+
+def parse_tts_params(form):
+    """Read the sampling parameters for TTS from a request form."""
+    return {
+        'exaggeration': float(form.get('exaggeration', 0.5)),
+        'temperature': float(form.get('temperature', 0.8)),
+        'cfg_weight': float(form.get('cfg_weight', 0.5)),
+        'min_p': float(form.get('min_p', 0.05)),
+        'top_p': float(form.get('top_p', 1.0)),
+        'repetition_penalty': float(form.get('repetition_penalty', 1.1)),  # Reduced from 1.2 to 1.1 for longer audio
+    }
+
+def supports_cached_conditionals(model):
+    """Chatterbox models expose prepare_conditionals()/conds; the mocks do not."""
+    return hasattr(model, 'prepare_conditionals') and hasattr(model, 'conds')
+
+def remember_default_conditionals(model):
+    """Keep the built-in voice so requests without a reference can restore it."""
+    if supports_cached_conditionals(model) and model.conds is not None:
+        default_tts_conditionals[model] = model.conds
+
+def _conditionals_path(cache_key):
+    return TTS_COND_CACHE_DIR / f"{cache_key.replace(':', '-')}.pt"
+
+def _load_persisted_conditionals(model, cache_key):
+    path = _conditionals_path(cache_key)
+    if not path.exists():
+        return None
+    conds_cls = type(model.conds) if model.conds is not None else \
+        getattr(sys.modules.get(type(model).__module__), 'Conditionals', None)
+    if conds_cls is None or not hasattr(conds_cls, 'load'):
+        return None
+    try:
+        return conds_cls.load(path, map_location=get_device()).to(get_device())
+    except Exception as exc:
+        print(f"⚠️ Could not load cached conditionals {path.name}: {exc}")
+        return None
+
+def _persist_conditionals(cache_key, conds):
+    if not hasattr(conds, 'save'):
+        return
+    try:
+        TTS_COND_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        path = _conditionals_path(cache_key)
+        tmp_path = path.with_suffix('.tmp')
+        conds.save(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        print(f"⚠️ Could not persist conditionals: {exc}")
+
+def get_tts_conditionals(model, content_hash, exaggeration=0.5, audio_path=None, audio_bytes=None, suffix='.wav'):
+    """Return speaker conditionals for a reference clip, computing them once per content hash and exaggeration.
+
+    Pass either audio_path (an existing file) or audio_bytes (an upload that is
+    only written to disk when the conditionals are not cached yet). The
+    returned object is shared; synthesize_tts hands the model a copy of it.
+    """
+    cache_key = f"{type(model).__name__}:{content_hash}:{exaggeration:g}"
+    conds = speaker_conditioning_cache.get(cache_key)
+    if conds is not None:
+        return conds
+
+    if TTS_COND_CACHE_PERSIST:
+        conds = _load_persisted_conditionals(model, cache_key)
+
+    if conds is None:
+        temp_path = None
+        if audio_path is None:
+            audio_path = temp_path = write_temp_audio(audio_bytes, suffix)
+        try:
+            started = time.time()
+            with get_model_lock(model), stage_timer('reference_conditioning'):
+                model.prepare_conditionals(audio_path, exaggeration=exaggeration)
+                conds = model.conds
+            print(f"🎭 Computed speaker conditioning in {time.time() - started:.2f}s")
+        finally:
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+        if TTS_COND_CACHE_PERSIST:
+            _persist_conditionals(cache_key, conds)
+
+    speaker_conditioning_cache.put(cache_key, conds)
+    return conds
+
+def synthesize_tts(model, text, language, reference_audio_path, params, conditionals=None, seed=0):
+    """Run one TTS generation, passing language_id only to the multilingual model.
+
+    conditionals (from get_tts_conditionals) select the speaker without
+    re-reading reference audio; reference_audio_path is the uncached fallback.
+    A non-zero seed reseeds the global RNGs while holding sampling_lock
+    exclusively, so no other TTS or VC generation in this process can draw
+    from them in between and the same seed always gives the same audio.
+    """
+    import torch
+    # Check if this is the multilingual version (needs language_id)
+    is_multilingual = 'Multilingual' in str(type(model).__name__)
+
+    with get_model_lock(model), torch.no_grad(), sampling_guard(seed):
+        if seed != 0:
+            set_seed(seed)
+        if supports_cached_conditionals(model) and reference_audio_path is None:
+            # Select the speaker; without a voice this restores the built-in one. generate()
+            # replaces conds.t3 when exaggeration changes, so it gets a copy of the cached object
+            selected = conditionals if conditionals is not None else default_tts_conditionals.get(model, model.conds)
+            model.conds = copy.copy(selected)
+        started = time.perf_counter()
+        if is_multilingual:
+            wav = model.generate(
+                text,
+                language_id=language,
+                audio_prompt_path=reference_audio_path,
+                **params,
+            )
+        else:
+            wav = model.generate(
+                text,
+                audio_prompt_path=reference_audio_path,
+                **params,
+            )
+    elapsed = time.perf_counter() - started
+    stage_seconds.observe(elapsed, stage='tts_generate')
+    audio_seconds = wav.shape[-1] / model.sr
+    if audio_seconds:
+        tts_rtf.observe(elapsed / audio_seconds, language=language)
+    return wav
+
+class TTSWorkItem:
+    """One queued TTS generation and the future its caller is waiting on."""
+
+    def __init__(self, model, text, language, params, conditionals=None, reference_audio_path=None, seed=0):
+        self.model = model
+        self.text = text
+        self.language = language
+        self.params = params
+        self.conditionals = conditionals
+        self.reference_audio_path = reference_audio_path
+        self.seed = seed
+        self.future = Future()
+
+    @property
+    def dedupe_key(self):
+        """Identical seeded requests produce the same audio (see SamplingLock); unseeded ones never match."""
+        if self.seed == 0:
+            return None
+        voice_key = id(self.conditionals) if self.conditionals is not None else self.reference_audio_path
+        return (self.language, tuple(sorted(self.params.items())), voice_key, self.text, self.seed)
+
+class TTSScheduler:
+    """Serializing queue for one model's TTS requests, with deduplication.
+
+    There is one scheduler (and thread) per model, so engines do not wait on
+    each other. Chatterbox's generate() handles a single utterance, so
+    requests run one after another in arrival order; nothing is batched. What
+    the queue adds over the model lock alone is that identical seeded
+    requests waiting at the same time share one generation. A request that
+    arrives while the model is idle starts at once. The thread exits after
+    idle_seconds without work and restarts on demand.
+    """
+
+    def __init__(self, name, idle_seconds=60):
+        self.name = name
+        self.idle_seconds = idle_seconds
+        self.items = 0
+        self.deduplicated = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, item):
+        self._queue.put(item)
+        self._ensure_started()
+        return item.future
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue_depth(),
+            'items': self.items,
+            'deduplicated': self.deduplicated,
+        }
+
+    def _ensure_started(self):
+        # Started lazily so that it also exists in forked gunicorn workers
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'tts-scheduler-{self.name}', daemon=True)
+                self._thread.start()
+
+    def _take_waiting(self):
+        """The next request and every one already queued behind it; None after idle_seconds without work."""
+        try:
+            items = [self._queue.get(timeout=self.idle_seconds)]
+        except queue.Empty:
+            return None
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _run(self):
+        while True:
+            items = self._take_waiting()
+            if items is None:
+                with self._start_lock:
+                    # submit() enqueues before checking the thread, so nothing is stranded
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+            self._run_items(items)
+            # Do not keep an evicted model alive while waiting for the next request
+            del items
+
+    def _run_items(self, items):
+        running = [item for item in items if item.future.set_running_or_notify_cancel()]
+        self.items += len(running)
+        results = {}
+        for item in running:
+            key = item.dedupe_key
+            if key is not None and key in results:
+                self.deduplicated += 1
+                item.future.set_result(results[key])
+                continue
+            wav = run_tts_item(item)
+            if key is not None and wav is not None:
+                results[key] = wav
+
+tts_schedulers = weakref.WeakKeyDictionary()
+tts_schedulers_lock = threading.Lock()
+
+def tts_scheduler_for(model):
+    with tts_schedulers_lock:
+        scheduler = tts_schedulers.get(model)
+        if scheduler is None:
+            scheduler = tts_schedulers[model] = TTSScheduler(type(model).__name__)
+        return scheduler
+
+def tts_scheduler_stats():
+    with tts_schedulers_lock:
+        schedulers = list(tts_schedulers.values())
+    return {
+        'enabled': TTS_BATCHING_ENABLED,
+        'models': {scheduler.name: scheduler.stats() for scheduler in schedulers},
+    }
+
+def tts_queue_depth():
+    with tts_schedulers_lock:
+        return sum(scheduler.queue_depth() for scheduler in tts_schedulers.values())
+
+def run_tts_item(item):
+    """Generate one work item's audio and resolve its future; returns the waveform, or None on error."""
+    try:
+        wav = synthesize_tts(item.model, item.text, item.language, item.reference_audio_path, item.params, item.conditionals, item.seed)
+    except Exception as exc:
+        item.future.set_exception(exc)
+        return None
+    item.future.set_result(wav)
+    return wav
+
+def submit_tts(model, text, language, params, conditionals=None, reference_audio_path=None, seed=0):
+    """Queue a TTS generation and return a Future resolving to the waveform tensor."""
+    item = TTSWorkItem(model, text, language, params, conditionals, reference_audio_path, seed)
+    if TTS_BATCHING_ENABLED:
+        return tts_scheduler_for(model).submit(item)
+    item.future.set_running_or_notify_cancel()
+    run_tts_item(item)
+    return item.future
+
+class JobCancelled(Exception):
+    pass
+
+class JobQueueFull(Exception):
+    pass
+
+class Job:
+    """State of one asynchronous TTS/VC/STT job."""
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = 'Queued'
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result_path = None
+        self.result_mimetype = None
+        self.result_name = None
+        self.result_json = None
+        self.batch = None
+        self.future = None
+        self.on_discard = None
+        self.version = 0
+        self.cancel_event = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status in {'succeeded', 'failed', 'cancelled'}
+
+    def raise_if_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': round(self.progress, 4),
+            'message': self.message,
+            'error': self.error,
+            'createdAt': datetime.utcfromtimestamp(self.created_at).isoformat() + 'Z',
+            'startedAt': datetime.utcfromtimestamp(self.started_at).isoformat() + 'Z' if self.started_at else None,
+            'finishedAt': datetime.utcfromtimestamp(self.finished_at).isoformat() + 'Z' if self.finished_at else None,
+            'url': f"/api/jobs/{self.id}",
+        }
+        if self.status == 'succeeded':
+            data['result_url'] = f"/api/jobs/{self.id}/result"
+        if self.batch is not None:
+            data['items_url'] = f"/api/jobs/{self.id}/items"
+            data['items'] = self.batch.counts()
+        return data
+
+class JobManager:
+    """Bounded worker pool for long-running inference, with progress, cancellation and TTL cleanup.
+
+    Job functions receive the Job and return either a dict (served as JSON)
+    or a (bytes, mimetype, filename) tuple that is stored under
+    JOB_RESULTS_DIR until the job expires. Large results may be written
+    there directly and returned as a Path instead of bytes.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_queue=JOB_MAX_QUEUE, ttl_seconds=JOB_RESULT_TTL_SECONDS,
+                 results_dir=JOB_RESULTS_DIR):
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max_queue
+        self.ttl_seconds = ttl_seconds
+        self.results_dir = Path(results_dir)
+        self._jobs = {}
+        self._changed = threading.Condition()
+        self._executor = None
+        self._executor_pid = None
+        self._janitor = None
+
+    def _ensure_started(self):
+        # Created lazily so that every forked gunicorn worker gets its own pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='vaani-job')
+            self._executor_pid = os.getpid()
+            self._janitor = threading.Thread(target=self._cleanup_loop, name='vaani-job-janitor', daemon=True)
+            self._janitor.start()
+
+    def active_count(self):
+        with self._changed:
+            return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def submit(self, kind, fn, *args, on_discard=None):
+        """Queue fn(job, *args). on_discard runs if the job never starts or once it ends."""
+        with self._changed:
+            self._ensure_started()
+            if sum(1 for job in self._jobs.values() if not job.finished) >= self.max_queue:
+                raise JobQueueFull(f'Too many pending jobs (max {self.max_queue})')
+            job = Job(kind)
+            job.on_discard = on_discard
+            self._jobs[job.id] = job
+            job.future = self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id):
+        with self._changed:
+            return self._jobs.get(job_id)
+
+    def update(self, job, **fields):
+        with self._changed:
+            for key, value in fields.items():
+                setattr(job, key, value)
+            job.version += 1
+            self._changed.notify_all()
+
+    def set_progress(self, job, progress, message=None):
+        job.raise_if_cancelled()
+        self.update(job, progress=max(0.0, min(1.0, progress)), message=message or job.message)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return job
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            self.update(job, status='cancelled', message='Cancelled before start', finished_at=time.time())
+            if job.on_discard:
+                job.on_discard()
+        else:
+            self.update(job, message='Cancelling')
+        return job
+
+    def wait_for_change(self, job, version, timeout):
+        with self._changed:
+            self._changed.wait_for(lambda: job.version != version, timeout=timeout)
+            return job.version
+
+    def _run(self, job, fn, args):
+        try:
+            if job.cancel_event.is_set():
+                raise JobCancelled()
+            self.update(job, status='running', message='Running', started_at=time.time())
+            result = fn(job, *args)
+            job.raise_if_cancelled()
+            if isinstance(result, dict):
+                self.update(job, result_json=result)
+            else:
+                data, mimetype, filename = result
+                if isinstance(data, Path):
+                    result_path = data
+                else:
+                    self.results_dir.mkdir(parents=True, exist_ok=True)
+                    result_path = self.results_dir / f"{job.id}{Path(filename).suffix}"
+                    result_path.write_bytes(data)
+                self.update(job, result_path=result_path, result_mimetype=mimetype, result_name=filename)
+            self.update(job, status='succeeded', progress=1.0, message='Done', finished_at=time.time())
+        except JobCancelled:
+            self.update(job, status='cancelled', message='Cancelled', finished_at=time.time())
+        except Exception as exc:
+            print(f"❌ {job.kind.upper()} job {job.id} failed: {exc}")
+            self.update(job, status='failed', error=str(exc), message='Failed', finished_at=time.time())
+        finally:
+            if job.on_discard:
+                job.on_discard()
+
+    def _cleanup_loop(self):
+        while True:
+            time.sleep(min(60, max(1, self.ttl_seconds)))
+            self.cleanup_expired()
+
+    def cleanup_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._changed:
+            expired = [job for job in self._jobs.values() if job.finished and job.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+        for job in expired:
+            if job.result_path and job.result_path.exists():
+                job.result_path.unlink()
+            if job.batch is not None:
+                shutil.rmtree(job.batch.directory, ignore_errors=True)
+        # Drop result files left behind by previous processes
+        if self.results_dir.exists():
+            with self._changed:
+                known = {job.result_path for job in self._jobs.values() if job.result_path}
+                known.update(job.batch.directory for job in self._jobs.values() if job.batch is not None)
+            for entry in self.results_dir.iterdir():
+                try:
+                    if entry not in known and entry.stat().st_mtime < cutoff:
+                        if entry.is_dir():
+                            shutil.rmtree(entry, ignore_errors=True)
+                        else:
+                            entry.unlink()
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._changed:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {'workers': self.max_workers, 'max_queue': self.max_queue, 'jobs': counts}
+
+job_manager = JobManager()
+
+# Admission control for the synchronous inference routes. Each request's
+# cost (seconds of work) is estimated from its size (text characters or
+# upload seconds) times the learned cost per unit of its kind. At most
+# ADMISSION_CONCURRENCY run at once; the others wait in per-client queues.
+# The client that has been served the least cost goes next, and within a
+# client the shortest request (aged by its waiting time). A request that
+# would wait longer than ADMISSION_MAX_WAIT_SECONDS is answered 429 with
+# Retry-After instead of piling up until the worker timeout, and one still
+# queued after ADMISSION_QUEUE_TIMEOUT_SECONDS is answered 503. Clients are
+# told apart by their address. Background jobs take a slot of the client
+# that submitted them while they run, but wait for it instead of failing.
+
+# Starting costs per text character (TTS) or audio second (VC, STT, dubbing)
+ADMISSION_DEFAULT_UNIT_COSTS = {'tts': 0.05, 'vc': 0.5, 'stt': 0.3, 'dub': 1.0}
+
+class AdmissionRejected(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class AdmissionTimeout(AdmissionRejected):
+    """No slot freed up within the queue timeout."""
+
+class AdmissionTicket:
+    def __init__(self, client, kind, units, cost):
+        self.client = client
+        self.kind = kind
+        self.units = units
+        self.cost = cost
+        self.enqueued_at = time.monotonic()
+        self.started_at = None
+        self.admitted = threading.Event()
+
+class AdmissionController:
+    """Fair-share, shortest-job-first admission of inference requests with a bound on queueing delay."""
+
+    def __init__(self, concurrency=ADMISSION_CONCURRENCY, max_wait_seconds=ADMISSION_MAX_WAIT_SECONDS,
+                 queue_timeout_seconds=ADMISSION_QUEUE_TIMEOUT_SECONDS, default_unit_costs=ADMISSION_DEFAULT_UNIT_COSTS):
+        self.concurrency = max(1, concurrency)
+        self.max_wait = max_wait_seconds
+        self.queue_timeout = queue_timeout_seconds
+        self.default_unit_costs = default_unit_costs
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._unit_costs = {}
+        self._waiting = {}
+        self._running = set()
+        self._served = {}
+        self._virtual_time = 0.0
+        self._lock = threading.Lock()
+
+    def unit_cost(self, kind):
+        average = self._unit_costs.get(kind)
+        if average is not None and average.value is not None:
+            return average.value
+        return self.default_unit_costs.get(kind.split(':')[0], 1.0)
+
+    def estimate(self, kind, units):
+        return max(units, 0) * self.unit_cost(kind)
+
+    def admit(self, client, kind, units, reject=True):
+        """Block until the request may run.
+
+        Raises AdmissionRejected when the estimated wait is too long and
+        AdmissionTimeout when no slot frees up within the queue timeout.
+        With reject=False (background jobs) it waits as long as it takes.
+        """
+        ticket = AdmissionTicket(client, kind, units, self.estimate(kind, units))
+        with self._lock:
+            if len(self._running) < self.concurrency and not self._waiting:
+                self._start(ticket)
+                return ticket
+            wait = self._expected_wait(ticket.cost)
+            if reject and self.max_wait and wait > self.max_wait:
+                self.rejected += 1
+                raise AdmissionRejected(
+                    f'Server is busy: estimated wait {wait:.0f}s is over {self.max_wait:.0f}s',
+                    retry_after=max(1, math.ceil(wait - self.max_wait))
+                )
+            if client not in self._waiting:
+                # A client coming back from idle starts level with the busy ones, not ahead of them
+                self._served[client] = max(self._served.get(client, 0.0), self._virtual_time)
+            self._waiting.setdefault(client, []).append(ticket)
+        timeout = self.queue_timeout if reject and self.queue_timeout else None
+        if not ticket.admitted.wait(timeout):
+            with self._lock:
+                # Admitted between the timeout and taking the lock: run it after all
+                if not ticket.admitted.is_set():
+                    self._withdraw(ticket)
+                    self.timed_out += 1
+                    raise AdmissionTimeout(
+                        f'Server is busy: no inference slot freed up within {timeout:.0f}s',
+                        retry_after=max(1, math.ceil(self._expected_wait(ticket.cost)))
+                    )
+        stage_seconds.observe(ticket.started_at - ticket.enqueued_at, stage='admission_wait')
+        return ticket
+
+    @contextlib.contextmanager
+    def slot(self, client, kind, units, reject=True):
+        """Hold an admission slot for the body of a with block."""
+        ticket = self.admit(client, kind, units, reject)
+        try:
+            yield ticket
+        except BaseException:
+            self.release(ticket, measured=False)
+            raise
+        self.release(ticket)
+
+    def release(self, ticket, measured=True):
+        """Free the ticket's slot; measured runs update the cost per unit of their kind."""
+        elapsed = time.monotonic() - ticket.started_at
+        with self._lock:
+            if measured and ticket.units > 0:
+                self._unit_costs.setdefault(ticket.kind, RunningAverage()).update(elapsed / ticket.units)
+            self._running.discard(ticket)
+            self._dispatch()
+            # Clients at or below the virtual time would be lifted to it anyway
+            self._served = {
+                client: served for client, served in self._served.items()
+                if client in self._waiting or served > self._virtual_time
+            }
+
+    def _expected_wait(self, cost):
+        now = time.monotonic()
+        running = sum(max(ticket.cost - (now - ticket.started_at), 0.0) for ticket in self._running)
+        # Shortest-first: only waiting requests no longer than this one go before it
+        ahead = sum(ticket.cost for tickets in self._waiting.values() for ticket in tickets if ticket.cost <= cost)
+        return (running + ahead) / self.concurrency
+
+    def _withdraw(self, ticket):
+        tickets = self._waiting[ticket.client]
+        tickets.remove(ticket)
+        if not tickets:
+            del self._waiting[ticket.client]
+
+    def _start(self, ticket):
+        ticket.started_at = time.monotonic()
+        self._running.add(ticket)
+        self._served[ticket.client] = self._served.get(ticket.client, 0.0) + ticket.cost
+        self.admitted += 1
+        ticket.admitted.set()
+
+    def _dispatch(self):
+        while self._waiting and len(self._running) < self.concurrency:
+            now = time.monotonic()
+            # Shortest first, aged by waiting time so that long requests are not starved
+            heads = {
+                name: min(tickets, key=lambda queued: queued.cost - (now - queued.enqueued_at))
+                for name, tickets in self._waiting.items()
+            }
+            client = min(heads, key=lambda name: (self._served.get(name, 0.0), heads[name].cost))
+            ticket = heads[client]
+            self._withdraw(ticket)
+            self._virtual_time = self._served.get(client, 0.0)
+            self._start(ticket)
+
+    def queue_depth(self):
+        with self._lock:
+            return sum(len(tickets) for tickets in self._waiting.values())
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': ADMISSION_CONTROL_ENABLED,
+                'concurrency': self.concurrency,
+                'max_wait_seconds': self.max_wait,
+                'queue_timeout_seconds': self.queue_timeout,
+                'running': len(self._running),
+                'waiting': {client: len(tickets) for client, tickets in self._waiting.items()},
+                'expected_wait_seconds': round(self._expected_wait(float('inf')), 2),
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'unit_costs': {kind: round(average.value, 4) for kind, average in self._unit_costs.items()},
+            }
+
+admission_controller = AdmissionController()
+
+if TRUSTED_PROXY_COUNT:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
+
+def request_client_id():
+    """Fair-share key of the caller: its address (as seen through TRUSTED_PROXY_COUNT proxies).
+
+    Client-supplied identifiers are not trusted, or any caller could claim a
+    fresh fair share with every request.
+    """
+    return request.remote_addr or 'anonymous'
+
+def upload_duration_seconds(file_storage):
+    """Rough duration of an upload without decoding it: from a WAV header, else from its size."""
+    if not file_storage:
+        return 0.0
+    stream = file_storage.stream
+    try:
+        position = stream.tell()
+        size = stream.seek(0, os.SEEK_END)
+        stream.seek(0)
+        try:
+            with wave.open(stream, 'rb') as reader:
+                return reader.getnframes() / float(reader.getframerate())
+        except (wave.Error, EOFError):
+            return size / ADMISSION_UPLOAD_BYTES_PER_SECOND
+        finally:
+            stream.seek(position)
+    except (OSError, ValueError):
+        return 0.0
+
+def admission_controlled(kind, units):
+    """Run a route behind the admission controller.
+
+    kind is a cost category ('tts:original', 'vc', ...) or a callable
+    returning one for the current request; units() measures the request.
+    Streamed responses hold their slot until the last chunk is sent.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not ADMISSION_CONTROL_ENABLED:
+                return view(*args, **kwargs)
+            try:
+                ticket = admission_controller.admit(request_client_id(), kind() if callable(kind) else kind, units())
+            except AdmissionRejected as exc:
+                response = jsonify({'error': str(exc), 'retry_after': exc.retry_after})
+                response.headers['Retry-After'] = str(exc.retry_after)
+                return response, 503 if isinstance(exc, AdmissionTimeout) else 429
+            try:
+                response = app.make_response(view(*args, **kwargs))
+            except BaseException:
+                admission_controller.release(ticket, measured=False)
+                raise
+            # Errors and cache hits say nothing about what inference costs
+            measured = response.status_code == 200 and response.headers.get('X-Cache') != 'HIT'
+            return call_when_sent(response, lambda: admission_controller.release(ticket, measured))
+        return wrapper
+    return decorator
+
+def admitted_job(kind, units, fn):
+    """Wrap a job function so that it runs in an admission slot of the client submitting it.
+
+    Call it while handling the submitting request. The job waits in that
+    client's queue like its synchronous requests do, but is never rejected.
+    """
+    if not ADMISSION_CONTROL_ENABLED:
+        return fn
+    client = request_client_id()
+
+    @functools.wraps(fn)
+    def run(job, *args):
+        with admission_controller.slot(client, kind, units, reject=False):
+            return fn(job, *args)
+    return run
+
+def save_upload_to_temp(file_storage):
+    """Save an uploaded file under a unique name in the upload folder and return the path."""
+    suffix = Path(secure_filename(file_storage.filename or '')).suffix or '.wav'
+    with stage_timer('upload_save'):
+        fd, temp_path = tempfile.mkstemp(suffix=suffix, dir=app.config['UPLOAD_FOLDER'])
+        with os.fdopen(fd, 'wb') as f:
+            file_storage.save(f)
+    return temp_path
+
+def remove_files(*paths):
+    for path in paths:
+        if path and os.path.exists(path):
+            os.remove(path)
+
+def run_tts_job(job, text, language, params, voice, seed, output_format='wav'):
+    # Segments are synthesized concurrently; each finished one reports progress and is a cancellation point
+    def on_segment(done, total):
+        job_manager.set_progress(job, done / total, f'Synthesized {done}/{total} segments')
+
+    wav, sample_rate = synthesize_longform(
+        text, language, params, voice, seed, on_segment=on_segment, should_stop=job.cancel_event.is_set
+    )
+    audio_format = AUDIO_OUTPUT_FORMATS[output_format]
+    audio = encode_audio_bytes(wav, sample_rate, output_format)
+    return audio, audio_format['mimetype'], f"generated_speech{audio_format['extension']}"
+
+def run_vc_job(job, source_path, target, output_format='wav'):
+    if target is not None and target.get('voice_id'):
+        target = library_vc_target(target['voice_id'])
+    job_manager.set_progress(job, 0.05, 'Converting voice')
+    sample_rate = vc_engine_info()['sample_rate']
+    # Offline, several windows are queued at once so the model-server workers convert them in parallel
+    pieces = []
+    converted_seconds = 0.0
+    for chunk in iter_windowed_vc(source_path, target, suffix=Path(source_path).suffix, in_flight=VC_WINDOW_PARALLELISM):
+        pieces.append(audio_to_pcm16(chunk))
+        converted_seconds += len(chunk) / sample_rate
+        job_manager.set_progress(job, job.progress, f'Converted {converted_seconds:.1f}s')
+    audio_format = AUDIO_OUTPUT_FORMATS[output_format]
+    audio = encode_audio_bytes(np.concatenate(pieces), sample_rate, output_format)
+    return audio, audio_format['mimetype'], f"converted_voice{audio_format['extension']}"
+
+class TTSBatch:
+    """Items of a bulk TTS job and the audio rendered for them so far.
+
+    Every rendered item is written to its own file in ``directory`` as soon
+    as it finishes, so finished lines can be downloaded while the rest are
+    still being synthesized, and a retry only renders the items that failed.
+    """
+
+    def __init__(self, items, output_format, directory=None):
+        self.items = items
+        self.output_format = output_format
+        self.directory = Path(directory or JOB_RESULTS_DIR / f"batch-{uuid.uuid4().hex}")
+        self.lock = threading.Lock()
+
+    def filename(self, item):
+        stem = secure_filename(item.get('name') or '') or 'line'
+        return f"{item['index'] + 1:05d}-{stem}{AUDIO_OUTPUT_FORMATS[self.output_format]['extension']}"
+
+    def update(self, item, **fields):
+        with self.lock:
+            item.update(fields)
+
+    def counts(self):
+        with self.lock:
+            counts = {'total': len(self.items)}
+            for item in self.items:
+                counts[item['status']] = counts.get(item['status'], 0) + 1
+        return counts
+
+    def manifest(self, job_id=None):
+        with self.lock:
+            entries = []
+            for item in self.items:
+                entry = {key: item.get(key) for key in ('index', 'name', 'text', 'language', 'voice_id', 'status', 'error', 'duration')}
+                if item['status'] == 'succeeded':
+                    entry['file'] = item['filename']
+                    if job_id:
+                        entry['url'] = f"/api/jobs/{job_id}/items/{item['index']}"
+                entries.append(entry)
+        return entries
+
+    def for_retry(self):
+        """A new batch that keeps the rendered items (hard-linked, not re-rendered) and requeues the rest."""
+        retry = TTSBatch([], self.output_format)
+        retry.directory.mkdir(parents=True, exist_ok=True)
+        with self.lock:
+            for item in self.items:
+                item = dict(item)
+                if item['status'] == 'succeeded':
+                    source = self.directory / item['filename']
+                    try:
+                        os.link(source, retry.directory / item['filename'])
+                    except OSError:
+                        shutil.copyfile(source, retry.directory / item['filename'])
+                else:
+                    item.update(status='queued', error=None)
+                retry.items.append(item)
+        return retry
+
+def render_tts_batch_item(item, voices, should_stop=None):
+    """Synthesize one bulk item like a long-form request; returns (float32 samples, sample_rate)."""
+    voice = voices.get(item['voice_id'])
+    return synthesize_longform(item['text'], item['language'], item['params'], voice, item['seed'], should_stop=should_stop)
+
+def run_tts_batch_job(job, batch, voices):
+    """Render every unfinished item of a batch, keeping up to TTS_BULK_IN_FLIGHT items in progress at once.
+
+    Items are split and stitched by synthesize_longform, whose segments queue
+    on the model's scheduler with live requests or are spread over the
+    model-server pool, and items sharing a voice share its cached speaker
+    conditioning. A failed item is recorded in the manifest and does not
+    stop the others.
+    """
+    pending = [item for item in batch.items if item['status'] != 'succeeded']
+    batch.directory.mkdir(parents=True, exist_ok=True)
+    in_flight = []
+    done = len(batch.items) - len(pending)
+    stopped = threading.Event()
+    should_stop = lambda: stopped.is_set() or job.cancel_event.is_set()
+    executor = ThreadPoolExecutor(max_workers=max(1, TTS_BULK_IN_FLIGHT), thread_name_prefix='vaani-tts-bulk')
+
+    def finish(item, future, cache_key):
+        try:
+            wav, sample_rate = future.result()
+            pcm = audio_to_pcm16(wav)
+            if cache_key:
+                tts_result_cache.put(cache_key, encode_audio_bytes(pcm, sample_rate))
+            filename = batch.filename(item)
+            with open(batch.directory / filename, 'wb') as f:
+                for chunk in iter_encoded_audio(pcm, sample_rate, batch.output_format):
+                    f.write(chunk)
+            batch.update(item, status='succeeded', filename=filename, duration=round(len(pcm) / sample_rate, 3))
+        except JobCancelled:
+            raise
+        except Exception as exc:
+            print(f"❌ Bulk TTS item {item['index']} failed: {exc}")
+            batch.update(item, status='failed', error=str(exc))
+
+    try:
+        for item in pending:
+            job.raise_if_cancelled()
+            if len(in_flight) >= max(1, TTS_BULK_IN_FLIGHT):
+                finish(*in_flight.pop(0))
+                done += 1
+                job_manager.set_progress(job, done / len(batch.items), f'Rendered {done}/{len(batch.items)} items')
+
+            batch.update(item, status='running', error=None)
+            voice = voices.get(item['voice_id'])
+            cache_key = None
+            if item['seed'] != 0 and TTS_RESULT_CACHE_ENABLED:
+                engine = tts_engine_info(item['language'])
+                cache_key = TTSResultCache.make_key(engine['name'], engine['build'], item['text'], item['language'], voice['hash'] if voice else None, item['params'], item['seed'])
+                cached_wav = tts_result_cache.get(cache_key)
+                if cached_wav is not None:
+                    done_future = Future()
+                    done_future.set_result(read_wav_bytes(cached_wav))
+                    in_flight.append((item, done_future, None))
+                    continue
+            in_flight.append((item, executor.submit(render_tts_batch_item, item, voices, should_stop), cache_key))
+
+        while in_flight:
+            job.raise_if_cancelled()
+            finish(*in_flight.pop(0))
+            done += 1
+            job_manager.set_progress(job, done / len(batch.items), f'Rendered {done}/{len(batch.items)} items')
+    finally:
+        # Cancelled or crashed: stop the items in progress and leave them retryable
+        stopped.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        for item, _, _ in in_flight:
+            batch.update(item, status='queued')
+
+    manifest = batch.manifest()
+    counts = batch.counts()
+    if not counts.get('succeeded'):
+        raise RuntimeError(f"All {counts['total']} items failed")
+
+    archive_path = JOB_RESULTS_DIR / f"{job.id}.zip"
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        archive.writestr('manifest.json', json.dumps(manifest, indent=2, ensure_ascii=False))
+        for item in batch.items:
+            if item['status'] == 'succeeded':
+                archive.write(batch.directory / item['filename'], item['filename'])
+    return archive_path, 'application/zip', 'tts_batch.zip'
+
+def admitted_tts_batch_job(batch):
+    """run_tts_batch_job in one admission slot, costed by the characters still to render."""
+    units = sum(len(item['text']) for item in batch.items if item['status'] != 'succeeded')
+    return admitted_job('tts:bulk', units, run_tts_batch_job)
+
+def run_stt_job(job, audio_path, language, task, mode=None, compare=False):
+    def on_segment(segment, info):
+        if info['duration']:
+            job_manager.set_progress(job, segment['end'] / info['duration'], f"Transcribed {segment['end']:.1f}s of {info['duration']:.1f}s")
+        else:
+            job.raise_if_cancelled()
+
+    return transcribe_audio_file(audio_path, language=language, task=task, on_segment=on_segment, mode=mode, compare=compare)
+
+@app.route('/api/stt/transcribe', methods=['POST'])
+@requires_capability('stt')
+@admission_controlled(lambda: f"stt:{request.form.get('mode') or STT_MODE}",
+                      lambda: upload_duration_seconds(request.files.get('audio')))
+def stt_transcribe():
+    if not FASTER_WHISPER_AVAILABLE:
+        return jsonify({'error': 'faster-whisper is not installed on this server.'}), 500
+
+    if 'audio' not in request.files:
+        return jsonify({'error': 'Audio file is required (multipart form field "audio").'}), 400
+
+    audio_file = request.files['audio']
+    if not audio_file or not audio_file.filename:
+        return jsonify({'error': 'Invalid audio file.'}), 400
+
+    if not allowed_file(audio_file.filename):
+        return jsonify({'error': f'Unsupported file type: {audio_file.filename}'}), 400
+
+    language = request.form.get('language') or None
+    task = request.form.get('task', 'transcribe')
+    mode = request.form.get('mode') or None
+    if mode not in {None, 'single', 'tiered'}:
+        return jsonify({'error': f'Unsupported mode: {mode} (use single or tiered)'}), 400
+    compare = request.form.get('compare', 'false').lower() == 'true'
+
+    try:
+        audio = decode_audio_upload(audio_file, STT_SAMPLE_RATE)
+        result = transcribe_audio_file(audio, language=language, task=task, mode=mode, compare=compare)
+        if not result['text']:
+            return jsonify({**result, 'text': '', 'segments': []}), 200
+        return jsonify(result)
+    except Exception as exc:
+        print(f"STT error: {exc}")
+        return jsonify({'error': f'STT failed: {exc}'}), 500
+
+@app.route('/api/dub', methods=['POST'])
+@requires_capability('stt')
+@requires_capability('tts')
+@admission_controlled('dub', lambda: upload_duration_seconds(request.files.get('source_audio')))
+def dub_audio():
+    """Dub an uploaded recording: transcribe it and stream the re-voiced track as it is synthesized.
+
+    Form fields: ``source_audio``; ``language`` (source language, detected
+    when omitted); ``target_language`` (defaults to the source language;
+    ``en`` translates with Whisper, other languages must match the source);
+    ``voice_id`` or ``reference_audio`` for the voice (defaults to the source
+    speaker); the TTS sampling fields and ``seed``; ``format`` (``wav`` or
+    ``pcm``).
+    """
+    if not FASTER_WHISPER_AVAILABLE:
+        return jsonify({'error': 'faster-whisper is not installed on this server.'}), 500
+
+    source_file = request.files.get('source_audio')
+    if not source_file or not source_file.filename:
+        return jsonify({'error': 'Source audio is required'}), 400
+    if not allowed_file(source_file.filename):
+        return jsonify({'error': 'Invalid audio file format'}), 400
+
+    output_format = request.form.get('format', 'wav').lower()
+    if output_format not in {'wav', 'pcm'}:
+        return jsonify({'error': f'Unsupported stream format: {output_format}'}), 400
+
+    language = request.form.get('language') or None
+    target_language = request.form.get('target_language') or language
+    task = 'transcribe'
+    if target_language == 'en' and language != 'en':
+        task = 'translate'
+    elif target_language and language and target_language != language:
+        return jsonify({'error': 'Only dubbing into the source language or English is supported'}), 400
+    elif target_language and not language:
+        # Whisper should transcribe in the language the dub will be spoken in
+        language = target_language
+
+    try:
+        params = parse_tts_params(request.form)
+        seed = int(request.form.get('seed', 0))
+    except ValueError as exc:
+        return jsonify({'error': f'Invalid parameter: {exc}'}), 400
+
+    try:
+        voice = read_tts_voice_source()
+    except LookupError as exc:
+        return jsonify({'error': str(exc)}), 404
+
+    try:
+        audio = decode_audio_upload(source_file, STT_SAMPLE_RATE)
+        # A detected language is only known once Whisper has heard the audio
+        sample_rate = tts_engine_info(target_language)['sample_rate'] if target_language else None
+    except Exception as exc:
+        print(f"❌ Dubbing setup failed: {exc}")
+        return jsonify({'error': f'Dubbing failed: {exc}'}), 500
+    if voice is None:
+        voice = source_voice_reference(audio)
+
+    pipeline = DubbingPipeline(audio, sample_rate, params, voice, seed, language, target_language, task)
+    print(f"🎬 Dubbing {pipeline.duration:.1f}s of audio ({task}, target {target_language or 'detected'})")
+
+    started = time.time()
+    chunks = iter(pipeline)
+    try:
+        # The first chunk follows the first synthesized line, which fixes the
+        # output rate; failures up to here still get an error response
+        first = next(chunks, None)
+    except Exception as exc:
+        print(f"❌ Dubbing failed: {exc}")
+        return jsonify({'error': f'Dubbing failed: {exc}'}), 500
+    sample_rate = pipeline.sample_rate
+
+    def generate_chunks():
+        try:
+            if output_format == 'wav':
+                yield wav_stream_header(sample_rate)
+            if first is not None:
+                yield from iter_pcm16(first)
+            for chunk in chunks:
+                yield from iter_pcm16(chunk)
+            print(f"✅ Dubbed {pipeline.segment_count} segments in {time.time() - started:.2f}s")
+        except Exception as e:
+            # Headers are already sent, so the only signal left is ending the stream early
+            print(f"❌ Dubbing failed: {e}")
+
+    mimetype = 'audio/wav' if output_format == 'wav' else f'audio/L16; rate={sample_rate}; channels=1'
+    response = Response(
+        generate_chunks(),
+        mimetype=mimetype,
+        direct_passthrough=True,
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'X-Sample-Rate': str(sample_rate),
+            'X-Source-Duration': f'{pipeline.duration:.3f}',
+        }
+    )
+    # Stops STT and drops queued lines when the client goes away early
+    return call_when_sent(response, chunks.close)
+
+@app.route('/api/stt/transcribe/stream', methods=['POST'])
+@requires_capability('stt')
+@admission_controlled('stt:single', lambda: upload_duration_seconds(request.files.get('audio')))
+def stt_transcribe_stream():
+    """Long-audio transcription streamed as NDJSON events while chunks finish.
+
+    Same form fields as /api/stt/transcribe; optional ``workers`` overrides
+    the number of chunks decoded in parallel (capped at STT_NUM_WORKERS).
+    """
+    if not FASTER_WHISPER_AVAILABLE:
+        return jsonify({'error': 'faster-whisper is not installed on this server.'}), 500
+
+    audio_file = request.files.get('audio')
+    if not audio_file or not audio_file.filename:
+        return jsonify({'error': 'Audio file is required (multipart form field "audio").'}), 400
+    if not allowed_file(audio_file.filename):
+        return jsonify({'error': f'Unsupported file type: {audio_file.filename}'}), 400
+
+    language = request.form.get('language') or None
+    task = request.form.get('task', 'transcribe')
+    try:
+        workers = min(int(request.form.get('workers', STT_NUM_WORKERS)), STT_NUM_WORKERS)
+    except ValueError:
+        return jsonify({'error': 'workers must be an integer'}), 400
+
+    try:
+        audio = decode_audio_upload(audio_file, STT_SAMPLE_RATE)
+    except Exception as exc:
+        print(f"STT decode error: {exc}")
+        return jsonify({'error': f'Could not decode audio: {exc}'}), 400
+
+    def generate_events():
+        try:
+            for event in transcribe_long_audio(audio, language=language, task=task, max_workers=workers):
+                yield json.dumps(event, ensure_ascii=False) + '\n'
+        except Exception as exc:
+            print(f"STT stream error: {exc}")
+            yield json.dumps({'type': 'error', 'error': f'STT failed: {exc}'}) + '\n'
+
+    return Response(generate_events(), mimetype='application/x-ndjson', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+if sock and capability_enabled('stt'):
+    @sock.route('/api/stt/live')
+    def stt_live_socket(ws):
+        """Live STT over WebSocket: binary frames carry 16-bit PCM, replies are JSON events.
+
+        Query parameters: language, task, sample_rate. Send the text message
+        {"type": "end"} to flush the last utterance before closing.
+        """
+        if not FASTER_WHISPER_AVAILABLE:
+            ws.send(json.dumps({'type': 'error', 'error': 'faster-whisper is not installed on this server.'}))
+            return
+        try:
+            input_rate = int(request.args.get('sample_rate', STT_STREAM_INPUT_RATE))
+        except ValueError:
+            input_rate = STT_STREAM_INPUT_RATE
+        transcriber = StreamingTranscriber(
+            language=request.args.get('language') or None,
+            task=request.args.get('task', 'transcribe'),
+            input_rate=input_rate
+        )
+        while True:
+            message = ws.receive()
+            if message is None:
+                break
+            if isinstance(message, str):
+                try:
+                    control = json.loads(message)
+                except ValueError:
+                    control = {}
+                if control.get('type') in {'end', 'stop'}:
+                    for event in transcriber.finish():
+                        ws.send(json.dumps(event, ensure_ascii=False))
+                    ws.send(json.dumps({'type': 'closed'}))
+                    break
+                continue
+            for event in transcriber.feed(message):
+                ws.send(json.dumps(event, ensure_ascii=False))
+
+@app.route('/api/stt/live/sessions', methods=['POST'])
+@requires_capability('stt')
+def create_live_stt_session():
+    """Chunked-POST alternative to the WebSocket: create a live transcription session."""
+    if not FASTER_WHISPER_AVAILABLE:
+        return jsonify({'error': 'faster-whisper is not installed on this server.'}), 500
+    options = request.get_json(silent=True) or request.form
+    try:
+        input_rate = int(options.get('sample_rate', STT_STREAM_INPUT_RATE))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'sample_rate must be an integer'}), 400
+
+    expire_live_stt_sessions()
+    transcriber = StreamingTranscriber(
+        language=options.get('language') or None,
+        task=options.get('task', 'transcribe'),
+        input_rate=input_rate
+    )
+    session_id = uuid.uuid4().hex
+    with live_stt_sessions_lock:
+        live_stt_sessions[session_id] = transcriber
+    return jsonify({
+        'id': session_id,
+        'sample_rate': input_rate,
+        'audio_url': f"/api/stt/live/sessions/{session_id}/audio",
+        'expires_after_idle_seconds': STT_STREAM_SESSION_TTL_SECONDS,
+    }), 201
+
+@app.route('/api/stt/live/sessions/<session_id>/audio', methods=['POST'])
+@requires_capability('stt')
+def feed_live_stt_session(session_id):
+    """Append raw 16-bit little-endian PCM (request body) and return new partial/final events."""
+    expire_live_stt_sessions()
+    with live_stt_sessions_lock:
+        transcriber = live_stt_sessions.get(session_id)
+    if transcriber is None:
+        return jsonify({'error': 'Session not found or expired'}), 404
+    try:
+        events = transcriber.feed(request.get_data())
+    except Exception as exc:
+        print(f"Live STT error: {exc}")
+        return jsonify({'error': f'STT failed: {exc}'}), 500
+    return jsonify({'events': events})
+
+@app.route('/api/stt/live/sessions/<session_id>', methods=['DELETE'])
+@requires_capability('stt')
+def close_live_stt_session(session_id):
+    """Flush the last utterance and end the session."""
+    expire_live_stt_sessions()
+    with live_stt_sessions_lock:
+        transcriber = live_stt_sessions.pop(session_id, None)
+    if transcriber is None:
+        return jsonify({'error': 'Session not found or expired'}), 404
+    return jsonify({'events': transcriber.finish(), 'text': ' '.join(transcriber.finals)})
+
+def collect_queue_depths():
+    job_counts = job_manager.stats()['jobs']
+    depths = [
+        ({'queue': 'tts_batch'}, tts_queue_depth()),
+        ({'queue': 'admission'}, admission_controller.queue_depth()),
+        ({'queue': 'jobs_queued'}, job_counts.get('queued', 0)),
+        ({'queue': 'jobs_running'}, job_counts.get('running', 0)),
+        ({'queue': 'live_stt_sessions'}, len(live_stt_sessions)),
+    ]
+    if model_server_enabled():
+        depths.append(({'queue': 'model_server_pending'}, model_server_client().stats()['pending']))
+    return depths
+
+def metered_caches():
+    return {
+        'conditioning': speaker_conditioning_cache,
+        'tts_result_memory': tts_result_cache.memory,
+        'tts_result_disk': tts_result_cache.disk,
+    }
+
+def collect_memory():
+    samples = []
+    try:
+        with open('/proc/self/statm') as f:
+            samples.append(({'kind': 'rss'}, int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')))
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource:
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        samples.append(({'kind': 'peak_rss'}, peak if sys.platform == 'darwin' else peak * 1024))
+    torch = sys.modules.get('torch')
+    if torch is None:
+        pass  # no torch models in this process, so no accelerator memory of ours to report
+    elif torch.cuda.is_available():
+        for index in range(torch.cuda.device_count()):
+            device = f'cuda:{index}'
+            samples.append(({'kind': 'gpu_allocated', 'device': device}, torch.cuda.memory_allocated(index)))
+            samples.append(({'kind': 'gpu_reserved', 'device': device}, torch.cuda.memory_reserved(index)))
+            samples.append(({'kind': 'gpu_peak_allocated', 'device': device}, torch.cuda.max_memory_allocated(index)))
+    elif DEVICE == 'mps' and hasattr(torch, 'mps'):
+        samples.append(({'kind': 'gpu_allocated', 'device': 'mps'}, torch.mps.current_allocated_memory()))
+    return samples
+
+Gauge('vaani_queue_depth', 'Work waiting or in progress per queue', collect=collect_queue_depths)
+Gauge('vaani_admission_rejected_total', 'Inference requests answered 429 by admission control', metric_type='counter',
+      collect=lambda: [({}, admission_controller.rejected)])
+Gauge('vaani_cache_hits_total', 'Cache hits per cache', metric_type='counter',
+      collect=lambda: [({'cache': name}, cache.hits) for name, cache in metered_caches().items()])
+Gauge('vaani_cache_misses_total', 'Cache misses per cache', metric_type='counter',
+      collect=lambda: [({'cache': name}, cache.misses) for name, cache in metered_caches().items()])
+Gauge('vaani_memory_bytes', 'Process and accelerator memory', collect=collect_memory)
+Gauge('vaani_ready', 'Whether this process has finished warming up its models',
+      collect=lambda: [({}, int(model_warmup.ready))])
+Gauge('vaani_model_loaded', 'Whether each model is loaded in this process', collect=lambda: [
+    ({'model': name}, int(stats['loaded'])) for name, stats in model_registry.stats()['models'].items()
+])
+Gauge('vaani_model_loads_total', 'Model loads, including reloads after eviction', metric_type='counter', collect=lambda: [
+    ({'model': name}, stats['loads']) for name, stats in model_registry.stats()['models'].items()
+])
+Gauge('vaani_model_evictions_total', 'Models evicted to stay within the memory budget or when idle', metric_type='counter', collect=lambda: [
+    ({'model': name}, stats['evictions']) for name, stats in model_registry.stats()['models'].items()
+])
+Gauge('vaani_model_memory_bytes', 'Memory held by loaded models, and the budget, per pool', collect=lambda: [
+    ({'pool': pool, 'kind': kind}, value)
+    for pool, usage in model_registry.stats()['pools'].items()
+    for kind, value in (('used', usage['used_bytes']), ('budget', usage['budget_bytes']))
+])
+
+def call_when_sent(response, callback):
+    """Run callback once the response body has been written (or the client went away).
+
+    Werkzeug never calls Response.close() for direct_passthrough responses
+    (send_file and the streamed audio routes), so their body is wrapped instead.
+    """
+    if response.direct_passthrough:
+        response.response = ClosingIterator(response.response, callback)
+    else:
+        response.call_on_close(callback)
+    return response
+
+@app.before_request
+def start_request_timer():
+    request.environ['vaani.started'] = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = request.environ.get('vaani.started')
+    if started is None:
+        return response
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    method = request.method
+    handled = time.perf_counter()
+
+    def on_close():
+        # Runs once the body is written, so streamed responses count in full
+        closed = time.perf_counter()
+        stage_seconds.observe(closed - handled, stage='response_write')
+        http_request_seconds.observe(closed - started, endpoint=endpoint, method=method, status=response.status_code)
+
+    call_when_sent(response, on_close)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 200 once this worker's models are loaded and warmed up, 503 until then."""
+    state = model_warmup.to_dict()
+    return jsonify(state), 200 if state['ready'] else 503
+
+@app.route('/api/health', methods=['GET'])
+def health_check():
+    get_mongo_db()
+    tts_model = model_registry.peek(f"tts_{tts_engine_for_language('en')}")
+    vc_model = model_registry.peek('vc')
+    return jsonify({
+        'status': 'healthy',
+        'device': DEVICE,
+        'capabilities': sorted(CAPABILITIES),
+        'cpu_inference_mode': CPU_INFERENCE_MODE,
+        'multilingual_tts_available': MULTILINGUAL_TTS_AVAILABLE,
+        'tts_loaded': any(f'tts_{engine}' in model_registry for engine in TTS_ENGINE_CLASSES),
+        'vc_loaded': 'vc' in model_registry,
+        'tts_model_type': type(tts_model).__name__ if tts_model else None,
+        'vc_model_type': type(vc_model).__name__ if vc_model else None,
+        'tts_engine_routing': TTS_ENGINE_ROUTING,
+        'models': model_registry.stats(),
+        'conditioning_cache': speaker_conditioning_cache.stats(),
+        'vc_target_cache': vc_target_cache.stats(),
+        'tts_scheduler': tts_scheduler_stats(),
+        'admission': admission_controller.stats(),
+        'tts_result_cache': tts_result_cache.stats(),
+        'jobs': job_manager.stats(),
+        'voice_library': get_voice_library().stats(),
+        'model_server': model_server_client().stats() if model_server_enabled() else None,
+        'mongo': mongo_status
+    })
+
+@app.route('/api/models', methods=['GET'])
+def list_models():
+    """Models loaded in this process, with their memory, load and eviction counts."""
+    return jsonify({'routing': TTS_ENGINE_ROUTING, **model_registry.stats()})
+
+@app.route('/api/models/<name>', methods=['DELETE'])
+def evict_model(name):
+    """Unload a model now; it is loaded again on next use. Needs ``Authorization: Bearer <MODEL_ADMIN_TOKEN>``."""
+    if not MODEL_ADMIN_TOKEN:
+        return jsonify({'error': 'Model administration is disabled (set MODEL_ADMIN_TOKEN to enable it)'}), 403
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), MODEL_ADMIN_TOKEN.encode()):
+        response = jsonify({'error': 'A valid admin token is required'})
+        response.headers['WWW-Authenticate'] = 'Bearer'
+        return response, 401
+    if name not in model_registry.stats()['models']:
+        return jsonify({'error': f'Unknown model: {name}'}), 404
+    if not model_registry.evict(name):
+        return jsonify({'error': f'Model {name} is not loaded'}), 409
+    return jsonify({'evicted': name, **model_registry.stats()})
+
+def wav_file_response(audio_buffer, download_name, etag=None, cache_status=None):
+    """send_file() for generated WAV audio, tagged for conditional requests when cacheable."""
+    response = send_file(
+        audio_buffer,
+        mimetype='audio/wav',
+        as_attachment=True,
+        download_name=download_name
+    )
+    if etag:
+        response.set_etag(etag)
+    if cache_status:
+        response.headers['X-Cache'] = cache_status
+    return response
+
+def audio_response(audio_data, sample_rate, output_format, download_stem, etag=None, cache_status=None):
+    """Stream generated audio to the client in the requested output format.
+
+    WAV is written chunk by chunk behind a header with the final length, so
+    the response has a Content-Length; compressed formats are streamed out of
+    ffmpeg as they are encoded.
+    """
+    audio_format = AUDIO_OUTPUT_FORMATS[output_format]
+    if not (isinstance(audio_data, np.ndarray) and audio_data.dtype == np.int16):
+        audio_data = waveform_to_numpy(audio_data)
+    headers = {'Content-Disposition': f"attachment; filename={download_stem}{audio_format['extension']}"}
+    if output_format == 'wav':
+        headers['Content-Length'] = str(44 + len(audio_data) * 2)
+    if cache_status:
+        headers['X-Cache'] = cache_status
+    response = Response(
+        iter_encoded_audio(audio_data, sample_rate, output_format),
+        mimetype=audio_format['mimetype'],
+        direct_passthrough=True,
+        headers=headers
+    )
+    if etag:
+        response.set_etag(etag)
+    return response
+
+def library_voice_source(voice_id):
+    """Voice source for a saved voice sample; raises LookupError for an unknown voice_id."""
+    sample = find_voice_sample(voice_id)
+    voice_path = VOICE_LIB_DIR / sample.get('filename', '') if sample else None
+    if voice_path is None or not voice_path.is_file():
+        raise LookupError(f'Voice sample not found: {voice_id}')
+    content_hash = voice_content_hashes.get(voice_id)
+    if content_hash is None:
+        content_hash = voice_content_hashes[voice_id] = hash_file(voice_path)
+    return {'hash': content_hash, 'path': str(voice_path)}
+
+# Library voices as VC targets. The speaker reference of a saved voice is
+# computed when it is uploaded and stored next to the audio as
+# <voice_id>.vc.npz, so conversions to it never run the target encoder.
+
+def vc_embedding_path(voice_id):
+    return VOICE_LIB_DIR / f"{voice_id}.vc.npz"
+
+def save_vc_embedding(path, model_name, ref):
+    arrays = {key: value for key, value in ref.items() if value is not None}
+    none_keys = [key for key, value in ref.items() if value is None]
+    tmp_path = path.with_suffix('.tmp.npz')
+    np.savez(tmp_path, _model=np.array(model_name), _none_keys=np.array(none_keys, dtype=str), **arrays)
+    os.replace(tmp_path, path)
+
+def load_vc_embedding(path, model_name):
+    """Stored speaker reference, or None when it is missing or was made by another VC model."""
+    try:
+        with np.load(path) as data:
+            if str(data['_model']) != model_name:
+                return None
+            ref = {key: data[key] for key in data.files if not key.startswith('_')}
+            ref.update((key, None) for key in data['_none_keys'].tolist())
+        return ref
+    except (OSError, KeyError, ValueError):
+        return None
+
+def library_vc_target(voice_id):
+    """VC target for a saved voice; raises LookupError for an unknown voice_id.
+
+    The speaker reference comes from memory, then from the stored embedding,
+    and is only computed (and stored) when neither has it. VC models that
+    cannot take a precomputed reference get the voice's path instead.
+    """
+    voice = library_voice_source(voice_id)
+    model_name = vc_engine_info()['name']
+    cache_key = f"{model_name}:{voice['hash']}"
+    ref = vc_target_cache.get(cache_key)
+    if ref is None:
+        ref = load_vc_embedding(vc_embedding_path(voice_id), model_name)
+    if ref is None:
+        target = vc_embed_target({'path': voice['path']})
+        if target.get('ref') is None:
+            return target
+        ref = target['ref']
+        try:
+            save_vc_embedding(vc_embedding_path(voice_id), model_name, ref)
+        except OSError as exc:
+            print(f"⚠️ Could not store VC embedding for {voice_id}: {exc}")
+    vc_target_cache.put(cache_key, ref)
+    return {'ref': ref}
+
+def precompute_vc_embedding(voice_id):
+    """Embed a newly saved voice in the background so its first conversion is already fast."""
+    def run():
+        try:
+            library_vc_target(voice_id)
+            print(f"🎭 Precomputed VC embedding for voice {voice_id}")
+        except Exception as exc:
+            print(f"⚠️ Could not precompute VC embedding for {voice_id}: {exc}")
+
+    if capability_enabled('vc'):
+        threading.Thread(target=run, name='vaani-vc-embed', daemon=True).start()
+
+def read_vc_target():
+    """Target voice of the current VC request: ``target_voice_id`` from the library or an uploaded ``target_voice``.
+
+    Returns None for the model's default voice; raises LookupError for an unknown voice id.
+    """
+    voice_id = request.form.get('target_voice_id')
+    if voice_id:
+        return library_vc_target(voice_id)
+    target_file = request.files.get('target_voice')
+    if target_file and target_file.filename and allowed_file(target_file.filename):
+        return {'bytes': target_file.read(), 'suffix': Path(target_file.filename).suffix}
+    return None
+
+def read_tts_voice_source():
+    """Identify the speaker requested by the current TTS request.
+
+    Returns None for the built-in voice, otherwise a dict with the content
+    'hash' of the reference audio and either its library 'path' (form field
+    voice_id) or the uploaded 'bytes' and 'suffix' (form field reference_audio).
+    Raises LookupError for an unknown voice_id.
+    """
+    voice_id = request.form.get('voice_id')
+    if voice_id:
+        return library_voice_source(voice_id)
+
+    file = request.files.get('reference_audio')
+    if not file or not file.filename or not allowed_file(file.filename):
+        return None
+    audio_bytes = file.read()
+    return {'hash': hash_bytes(audio_bytes), 'bytes': audio_bytes, 'suffix': Path(file.filename).suffix}
+
+def tts_admission_kind():
+    return f"tts:{tts_engine_for_language(request.form.get('language'))}"
+
+def tts_admission_units():
+    return len(request.form.get('text', '').strip())
+
+def resolve_tts_voice(model, voice, exaggeration):
+    """Turn a voice source into what synthesize_tts needs.
+
+    Returns (conditionals, reference_audio_path, temp_path). Conditionals come
+    from the conditioning cache when the model supports them; otherwise the
+    audio is handed to the model as a path. temp_path must be removed by the
+    caller.
+    """
+    if voice is None:
+        return None, None, None
+    if supports_cached_conditionals(model):
+        conditionals = get_tts_conditionals(
+            model, voice['hash'], exaggeration,
+            audio_path=voice.get('path'), audio_bytes=voice.get('bytes'), suffix=voice.get('suffix')
+        )
+        return conditionals, None, None
+    if voice.get('path'):
+        return None, voice['path'], None
+    temp_path = write_temp_audio(voice['bytes'], voice.get('suffix'))
+    return None, temp_path, temp_path
+
+@app.route('/api/tts/generate', methods=['POST'])
+@requires_capability('tts')
+@admission_controlled(tts_admission_kind, tts_admission_units)
+def generate_tts():
+    try:
+        # Get text input
+        text = request.form.get('text', '').strip()
         if not text:
             return jsonify({'error': 'Text is required'}), 400
         
-        if len(text) > 10000:
-            return jsonify({'error': 'Text too long (max 10000 characters)'}), 400
+        if len(text) > TTS_MAX_TEXT_CHARS:
+            return jsonify({'error': f'Text too long (max {TTS_MAX_TEXT_CHARS} characters)'}), 400
         
         # Get parameters
-        exaggeration = float(request.form.get('exaggeration', 0.5))
-        temperature = float(request.form.get('temperature', 0.8))
-        cfg_weight = float(request.form.get('cfg_weight', 0.5))
-        min_p = float(request.form.get('min_p', 0.05))
-        top_p = float(request.form.get('top_p', 1.0))
-        repetition_penalty = float(request.form.get('repetition_penalty', 1.1))  # Reduced from 1.2 to 1.1 for longer audio
+        params = parse_tts_params(request.form)
         seed = int(request.form.get('seed', 0))
         language = request.form.get('language', 'en')
+        try:
+            output_format = parse_output_format(request.form)
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
         
-        # Handle reference audio
-        reference_audio_path = None
-        if 'reference_audio' in request.files:
-            file = request.files['reference_audio']
-            if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                reference_audio_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(reference_audio_path)
+        try:
+            voice = read_tts_voice_source()
+        except LookupError as exc:
+            return jsonify({'error': str(exc)}), 404
         
-        # Set seed if specified
-        if seed != 0:
-            set_seed(seed)
+        engine = tts_engine_info(language)
         
-        # Load model and generate
-        model = load_tts_model()
+        # Seeded requests are deterministic, so identical ones are served from the result cache
+        cache_key = None
+        if seed != 0 and TTS_RESULT_CACHE_ENABLED:
+            cache_key = TTSResultCache.make_key(engine['name'], engine['build'], text, language, voice['hash'] if voice else None, params, seed)
+            # The cache holds WAV; other formats are encoded from it and tagged separately
+            etag = cache_key if output_format == 'wav' else f'{cache_key}-{output_format}'
+            if request.if_none_match.contains(etag):
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+            cached_wav = tts_result_cache.get(cache_key)
+            if cached_wav is not None:
+                print(f"♻️ TTS result cache hit ({cache_key[:12]})")
+                if output_format == 'wav':
+                    return wav_file_response(io.BytesIO(cached_wav), 'generated_speech.wav', etag=etag, cache_status='HIT')
+                pcm, sample_rate = read_wav_bytes(cached_wav)
+                return audio_response(pcm, sample_rate, output_format, 'generated_speech', etag=etag, cache_status='HIT')
         
         print(f"🎯 ChatterBox TTS Request:")
         print(f"📝 Text: {text[:50]}...")
         print(f"🌍 Language: {language}")
-        print(f"🎭 Reference Audio: {'Yes' if reference_audio_path else 'No'}")
-        print(f"🤖 Model: {type(model).__name__}")
+        print(f"🎭 Reference Audio: {'Yes' if voice else 'No'}")
+        print(f"🤖 Model: {engine['name']}")
         
-        # Generate with ChatterBox TTS
+        # Generate with ChatterBox TTS (speaker conditioning for the voice is cached)
         try:
-            # Check if this is the multilingual version (needs language_id)
-            is_multilingual = 'Multilingual' in str(type(model).__name__)
-            
-            if is_multilingual:
-                print(f"🌍 Using Multilingual TTS with language_id: {language}")
-                # Use language_id for multilingual version
-                with torch.no_grad():
-                    wav = model.generate(
-                        text,
-                        language_id=language,
-                        audio_prompt_path=reference_audio_path,
-                        exaggeration=exaggeration,
-                        temperature=temperature,
-                        cfg_weight=cfg_weight,
-                        min_p=min_p,
-                        top_p=top_p,
-                        repetition_penalty=repetition_penalty,
-                    )
-                print(f"✅ Generated audio for language: {language}")
+            if len(text) > TTS_LONGFORM_MIN_CHARS:
+                wav, sample_rate = synthesize_longform(text, language, params, voice, seed)
             else:
-                print("🎤 Using Original TTS (English only - no language_id)")
-                # Use original TTS without language_id
-                with torch.no_grad():
-                    wav = model.generate(
-                        text,
-                        audio_prompt_path=reference_audio_path,
-                        exaggeration=exaggeration,
-                        temperature=temperature,
-                        cfg_weight=cfg_weight,
-                        min_p=min_p,
-                        top_p=top_p,
-                        repetition_penalty=repetition_penalty,
-                    )
-                print("✅ Generated audio (English only)")
+                wav, sample_rate = tts_generate(text, language, params, voice, seed)
             
-            if reference_audio_path:
+            if voice:
                 print(f"✅ Multilingual TTS with voice cloning successful!")
             else:
                 print(f"✅ Multilingual TTS generation successful!")
@@ -529,25 +4675,94 @@ def generate_tts():
             print(f"❌ ResembleAI TTS generation failed: {e}")
             return jsonify({'error': f'TTS generation failed: {str(e)}'}), 500
         
-        # Clean up temporary file
-        if reference_audio_path and os.path.exists(reference_audio_path):
-            os.remove(reference_audio_path)
-        
-        # Convert to WAV format
-        audio_buffer = save_audio_to_wav(wav.squeeze(0), model.sr)
-        
-        return send_file(
-            audio_buffer,
-            mimetype='audio/wav',
-            as_attachment=True,
-            download_name='generated_speech.wav'
-        )
+        if cache_key:
+            pcm = audio_to_pcm16(wav)
+            tts_result_cache.put(cache_key, encode_audio_bytes(pcm, sample_rate))
+            return audio_response(pcm, sample_rate, output_format, 'generated_speech', etag=etag, cache_status='MISS')
+        return audio_response(wav, sample_rate, output_format, 'generated_speech')
         
     except Exception as e:
         print(f"TTS Generation error: {str(e)}")
         return jsonify({'error': f'Generation failed: {str(e)}'}), 500
 
+@app.route('/api/tts/stream', methods=['POST'])
+@requires_capability('tts')
+@admission_controlled(tts_admission_kind, tts_admission_units)
+def stream_tts():
+    """Sentence-chunked TTS: audio for each chunk is sent as soon as it is generated.
+
+    Accepts the same form fields as /api/tts/generate plus ``format`` (``wav``,
+    the default, or ``pcm`` for raw 16-bit little-endian mono samples).
+    """
+    text = request.form.get('text', '').strip()
+    if not text:
+        return jsonify({'error': 'Text is required'}), 400
+
+    if len(text) > TTS_MAX_TEXT_CHARS:
+        return jsonify({'error': f'Text too long (max {TTS_MAX_TEXT_CHARS} characters)'}), 400
+
+    output_format = request.form.get('format', 'wav').lower()
+    if output_format not in {'wav', 'pcm'}:
+        return jsonify({'error': f'Unsupported stream format: {output_format}'}), 400
+
+    try:
+        params = parse_tts_params(request.form)
+        seed = int(request.form.get('seed', 0))
+    except ValueError as exc:
+        return jsonify({'error': f'Invalid parameter: {exc}'}), 400
+    language = request.form.get('language', 'en')
+    chunks = split_text_for_tts(text, language)
+
+    try:
+        voice = read_tts_voice_source()
+    except LookupError as exc:
+        return jsonify({'error': str(exc)}), 404
+
+    sample_rate = tts_engine_info(language)['sample_rate']
+
+    print(f"🎯 ChatterBox TTS Stream Request: {len(chunks)} chunks, language {language}")
+
+    def generate_chunks():
+        def submit(chunk):
+            return tts_generate_async(chunk, language, params, voice, seed)
+
+        pending = None
+        try:
+            if output_format == 'wav':
+                yield wav_stream_header(sample_rate)
+            # Keep one chunk queued ahead so generation continues while the client reads
+            started = time.time()
+            pending = submit(chunks[0])
+            for index in range(len(chunks)):
+                wav, _ = pending.result()
+                if index + 1 < len(chunks):
+                    pending = submit(chunks[index + 1])
+                print(f"🔊 Streamed chunk {index + 1}/{len(chunks)} after {time.time() - started:.2f}s")
+                yield from iter_pcm16(wav)
+        except Exception as e:
+            # Headers are already sent, so the only signal left is ending the stream early
+            print(f"❌ TTS stream failed: {e}")
+        finally:
+            # A client that disconnects early leaves at most one chunk in flight
+            if pending is not None and not pending.cancel():
+                pending.exception()
+
+    mimetype = 'audio/wav' if output_format == 'wav' else f'audio/L16; rate={sample_rate}; channels=1'
+    return Response(
+        generate_chunks(),
+        mimetype=mimetype,
+        direct_passthrough=True,
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'X-Sample-Rate': str(sample_rate),
+            'X-Chunk-Count': str(len(chunks)),
+        }
+    )
+
 @app.route('/api/vc/generate', methods=['POST'])
+@requires_capability('vc')
+@admission_controlled('vc', lambda: upload_duration_seconds(request.files.get('source_audio')))
 def generate_vc():
     try:
         # Check for source audio
@@ -561,52 +4776,103 @@ def generate_vc():
         if not allowed_file(source_file.filename):
             return jsonify({'error': 'Invalid audio file format'}), 400
         
-        # Save source audio
-        source_filename = secure_filename(source_file.filename)
-        source_path = os.path.join(app.config['UPLOAD_FOLDER'], source_filename)
-        source_file.save(source_path)
+        try:
+            output_format = parse_output_format(request.form)
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
         
         # Handle target voice (optional)
-        target_voice_path = None
-        if 'target_voice' in request.files:
-            target_file = request.files['target_voice']
-            if target_file and target_file.filename and allowed_file(target_file.filename):
-                target_filename = secure_filename(target_file.filename)
-                target_voice_path = os.path.join(app.config['UPLOAD_FOLDER'], target_filename)
-                target_file.save(target_voice_path)
-        
-        # Load model and generate
-        model = load_vc_model()
-        
-        wav = model.generate(
-            source_path,
-            target_voice_path=target_voice_path,
-        )
-        
-        # Clean up temporary files
-        if os.path.exists(source_path):
-            os.remove(source_path)
-        if target_voice_path and os.path.exists(target_voice_path):
-            os.remove(target_voice_path)
-        
-        # Convert to WAV format
-        audio_buffer = save_audio_to_wav(wav.squeeze(0), model.sr)
+        try:
+            target = read_vc_target()
+        except LookupError as exc:
+            return jsonify({'error': str(exc)}), 404
         
-        return send_file(
-            audio_buffer,
-            mimetype='audio/wav',
-            as_attachment=True,
-            download_name='converted_voice.wav'
-        )
+        # The source is decoded and converted window by window straight from the upload
+        pieces = list(iter_windowed_vc(
+            source_file.stream, target, suffix=Path(source_file.filename).suffix, in_flight=VC_WINDOW_PARALLELISM
+        ))
+        wav = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.float32)
+        return audio_response(wav, vc_engine_info()['sample_rate'], output_format, 'converted_voice')
         
     except Exception as e:
         print(f"VC Generation error: {str(e)}")
         return jsonify({'error': f'Voice conversion failed: {str(e)}'}), 500
 
+@app.route('/api/vc/stream', methods=['POST'])
+@requires_capability('vc')
+@admission_controlled('vc', lambda: upload_duration_seconds(request.files.get('source_audio')))
+def stream_vc():
+    """Windowed VC: converted audio is sent window by window while the rest of the source is converted.
+
+    Accepts the same form fields as /api/vc/generate plus ``format`` (``wav``,
+    the default, or ``pcm`` for raw 16-bit little-endian mono samples).
+    """
+    source_file = request.files.get('source_audio')
+    if not source_file or not source_file.filename:
+        return jsonify({'error': 'Source audio is required'}), 400
+    if not allowed_file(source_file.filename):
+        return jsonify({'error': 'Invalid audio file format'}), 400
+
+    output_format = request.form.get('format', 'wav').lower()
+    if output_format not in {'wav', 'pcm'}:
+        return jsonify({'error': f'Unsupported stream format: {output_format}'}), 400
+
+    print(f"🎯 ChatterBox VC Stream Request: {source_file.filename}")
+    started = time.time()
+    source = spool_upload(source_file)
+    try:
+        sample_rate = vc_engine_info()['sample_rate']
+        target = read_vc_target()
+        # One window is converted ahead while the client reads the previous one
+        chunks = iter_windowed_vc(source, target, suffix=Path(source_file.filename).suffix)
+        # The first window is converted before any header is sent, so a bad
+        # target voice or an undecodable source is still a proper error response
+        first = next(chunks, None)
+    except LookupError as exc:
+        source.close()
+        return jsonify({'error': str(exc)}), 404
+    except Exception as e:
+        source.close()
+        print(f"❌ VC stream setup failed: {e}")
+        return jsonify({'error': f'Voice conversion failed: {str(e)}'}), 500
+    print(f"🔊 First VC audio after {time.time() - started:.2f}s")
+
+    def generate_chunks():
+        try:
+            if output_format == 'wav':
+                yield wav_stream_header(sample_rate)
+            if first is not None:
+                yield from iter_pcm16(first)
+            for chunk in chunks:
+                yield from iter_pcm16(chunk)
+        except Exception as e:
+            # Headers are already sent, so the only signal left is ending the stream early
+            print(f"❌ VC stream failed: {e}")
+
+    mimetype = 'audio/wav' if output_format == 'wav' else f'audio/L16; rate={sample_rate}; channels=1'
+    response = Response(
+        stream_with_context(generate_chunks()),
+        mimetype=mimetype,
+        direct_passthrough=True,
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'X-Sample-Rate': str(sample_rate),
+        }
+    )
+    return call_when_sent(response, source.close)
+
 @app.route('/api/voices', methods=['GET'])
 def list_voice_library():
-    samples = read_voice_library()
-    return jsonify({'samples': samples})
+    """List saved voices; optional ``offset`` and ``limit`` query parameters page the result."""
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = request.args.get('limit')
+        limit = min(max(1, int(limit)), VOICE_LIST_MAX_LIMIT) if limit is not None else None
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    samples, total = get_voice_library().list(offset, limit)
+    return jsonify({'samples': samples, 'total': total, 'offset': offset, 'limit': limit})
 
 @app.route('/api/voices', methods=['POST'])
 def upload_voice_sample():
@@ -635,19 +4901,29 @@ def upload_voice_sample():
             'url': f"/api/voices/{voice_id}/file"
         }
 
-        samples = read_voice_library()
-        samples.append(sample)
-        write_voice_library(samples)
+        get_voice_library().add(sample)
+        precompute_vc_embedding(voice_id)
 
         return jsonify(sample), 201
     except Exception as exc:
         print(f"❌ Failed to save voice sample: {exc}")
+        remove_files(save_path)
         return jsonify({'error': f'Could not save voice sample: {exc}'}), 500
 
+@app.route('/api/voices/<voice_id>', methods=['DELETE'])
+def delete_voice_sample(voice_id):
+    """Remove a saved voice with its audio and stored VC embedding."""
+    sample = get_voice_library().remove(voice_id)
+    if not sample:
+        return jsonify({'error': 'Voice sample not found'}), 404
+    voice_content_hashes.pop(voice_id, None)
+    audio_path = VOICE_LIB_DIR / sample['filename'] if sample.get('filename') else None
+    remove_files(audio_path, vc_embedding_path(voice_id))
+    return jsonify(sample)
+
 @app.route('/api/voices/<voice_id>/file', methods=['GET'])
 def get_voice_sample_file(voice_id):
-    samples = read_voice_library()
-    sample = next((s for s in samples if s.get('id') == voice_id), None)
+    sample = find_voice_sample(voice_id)
     if not sample:
         return jsonify({'error': 'Voice sample not found'}), 404
 
@@ -662,6 +4938,321 @@ def get_voice_sample_file(voice_id):
         download_name=sample.get('name') or 'voice-sample.wav'
     )
 
+def job_accepted(job):
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = f"/api/jobs/{job.id}"
+    return response
+
+@app.route('/api/jobs/tts', methods=['POST'])
+@requires_capability('tts')
+def submit_tts_job():
+    text = request.form.get('text', '').strip()
+    if not text:
+        return jsonify({'error': 'Text is required'}), 400
+    if len(text) > TTS_MAX_TEXT_CHARS:
+        return jsonify({'error': f'Text too long (max {TTS_MAX_TEXT_CHARS} characters)'}), 400
+    try:
+        params = parse_tts_params(request.form)
+        seed = int(request.form.get('seed', 0))
+    except ValueError as exc:
+        return jsonify({'error': f'Invalid parameter: {exc}'}), 400
+    language = request.form.get('language', 'en')
+    try:
+        output_format = parse_output_format(request.form)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    try:
+        voice = read_tts_voice_source()
+    except LookupError as exc:
+        return jsonify({'error': str(exc)}), 404
+
+    try:
+        job = job_manager.submit(
+            'tts', admitted_job(tts_admission_kind(), len(text), run_tts_job),
+            text, language, params, voice, seed, output_format
+        )
+    except JobQueueFull as exc:
+        return jsonify({'error': str(exc)}), 429
+    return job_accepted(job)
+
+@app.route('/api/jobs/vc', methods=['POST'])
+@requires_capability('vc')
+def submit_vc_job():
+    source_file = request.files.get('source_audio')
+    if not source_file or not source_file.filename:
+        return jsonify({'error': 'Source audio is required'}), 400
+    if not allowed_file(source_file.filename):
+        return jsonify({'error': 'Invalid audio file format'}), 400
+    try:
+        output_format = parse_output_format(request.form)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    # Uploads only live as long as the request, so they are persisted before queueing
+    source_seconds = upload_duration_seconds(source_file)
+    source_path = save_upload_to_temp(source_file)
+    target_voice_path = None
+    target = None
+    target_file = request.files.get('target_voice')
+    if request.form.get('target_voice_id'):
+        # Checked now, embedded (or read from the stored embedding) when the job runs
+        try:
+            library_voice_source(request.form['target_voice_id'])
+        except LookupError as exc:
+            remove_files(source_path)
+            return jsonify({'error': str(exc)}), 404
+        target = {'voice_id': request.form['target_voice_id']}
+    elif target_file and target_file.filename and allowed_file(target_file.filename):
+        target_voice_path = save_upload_to_temp(target_file)
+        target = {'path': target_voice_path}
+
+    try:
+        job = job_manager.submit(
+            'vc', admitted_job('vc', source_seconds, run_vc_job), source_path, target, output_format,
+            on_discard=lambda: remove_files(source_path, target_voice_path)
+        )
+    except JobQueueFull as exc:
+        remove_files(source_path, target_voice_path)
+        return jsonify({'error': str(exc)}), 429
+    return job_accepted(job)
+
+TTS_PARAM_NAMES = ('exaggeration', 'temperature', 'cfg_weight', 'min_p', 'top_p', 'repetition_penalty')
+
+def read_tts_batch_request():
+    """Raw items and shared defaults of a bulk TTS request.
+
+    Accepts a JSON body (a list of items, or an object with ``items`` plus
+    defaults such as ``language``, ``voice_id``, ``params``, ``seed`` and
+    ``format``) or CSV, uploaded as ``script`` or sent as a text/csv body,
+    with a header row naming the columns (``text``, ``language``,
+    ``voice_id``, ``name``, ``seed`` and any sampling parameter); defaults
+    for CSV come from the form fields.
+    """
+    payload = request.get_json(silent=True)
+    if payload is not None:
+        if isinstance(payload, list):
+            return payload, {}
+        if not isinstance(payload, dict):
+            raise ValueError('Expected a JSON list of items or an object with "items"')
+        return payload.get('items') or [], payload
+
+    script = request.files.get('script')
+    if script is not None:
+        csv_text = script.read().decode('utf-8-sig')
+    elif request.mimetype == 'text/csv':
+        csv_text = request.get_data(as_text=True)
+    else:
+        raise ValueError('Send items as JSON or CSV')
+    rows = []
+    for row in csv.DictReader(io.StringIO(csv_text)):
+        row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        params = {name: row.pop(name) for name in TTS_PARAM_NAMES if row.get(name)}
+        row = {key: value for key, value in row.items() if value}
+        if params:
+            row['params'] = params
+        rows.append(row)
+    defaults = {key: request.form[key] for key in ('language', 'voice_id', 'seed', 'format') if request.form.get(key)}
+    params = {name: request.form[name] for name in TTS_PARAM_NAMES if request.form.get(name)}
+    if params:
+        defaults['params'] = params
+    return rows, defaults
+
+def normalize_tts_batch_items(raw_items, defaults):
+    """Validated bulk items; raises ValueError for a malformed item."""
+    if not raw_items:
+        raise ValueError('At least one item is required')
+    if len(raw_items) > TTS_BULK_MAX_ITEMS:
+        raise ValueError(f'Too many items (max {TTS_BULK_MAX_ITEMS})')
+    items = []
+    for index, raw in enumerate(raw_items):
+        if isinstance(raw, str):
+            raw = {'text': raw}
+        if not isinstance(raw, dict):
+            raise ValueError(f'Item {index}: expected an object')
+        text = str(raw.get('text') or '').strip()
+        if not text:
+            raise ValueError(f'Item {index}: text is required')
+        if len(text) > TTS_MAX_TEXT_CHARS:
+            raise ValueError(f'Item {index}: text too long (max {TTS_MAX_TEXT_CHARS} characters)')
+        try:
+            params = parse_tts_params({**(defaults.get('params') or {}), **(raw.get('params') or {})})
+            seed = int(raw.get('seed', defaults.get('seed', 0)))
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f'Item {index}: invalid parameter: {exc}')
+        items.append({
+            'index': index,
+            'name': str(raw.get('name') or raw.get('id') or ''),
+            'text': text,
+            'language': raw.get('language') or defaults.get('language') or 'en',
+            'voice_id': raw.get('voice_id') or defaults.get('voice_id') or None,
+            'params': params,
+            'seed': seed,
+            'status': 'queued',
+            'error': None,
+            'filename': None,
+            'duration': None,
+        })
+    return items
+
+def resolve_batch_voices(items):
+    """Voice source per distinct voice_id, looked up once for the whole batch."""
+    return {voice_id: library_voice_source(voice_id) for voice_id in {item['voice_id'] for item in items if item['voice_id']}}
+
+@app.route('/api/jobs/tts/batch', methods=['POST'])
+@requires_capability('tts')
+def submit_tts_batch_job():
+    """Render many lines in one job; see read_tts_batch_request for the accepted bodies."""
+    try:
+        raw_items, defaults = read_tts_batch_request()
+        items = normalize_tts_batch_items(raw_items, defaults)
+        output_format = parse_output_format(defaults)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    try:
+        voices = resolve_batch_voices(items)
+    except LookupError as exc:
+        return jsonify({'error': str(exc)}), 404
+
+    batch = TTSBatch(items, output_format)
+    try:
+        job = job_manager.submit('tts_batch', admitted_tts_batch_job(batch), batch, voices)
+    except JobQueueFull as exc:
+        return jsonify({'error': str(exc)}), 429
+    job.batch = batch
+    print(f"📚 Bulk TTS job {job.id}: {len(items)} items, {len(voices)} voices")
+    return job_accepted(job)
+
+@app.route('/api/jobs/<job_id>/items', methods=['GET'])
+def get_job_items(job_id):
+    """Per-item status of a bulk job; finished items can be downloaded before the job ends."""
+    job = job_manager.get(job_id)
+    if job is None or job.batch is None:
+        return jsonify({'error': 'Batch job not found'}), 404
+    return jsonify({'job': job.to_dict(), 'items': job.batch.manifest(job.id)})
+
+@app.route('/api/jobs/<job_id>/items/<int:index>', methods=['GET'])
+def get_job_item(job_id, index):
+    job = job_manager.get(job_id)
+    if job is None or job.batch is None or not 0 <= index < len(job.batch.items):
+        return jsonify({'error': 'Batch item not found'}), 404
+    item = job.batch.items[index]
+    if item['status'] != 'succeeded':
+        return jsonify({'error': f"Item is {item['status']}", 'detail': item.get('error')}), 409
+    item_path = job.batch.directory / item['filename']
+    if not item_path.exists():
+        return jsonify({'error': 'Job result expired'}), 410
+    return send_file(
+        item_path,
+        mimetype=AUDIO_OUTPUT_FORMATS[job.batch.output_format]['mimetype'],
+        as_attachment=True,
+        download_name=item['filename']
+    )
+
+@app.route('/api/jobs/<job_id>/retry', methods=['POST'])
+@requires_capability('tts')
+def retry_tts_batch_job(job_id):
+    """Start a new job for the items of a finished bulk job that did not render; rendered ones are reused."""
+    job = job_manager.get(job_id)
+    if job is None or job.batch is None:
+        return jsonify({'error': 'Batch job not found'}), 404
+    if not job.finished:
+        return jsonify({'error': f'Job is {job.status}', 'job': job.to_dict()}), 409
+    counts = job.batch.counts()
+    if counts.get('succeeded', 0) == counts['total']:
+        return jsonify({'error': 'All items already rendered', 'job': job.to_dict()}), 409
+    try:
+        voices = resolve_batch_voices(job.batch.items)
+    except LookupError as exc:
+        return jsonify({'error': str(exc)}), 404
+
+    batch = job.batch.for_retry()
+    try:
+        retry = job_manager.submit('tts_batch', admitted_tts_batch_job(batch), batch, voices)
+    except JobQueueFull as exc:
+        shutil.rmtree(batch.directory, ignore_errors=True)
+        return jsonify({'error': str(exc)}), 429
+    retry.batch = batch
+    print(f"🔁 Bulk TTS job {retry.id} retries {counts['total'] - counts.get('succeeded', 0)} items of {job.id}")
+    return job_accepted(retry)
+
+@app.route('/api/jobs/stt', methods=['POST'])
+@requires_capability('stt')
+def submit_stt_job():
+    if not FASTER_WHISPER_AVAILABLE:
+        return jsonify({'error': 'faster-whisper is not installed on this server.'}), 500
+    audio_file = request.files.get('audio')
+    if not audio_file or not audio_file.filename:
+        return jsonify({'error': 'Audio file is required (multipart form field "audio").'}), 400
+    if not allowed_file(audio_file.filename):
+        return jsonify({'error': f'Unsupported file type: {audio_file.filename}'}), 400
+
+    language = request.form.get('language') or None
+    task = request.form.get('task', 'transcribe')
+    mode = request.form.get('mode') or None
+    if mode not in {None, 'single', 'tiered'}:
+        return jsonify({'error': f'Unsupported mode: {mode} (use single or tiered)'}), 400
+    compare = request.form.get('compare', 'false').lower() == 'true'
+    audio_seconds = upload_duration_seconds(audio_file)
+    audio_path = save_upload_to_temp(audio_file)
+    try:
+        job = job_manager.submit(
+            'stt', admitted_job(f"stt:{mode or STT_MODE}", audio_seconds, run_stt_job),
+            audio_path, language, task, mode, compare, on_discard=lambda: remove_files(audio_path)
+        )
+    except JobQueueFull as exc:
+        remove_files(audio_path)
+        return jsonify({'error': str(exc)}), 429
+    return job_accepted(job)
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_manager.cancel(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-sent events with the job state, sent on every change until it finishes."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def events():
+        version = None
+        while True:
+            if version == job.version:
+                yield ': keep-alive\n\n'
+            else:
+                version = job.version
+                yield f"event: {'done' if job.finished else 'progress'}\ndata: {json.dumps(job.to_dict())}\n\n"
+                if job.finished:
+                    return
+            job_manager.wait_for_change(job, version, timeout=15)
+
+    return Response(events(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != 'succeeded':
+        return jsonify({'error': f'Job is {job.status}', 'job': job.to_dict()}), 409
+    if job.result_json is not None:
+        return jsonify(job.result_json)
+    if not job.result_path or not job.result_path.exists():
+        return jsonify({'error': 'Job result expired'}), 410
+    return send_file(job.result_path, mimetype=job.result_mimetype, as_attachment=True, download_name=job.result_name)
+
 @app.errorhandler(413)
 def too_large(e):
     return jsonify({'error': 'File too large (max 50MB)'}), 413
@@ -671,17 +5262,16 @@ def internal_error(e):
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
-    print(f"Starting ResembleAI Chatterbox Multilingual TTS API server on device: {DEVICE}")
-    print("Loading models...")
+    if sys.argv[1:2] == ['model-server']:
+        run_model_server()
+        sys.exit(0)
+
+    print(f"Starting ResembleAI Chatterbox Multilingual TTS API server on device: {get_device() if CAPABILITIES & TORCH_CAPABILITIES else STT_DEVICE or 'auto'}")
     
-    # Pre-load models for faster response times
-    try:
-        load_tts_model()
-        load_vc_model()
-        get_mongo_db()
-        print("All models loaded successfully!")
-    except Exception as e:
-        print(f"Warning: Could not pre-load models: {e}")
-        print("Models will be loaded on first request.")
+    # Load and warm up the models in the background (the model server owns them when configured)
+    if MODEL_WARMUP_ENABLED:
+        print("Loading models...")
+    start_model_warmup()
+    get_mongo_db()
     
     app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 8000)), debug=True)
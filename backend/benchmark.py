@@ -0,0 +1,415 @@
+"""Latency and load benchmark for the Vaani backend API.
+
+Runs TTS, VC, STT and voice-library requests against the Flask app, either
+in-process (the default) or over HTTP, and prints a JSON report with
+p50/p95/p99 latency, throughput, real-time factor and peak RSS.
+
+Examples:
+    python backend/benchmark.py --models mock --requests 20 --concurrency 4
+    python backend/benchmark.py --url http://localhost:8000 --endpoints tts,stt --server-pid 1234
+    python backend/benchmark.py --cpu-modes fp32,int8,int8+compile --requests 5
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import re
+import resource
+import sys
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ENDPOINTS = ('tts', 'vc', 'stt', 'voices')
+SAMPLE_TEXT = 'The quick brown fox jumps over the lazy dog. '
+AUDIO_SAMPLE_RATE = 16000
+
+
+def make_text(chars):
+    return (SAMPLE_TEXT * (chars // len(SAMPLE_TEXT) + 1))[:chars].strip()
+
+
+def make_audio(seconds, sample_rate=AUDIO_SAMPLE_RATE):
+    """Speech-like test clip: a wobbling tone with syllable-rate bursts and a little noise."""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    tone = np.sin(2 * np.pi * (180 + 40 * np.sin(2 * np.pi * 3 * t)) * t)
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t).clip(0)
+    noise = np.random.default_rng(0).normal(0, 0.02, t.size)
+    audio = (0.4 * tone * envelope + noise).clip(-1, 1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes((audio * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def wav_duration(data):
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav_file:
+            return wav_file.getnframes() / wav_file.getframerate()
+    except (wave.Error, EOFError):
+        return None
+
+
+def build_request(endpoint, args, audio_bytes):
+    """(method, path, form fields, files, input audio seconds) for one request."""
+    if endpoint == 'tts':
+        fields = {'text': make_text(args.text_chars), 'language': args.language, 'seed': str(args.seed)}
+        return 'POST', '/api/tts/generate', fields, {}, None
+    if endpoint == 'vc':
+        return 'POST', '/api/vc/generate', {}, {'source_audio': ('source.wav', audio_bytes)}, args.audio_seconds
+    if endpoint == 'stt':
+        fields = {'language': args.language} if args.language else {}
+        if args.stt_mode:
+            fields['mode'] = args.stt_mode
+        return 'POST', '/api/stt/transcribe', fields, {'audio': ('speech.wav', audio_bytes)}, args.audio_seconds
+    if endpoint == 'voices':
+        return 'GET', '/api/voices', {}, {}, None
+    raise ValueError(f'Unknown endpoint: {endpoint}')
+
+
+class InProcessTarget:
+    """Calls the Flask app through its test client, one client per thread."""
+
+    def __init__(self, models):
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        if models == 'mock':
+            # The mocks are installed below; warming up would load the real models
+            os.environ['MODEL_WARMUP'] = 'false'
+        import app as backend
+        self.backend = backend
+        if models == 'mock':
+            for engine in backend.TTS_ENGINE_CLASSES:
+                backend.model_registry.put(f'tts_{engine}', backend.MockMultilingualTTS.from_pretrained(backend.get_device()))
+            backend.model_registry.put('vc', backend.MockChatterboxVC.from_pretrained(backend.get_device()))
+        else:
+            # Measure warm models, not the cold start
+            backend.start_model_warmup()
+            backend.model_warmup.wait()
+        self._local = threading.local()
+
+    def describe(self):
+        backend = self.backend
+        tts_model = backend.model_registry.peek(f"tts_{backend.tts_engine_for_language('en')}")
+        vc_model = backend.model_registry.peek('vc')
+        return {
+            'mode': 'in-process',
+            'device': backend.DEVICE,
+            'tts_model': type(tts_model).__name__ if tts_model else None,
+            'vc_model': type(vc_model).__name__ if vc_model else None,
+            'stt_model': backend.STT_MODEL_NAME if backend.FASTER_WHISPER_AVAILABLE else None,
+            'model_server': backend.MODEL_SERVER_ADDRESS,
+        }
+
+    def send(self, method, path, fields, files):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.backend.app.test_client()
+        data = dict(fields)
+        for name, (filename, content) in files.items():
+            data[name] = (io.BytesIO(content), filename)
+        response = client.open(path, method=method, data=data or None)
+        return response.status_code, response.get_data()
+
+
+class HTTPTarget:
+    """Calls a running server over HTTP."""
+
+    def __init__(self, url, timeout):
+        import httpx
+        self.url = url.rstrip('/')
+        self.client = httpx.Client(base_url=self.url, timeout=timeout)
+
+    def describe(self):
+        try:
+            health = self.client.get('/api/health').json()
+        except Exception as exc:
+            health = {'error': str(exc)}
+        return {
+            'mode': 'http',
+            'url': self.url,
+            'device': health.get('device'),
+            'tts_model': health.get('tts_model_type'),
+            'vc_model': health.get('vc_model_type'),
+            'model_server': health.get('model_server'),
+        }
+
+    def send(self, method, path, fields, files):
+        response = self.client.request(
+            method, path,
+            data=fields or None,
+            files={name: (filename, content, 'audio/wav') for name, (filename, content) in files.items()} or None
+        )
+        return response.status_code, response.content
+
+
+def peak_rss_mb(pid=None):
+    """Peak resident set size of this process, or of pid when given (Linux only)."""
+    if pid:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmHWM:'):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            return None
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return usage / (1024 * 1024) if sys.platform == 'darwin' else usage / 1024
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the reference length (case and punctuation ignored)."""
+    ref = re.findall(r"[\w']+", reference.lower())
+    hyp = re.findall(r"[\w']+", hypothesis.lower())
+    distances = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        previous, distances[0] = distances[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            previous, distances[j] = distances[j], min(distances[j] + 1, distances[j - 1] + 1, previous + (ref_word != hyp_word))
+    return distances[-1] / max(1, len(ref))
+
+
+def speaker_embedding(backend, model, wav):
+    """L2-normalised voice-encoder embedding of a generated clip, if the model has an encoder."""
+    encoder = getattr(model, 've', None)
+    if encoder is None:
+        return None
+    audio = backend.resample_audio(wav, model.sr, AUDIO_SAMPLE_RATE)
+    embedding = np.asarray(encoder.embeds_from_wavs([audio], sample_rate=AUDIO_SAMPLE_RATE)).mean(axis=0)
+    return embedding / (np.linalg.norm(embedding) or 1.0)
+
+
+def compare_cpu_modes(args):
+    """Latency and quality of each CPU_INFERENCE_MODE against the fp32 models on the CPU.
+
+    Every mode renders the same texts with the same seeds. Quality is the
+    Whisper word error rate against the input text (when faster-whisper is
+    installed), the speaker similarity of each clip to the fp32 clip of the
+    same seed, and the duration relative to it.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    os.environ['MODEL_WARMUP'] = 'false'
+    import app as backend
+    backend.DEVICE = 'cpu'
+    text = make_text(args.text_chars)
+    params = backend.parse_tts_params({})
+    seeds = [(args.seed or 1) + index for index in range(args.requests)]
+    modes = ['fp32'] + [mode for mode in args.cpu_modes if mode != 'fp32']
+    baseline = {}
+    report = {}
+    for mode in modes:
+        backend.parse_cpu_inference_mode(mode)
+        print(f"⏱️ CPU mode {mode}: loading and rendering {len(seeds)} clips...")
+        backend.CPU_INFERENCE_MODE = mode
+        for engine in backend.TTS_ENGINE_CLASSES:
+            backend.model_registry.evict(f'tts_{engine}')
+        gc.collect()
+        started = time.perf_counter()
+        model = backend.load_tts_model(args.language)
+        load_seconds = time.perf_counter() - started
+
+        # The first generation pays for any compilation
+        started = time.perf_counter()
+        backend.synthesize_tts(model, text, args.language, None, params)
+        first_seconds = time.perf_counter() - started
+
+        latencies, rtfs, wers, similarities, duration_ratios = [], [], [], [], []
+        for seed in seeds:
+            started = time.perf_counter()
+            wav = backend.waveform_to_numpy(backend.synthesize_tts(model, text, args.language, None, params, seed=seed))
+            latency = time.perf_counter() - started
+            duration = len(wav) / model.sr
+            latencies.append(latency)
+            if duration:
+                rtfs.append(latency / duration)
+            if backend.FASTER_WHISPER_AVAILABLE:
+                audio_16k = backend.resample_audio(wav, model.sr, AUDIO_SAMPLE_RATE)
+                transcript = backend.transcribe_audio_file(audio_16k, language=args.language)['text']
+                wers.append(word_error_rate(text, transcript))
+            embedding = speaker_embedding(backend, model, wav)
+            if mode == 'fp32':
+                baseline[seed] = (embedding, duration)
+            else:
+                base_embedding, base_duration = baseline[seed]
+                if embedding is not None and base_embedding is not None:
+                    similarities.append(float(np.dot(embedding, base_embedding)))
+                if base_duration:
+                    duration_ratios.append(duration / base_duration)
+
+        report[mode] = {
+            'model': type(model).__name__,
+            'load_seconds': round(load_seconds, 2),
+            'first_request_seconds': round(first_seconds, 2),
+            'latency_ms': {
+                'p50': round(float(np.percentile(latencies, 50)) * 1000, 1),
+                'mean': round(float(np.mean(latencies)) * 1000, 1),
+            },
+            'real_time_factor': round(float(np.mean(rtfs)), 4) if rtfs else None,
+            'rss_mb': round(current_rss_mb(), 1) if current_rss_mb() else None,
+            'word_error_rate': round(float(np.mean(wers)), 4) if wers else None,
+            'speaker_similarity_to_fp32': round(float(np.mean(similarities)), 4) if similarities else None,
+            'duration_ratio_to_fp32': round(float(np.mean(duration_ratios)), 4) if duration_ratios else None,
+        }
+        if mode != 'fp32' and report['fp32']['latency_ms']['mean']:
+            report[mode]['speedup_vs_fp32'] = round(report['fp32']['latency_ms']['mean'] / report[mode]['latency_ms']['mean'], 3)
+    return report
+
+
+def summarize(samples, wall_seconds):
+    latencies = np.array([s['latency'] for s in samples if s['ok']]) * 1000
+    errors = [s for s in samples if not s['ok']]
+    rtfs = [s['latency'] / s['audio_seconds'] for s in samples if s['ok'] and s['audio_seconds']]
+    summary = {
+        'requests': len(samples),
+        'errors': len(errors),
+        'throughput_rps': round(latencies.size / wall_seconds, 3) if wall_seconds else None,
+        'wall_seconds': round(wall_seconds, 3),
+    }
+    if latencies.size:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        summary['latency_ms'] = {
+            'p50': round(float(p50), 2),
+            'p95': round(float(p95), 2),
+            'p99': round(float(p99), 2),
+            'mean': round(float(latencies.mean()), 2),
+            'max': round(float(latencies.max()), 2),
+        }
+    if rtfs:
+        # Seconds of processing per second of audio; below 1.0 is faster than real time
+        summary['real_time_factor'] = {
+            'p50': round(float(np.percentile(rtfs, 50)), 4),
+            'mean': round(float(np.mean(rtfs)), 4),
+        }
+    if errors:
+        summary['error_samples'] = sorted({f"{s['status']}: {s['error']}" for s in errors})[:5]
+    return summary
+
+
+def run_endpoint(target, endpoint, args, audio_bytes):
+    method, path, fields, files, input_seconds = build_request(endpoint, args, audio_bytes)
+
+    def one_request(_):
+        started = time.perf_counter()
+        try:
+            status, body = target.send(method, path, fields, files)
+        except Exception as exc:
+            return {'ok': False, 'status': None, 'error': str(exc), 'latency': time.perf_counter() - started, 'audio_seconds': None}
+        latency = time.perf_counter() - started
+        ok = 200 <= status < 300
+        audio_seconds = input_seconds
+        if ok and endpoint in {'tts', 'vc'}:
+            audio_seconds = wav_duration(body)
+        error = None if ok else body[:200].decode('utf-8', 'replace')
+        return {'ok': ok, 'status': status, 'error': error, 'latency': latency, 'audio_seconds': audio_seconds}
+
+    for _ in range(args.warmup):
+        one_request(None)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        samples = list(pool.map(one_request, range(args.requests)))
+    return summarize(samples, time.perf_counter() - started)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Benchmark a running server instead of the app in-process')
+    parser.add_argument('--models', choices=('real', 'mock'), default='real',
+                        help='In-process only: use the mock TTS/VC stand-ins instead of loading the real models')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help=f'Comma-separated subset of {", ".join(ENDPOINTS)}')
+    parser.add_argument('--requests', type=int, default=10, help='Measured requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=1, help='Requests in flight at once')
+    parser.add_argument('--warmup', type=int, default=1, help='Unmeasured requests per endpoint before timing')
+    parser.add_argument('--text-chars', type=int, default=120, help='TTS input length in characters')
+    parser.add_argument('--audio-seconds', type=float, default=5.0, help='VC/STT input length in seconds')
+    parser.add_argument('--language', default='en')
+    parser.add_argument('--stt-mode', choices=('single', 'tiered'),
+                        help='STT mode to request; run both on the same audio to measure what tiered mode saves')
+    parser.add_argument('--seed', type=int, default=0, help='TTS seed; non-zero seeds hit the result cache after the first request')
+    parser.add_argument('--timeout', type=float, default=300.0, help='HTTP request timeout in seconds')
+    parser.add_argument('--server-pid', type=int, help='HTTP only: also report the peak RSS of this server process')
+    parser.add_argument('--cpu-modes',
+                        help='Instead of the endpoints, compare these CPU_INFERENCE_MODE values '
+                             '(e.g. fp32,int8,int8+compile) in-process on the CPU')
+    parser.add_argument('--output', help='Write the JSON report here instead of stdout')
+    args = parser.parse_args(argv)
+    if args.cpu_modes:
+        args.cpu_modes = [mode.strip() for mode in args.cpu_modes.split(',') if mode.strip()]
+    args.endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f'Unknown endpoints: {", ".join(sorted(unknown))}')
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    audio_bytes = make_audio(args.audio_seconds)
+
+    # The in-process app logs to stdout; keep stdout for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        if args.cpu_modes:
+            results = {'cpu_modes': compare_cpu_modes(args)}
+            description = {'mode': 'in-process', 'device': 'cpu', 'comparison': 'cpu_inference_modes'}
+        else:
+            target = HTTPTarget(args.url, args.timeout) if args.url else InProcessTarget(args.models)
+            results = {}
+            for endpoint in args.endpoints:
+                print(f"⏱️ Benchmarking {endpoint} ({args.requests} requests, concurrency {args.concurrency})...")
+                results[endpoint] = run_endpoint(target, endpoint, args, audio_bytes)
+            description = target.describe()
+
+    server_rss = peak_rss_mb(args.server_pid) if args.server_pid else None
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'target': description,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'warmup': args.warmup,
+            'text_chars': args.text_chars,
+            'audio_seconds': args.audio_seconds,
+            'language': args.language,
+            'stt_mode': args.stt_mode,
+            'seed': args.seed,
+        },
+        'endpoints': results,
+        'peak_rss_mb': {
+            'benchmark_process': round(peak_rss_mb(), 1),
+            'server_process': round(server_rss, 1) if server_rss else None,
+        },
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
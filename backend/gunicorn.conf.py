@@ -0,0 +1,9 @@
+"""Gunicorn settings for the Vaani backend (``gunicorn -c backend/gunicorn.conf.py backend.app:app``)."""
+import importlib
+
+
+def post_worker_init(worker):
+    # Each worker warms up its own models once it has loaded the app; the
+    # master and plain imports of the module (tools, benchmarks) never do
+    module_name = worker.app.app_uri.split(':', 1)[0]
+    importlib.import_module(module_name).start_model_warmup()
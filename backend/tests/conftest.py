@@ -0,0 +1,129 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# The app reads its configuration at import time; keep test state out of the repo
+_storage = Path(tempfile.mkdtemp(prefix='vaani-tests-'))
+os.environ['VOICE_STORAGE_PATH'] = str(_storage / 'voice_library')
+os.environ['TTS_RESULT_CACHE_DIR'] = str(_storage / 'tts_cache')
+os.environ['JOB_RESULTS_DIR'] = str(_storage / 'jobs')
+os.environ['MODEL_WARMUP'] = 'false'
+os.environ.pop('MODEL_SERVER_ADDRESS', None)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pytest
+
+import app as backend
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+class FakeT3Cond:
+    def __init__(self, speaker, exaggeration):
+        self.speaker = speaker
+        self.emotion_adv = exaggeration
+
+
+class FakeConditionals:
+    def __init__(self, t3):
+        self.t3 = t3
+
+
+class FakeTTS:
+    """Behaves like Chatterbox where the app depends on it: conds, prepare_conditionals, generate."""
+
+    sr = 24000
+
+    def __init__(self, seconds=0.25, delay=0.0):
+        self.device = 'cpu'
+        self.seconds = seconds
+        self.delay = delay
+        self.calls = []
+        self.conds = FakeConditionals(FakeT3Cond('default', 0.5))
+
+    def prepare_conditionals(self, audio_path, exaggeration=0.5):
+        self.conds = FakeConditionals(FakeT3Cond(Path(audio_path).read_bytes(), exaggeration))
+
+    def generate(self, text, audio_prompt_path=None, exaggeration=0.5, **kwargs):
+        import torch
+        if exaggeration != self.conds.t3.emotion_adv:
+            # Chatterbox rebuilds the T3 conditioning in place on its conds
+            self.conds.t3 = FakeT3Cond(self.conds.t3.speaker, exaggeration)
+        self.calls.append((text, self.conds.t3.speaker, self.conds.t3.emotion_adv))
+        if self.delay:
+            threading.Event().wait(self.delay)
+        noise = torch.rand(int(self.sr * self.seconds)) * 0.1
+        return noise.unsqueeze(0)
+
+
+class FakeMultilingualTTS(FakeTTS):
+    sr = 24000
+
+    def generate(self, text, language_id=None, **kwargs):
+        return super().generate(text, **kwargs)
+
+
+class FakeVC:
+    sr = 24000
+
+    def __init__(self):
+        self.device = 'cpu'
+
+    def generate(self, audio_path, target_voice_path=None):
+        import torch
+        return torch.zeros(1, self.sr // 2)
+
+
+@pytest.fixture
+def models():
+    """Install fake TTS/VC models in the registry instead of loading Chatterbox."""
+    installed = {
+        'tts_original': FakeTTS(),
+        'tts_multilingual': FakeMultilingualTTS(),
+        'vc': FakeVC(),
+    }
+    for name, model in installed.items():
+        backend.model_registry.put(name, model)
+    yield installed
+    for name in installed:
+        backend.model_registry.evict(name)
+
+
+@pytest.fixture
+def client():
+    return backend.app.test_client()
+
+
+@pytest.fixture
+def live_server():
+    """The app behind a real threaded WSGI server, for behaviour the test client hides."""
+    from werkzeug.serving import make_server
+    server = make_server('127.0.0.1', 0, backend.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    thread.join()
+
+
+def wav_upload(seconds=1.0, sample_rate=16000):
+    samples = (np.sin(np.linspace(0, 440 * 2 * np.pi * seconds, int(sample_rate * seconds))) * 0.3).astype(np.float32)
+    return backend.save_audio_to_wav(samples, sample_rate).getvalue()
+
+
+@pytest.fixture
+def http(live_server):
+    import httpx
+    with httpx.Client(base_url=live_server, timeout=30) as client:
+        yield client
@@ -0,0 +1,59 @@
+import pytest
+
+import app as backend
+from conftest import wait_until
+
+
+@pytest.mark.parametrize('path', ['/api/tts/generate', '/api/tts/stream'])
+def test_sequential_audio_responses_release_their_slot(models, http, path):
+    # Audio is sent with direct_passthrough, which Werkzeug never close()s
+    for attempt in range(backend.admission_controller.concurrency * 3):
+        response = http.post(path, data={'text': f'Request {attempt}.', 'language': 'en'}, timeout=10)
+        assert response.status_code == 200
+    assert wait_until(lambda: backend.admission_controller.stats()['running'] == 0)
+
+
+def test_queue_timeout_answers_busy_and_leaves_the_queue():
+    controller = backend.AdmissionController(concurrency=1, max_wait_seconds=0, queue_timeout_seconds=0.2)
+    holder = controller.admit('a', 'tts', 10)
+    with pytest.raises(backend.AdmissionTimeout):
+        controller.admit('b', 'tts', 10)
+    assert controller.queue_depth() == 0
+    controller.release(holder)
+    controller.release(controller.admit('b', 'tts', 10))
+    assert controller.stats()['timed_out'] == 1
+
+
+def test_queue_timeout_is_a_503(models, client, monkeypatch):
+    controller = backend.AdmissionController(concurrency=1, max_wait_seconds=0, queue_timeout_seconds=0.2)
+    monkeypatch.setattr(backend, 'admission_controller', controller)
+    holder = controller.admit('someone else', 'tts', 10)
+    try:
+        response = client.post('/api/tts/generate', data={'text': 'Hello.', 'language': 'en'})
+    finally:
+        controller.release(holder)
+    assert response.status_code == 503
+    assert 'Retry-After' in response.headers
+
+
+def test_client_id_header_is_not_trusted():
+    with backend.app.test_request_context(headers={'X-Client-Id': 'spoofed'}, environ_base={'REMOTE_ADDR': '10.0.0.7'}):
+        assert backend.request_client_id() == '10.0.0.7'
+
+
+def test_jobs_wait_for_an_admission_slot(models, client, monkeypatch):
+    controller = backend.AdmissionController(concurrency=1)
+    monkeypatch.setattr(backend, 'admission_controller', controller)
+    holder = controller.admit('someone else', 'tts', 10)
+    response = client.post('/api/jobs/tts', data={'text': 'Queued behind a live request.', 'language': 'en'})
+    assert response.status_code == 202
+    job = backend.job_manager.get(response.get_json()['id'])
+
+    assert wait_until(lambda: controller.queue_depth() == 1)
+    assert not job.finished
+    assert not any(model.calls for name, model in models.items() if name.startswith('tts'))
+
+    controller.release(holder)
+    assert wait_until(lambda: job.finished, timeout=10)
+    assert job.status == 'succeeded'
+    assert controller.stats()['running'] == 0
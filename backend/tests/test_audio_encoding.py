@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import torch
+
+import app as backend
+
+
+def test_pcm16_blocks_clip_samples_outside_the_unit_range():
+    audio = np.array([-2.0, -1.0, -0.5, 0.0, 0.5, 1.0, 3.0], dtype=np.float32)
+    pcm = np.concatenate(list(backend.pcm16_blocks(audio, chunk_samples=4)))
+    assert pcm.dtype == np.int16
+    assert pcm.tolist() == [-32768, -32767, -16383, 0, 16383, 32767, 32767]
+
+
+def test_pcm16_blocks_handle_a_short_last_chunk():
+    audio = torch.linspace(-1, 1, 10).unsqueeze(0)
+    blocks = list(backend.pcm16_blocks(audio, chunk_samples=4))
+    assert [len(block) for block in blocks] == [4, 4, 2]
+    expected = (audio.squeeze(0).numpy() * 32767).astype(np.int16)
+    assert np.array_equal(np.concatenate(blocks), expected)
+
+
+def test_pcm16_blocks_pass_int16_through_in_chunks():
+    pcm = np.arange(7, dtype=np.int16)
+    blocks = list(backend.pcm16_blocks(pcm, chunk_samples=3))
+    assert [block.tolist() for block in blocks] == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+@pytest.fixture
+def chatty_ffmpeg(tmp_path, monkeypatch):
+    """An "ffmpeg" that writes more to stderr than a pipe holds before producing output."""
+    script = tmp_path / 'ffmpeg'
+    script.write_text(
+        '#!/bin/sh\n'
+        'head -c 262144 /dev/zero | tr "\\0" "x" >&2\n'
+        'printf "encoded"\n'
+        'echo " bad input" >&2\n'
+        'exit 1\n'
+    )
+    script.chmod(0o755)
+    monkeypatch.setattr(backend, 'FFMPEG_BINARY', str(script))
+
+
+def test_ffmpeg_stderr_is_drained_while_it_runs(chatty_ffmpeg):
+    output = []
+    with pytest.raises(RuntimeError) as failure:
+        for chunk in backend.iter_ffmpeg([], None, 'test run', 'audio_encode'):
+            output.append(chunk)
+    assert b''.join(output) == b'encoded'
+    assert str(failure.value).endswith('bad input')
@@ -0,0 +1,29 @@
+import uuid
+
+import app as backend
+from conftest import wav_upload
+
+
+def test_conditionals_are_cached_per_exaggeration(models):
+    model = models['tts_original']
+    content_hash = uuid.uuid4().hex
+    calm = backend.get_tts_conditionals(model, content_hash, 0.3, audio_bytes=wav_upload())
+    lively = backend.get_tts_conditionals(model, content_hash, 0.9, audio_bytes=wav_upload())
+
+    assert calm is not lively
+    assert calm.t3.emotion_adv == 0.3
+    assert lively.t3.emotion_adv == 0.9
+    assert backend.get_tts_conditionals(model, content_hash, 0.3, audio_bytes=b'') is calm
+
+
+def test_generation_does_not_mutate_cached_conditionals(models):
+    model = models['tts_original']
+    conds = backend.get_tts_conditionals(model, uuid.uuid4().hex, 0.5, audio_bytes=wav_upload())
+    original_t3 = conds.t3
+    params = {**backend.parse_tts_params({}), 'exaggeration': 1.2}
+
+    backend.synthesize_tts(model, 'Hello there.', 'en', None, params, conds)
+
+    assert model.calls[-1][2] == 1.2
+    assert conds.t3 is original_t3
+    assert conds.t3.emotion_adv == 0.5
@@ -0,0 +1,29 @@
+import io
+
+import numpy as np
+
+import app as backend
+
+
+def fake_transcribe(detected):
+    def transcribe(audio, language=None, task='transcribe', on_segment=None, **kwargs):
+        info = {'language': detected, 'duration': len(audio) / backend.STT_SAMPLE_RATE}
+        on_segment({'start': 0.2, 'end': 0.8, 'text': 'Bonjour tout le monde.'}, info)
+        return {'text': 'Bonjour tout le monde.', 'language': detected, 'language_probability': 0.99, 'segments': []}
+    return transcribe
+
+
+def test_dub_uses_the_engine_of_the_detected_language(models, client, monkeypatch):
+    # Whisper itself is not needed: decoding and transcription are stood in for
+    monkeypatch.setattr(backend, 'FASTER_WHISPER_AVAILABLE', True)
+    monkeypatch.setattr(backend, 'decode_audio_upload', lambda file, rate: np.zeros(rate, dtype=np.float32))
+    monkeypatch.setattr(backend, 'transcribe_audio_file', fake_transcribe('fr'))
+    monkeypatch.setattr(backend, 'TTS_ENGINE_ROUTING', 'auto')
+    monkeypatch.setattr(models['tts_multilingual'], 'sr', 22050)
+
+    # Closed like a server would, so the admission slot is released
+    with client.post('/api/dub', data={'source_audio': (io.BytesIO(b'audio'), 'source.wav')}) as response:
+        assert response.status_code == 200
+        assert response.headers['X-Sample-Rate'] == '22050'
+        # The one-second source comes back at the detected engine's rate, after the 44-byte header
+        assert len(response.get_data()) - 44 == 2 * 22050
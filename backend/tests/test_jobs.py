@@ -0,0 +1,93 @@
+import json
+import os
+import threading
+import time
+
+import pytest
+
+import app as backend
+from conftest import wait_until
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return backend.JobManager(max_workers=1, max_queue=4, ttl_seconds=60, results_dir=tmp_path)
+
+
+def test_cancelling_a_running_job_stops_it_and_discards_its_inputs(manager):
+    started = threading.Event()
+    discarded = threading.Event()
+
+    def work(job):
+        started.set()
+        while True:
+            manager.set_progress(job, 0.5, 'Working')
+            time.sleep(0.01)
+
+    job = manager.submit('tts', work, on_discard=discarded.set)
+    assert started.wait(5)
+    assert job.status == 'running'
+
+    manager.cancel(job.id)
+    assert wait_until(lambda: job.finished)
+    assert job.status == 'cancelled' and job.message == 'Cancelled'
+    assert discarded.is_set()
+
+
+def test_cancelling_a_queued_job_never_runs_it(manager):
+    release = threading.Event()
+    ran = []
+    blocker = manager.submit('tts', lambda job: release.wait(5) and {})
+    queued = manager.submit('tts', lambda job: ran.append(job) or {})
+
+    manager.cancel(queued.id)
+    assert queued.status == 'cancelled' and queued.message == 'Cancelled before start'
+    release.set()
+    assert wait_until(lambda: blocker.finished)
+    assert ran == []
+
+
+def test_expired_jobs_and_stray_result_files_are_cleaned_up(manager, tmp_path):
+    old = manager.submit('tts', lambda job: (b'audio', 'audio/wav', 'speech.wav'))
+    fresh = manager.submit('tts', lambda job: (b'audio', 'audio/wav', 'speech.wav'))
+    assert wait_until(lambda: old.finished and fresh.finished)
+    old.finished_at -= 120
+    stray = tmp_path / 'left-by-another-process.wav'
+    stray.write_bytes(b'audio')
+    os.utime(stray, (time.time() - 120, time.time() - 120))
+
+    manager.cleanup_expired()
+    assert manager.get(old.id) is None and not old.result_path.exists()
+    assert manager.get(fresh.id) is fresh and fresh.result_path.exists()
+    assert not stray.exists()
+
+
+def test_events_report_progress_in_order_and_end_with_done(http):
+    steps = [threading.Event() for _ in range(4)]
+
+    def work(job):
+        for index, step in enumerate(steps[:3]):
+            step.wait(5)
+            backend.job_manager.set_progress(job, (index + 1) / 4, f'Step {index + 1}')
+        steps[3].wait(5)
+        return {'ok': True}
+
+    job = backend.job_manager.submit('tts', work)
+    events = []
+    with http.stream('GET', f'/api/jobs/{job.id}/events') as response:
+        assert response.headers['content-type'].startswith('text/event-stream')
+        name = None
+        for line in response.iter_lines():
+            if line.startswith('event: '):
+                name = line[len('event: '):]
+            elif line.startswith('data: '):
+                events.append((name, json.loads(line[len('data: '):])))
+                # Advance the job only once the previous state has been seen
+                done_steps = sum(step.is_set() for step in steps)
+                if done_steps < len(steps) and events[-1][1]['progress'] == done_steps / 4:
+                    steps[done_steps].set()
+
+    names = [name for name, _ in events]
+    assert names[-1] == 'done' and set(names[:-1]) == {'progress'}
+    assert list(dict.fromkeys(data['progress'] for _, data in events)) == [0.0, 0.25, 0.5, 0.75, 1.0]
+    assert events[-1][1]['status'] == 'succeeded'
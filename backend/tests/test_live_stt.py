@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import app as backend
+
+
+def fake_whisper(audio, **kwargs):
+    # Greedy decodes are partial hypotheses, beam searches are finals
+    text = 'hello there' if kwargs['beam_size'] > 1 else 'hello'
+    return iter([{'start': 0.0, 'end': len(audio) / backend.STT_SAMPLE_RATE, 'text': text}]), {'language': 'en'}
+
+
+def pcm(seconds, amplitude):
+    samples = np.sin(np.linspace(0, 220 * 2 * np.pi * seconds, int(backend.STT_SAMPLE_RATE * seconds))) * amplitude
+    return (samples * 32767).astype('<i2').tobytes()
+
+
+@pytest.fixture
+def live(client, monkeypatch):
+    monkeypatch.setattr(backend, 'FASTER_WHISPER_AVAILABLE', True)
+    monkeypatch.setattr(backend, 'whisper_transcribe', fake_whisper)
+
+    def create():
+        response = client.post('/api/stt/live/sessions', json={'sample_rate': backend.STT_SAMPLE_RATE})
+        assert response.status_code == 201
+        return response.get_json()
+
+    return create
+
+
+def test_speech_gives_partials_then_a_final_after_silence(live, client):
+    session = live()
+    events = client.post(session['audio_url'], data=pcm(0.9, 0.3)).get_json()['events']
+    assert events and {event['type'] for event in events} == {'partial'}
+    assert events[-1]['text'] == 'hello'
+
+    events = client.post(session['audio_url'], data=pcm(1.0, 0.0)).get_json()['events']
+    assert [event['type'] for event in events] == ['final']
+    assert events[0]['text'] == 'hello there' and events[0]['language'] == 'en'
+    assert events[0]['start'] == 0.0 and events[0]['end'] >= 0.9
+
+    closed = client.delete(f"/api/stt/live/sessions/{session['id']}").get_json()
+    assert closed == {'events': [], 'text': 'hello there'}
+
+
+def test_idle_sessions_expire_on_the_next_chunk_of_any_session(live, client, monkeypatch):
+    monkeypatch.setattr(backend, 'STT_STREAM_SESSION_TTL_SECONDS', 60)
+    idle, active = live(), live()
+    backend.live_stt_sessions[idle['id']].last_activity -= 120
+
+    assert client.post(active['audio_url'], data=pcm(0.1, 0.0)).status_code == 200
+    assert idle['id'] not in backend.live_stt_sessions
+    assert client.post(idle['audio_url'], data=pcm(0.1, 0.0)).status_code == 404
+    assert client.delete(f"/api/stt/live/sessions/{active['id']}").status_code == 200
@@ -0,0 +1,98 @@
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+import app as backend
+
+PARAMS = backend.parse_tts_params({})
+SAMPLE_RATE = 1000
+
+
+class ScriptedTTS:
+    """Stands in for tts_generate_async: segment i is 100 * (i + 1) samples of alternating sign.
+
+    Later segments take less time, so results complete out of order and the
+    order of the output comes only from synthesize_longform.
+    """
+
+    def __init__(self):
+        self.texts = []
+        self.futures = []
+        self.consumed = 0
+        self.most_outstanding = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, text, language, params, voice=None, seed=0):
+        with self.lock:
+            index = len(self.texts)
+            self.texts.append(text)
+            future = Future()
+            self.futures.append(future)
+            self.most_outstanding = max(self.most_outstanding, sum(not queued.done() for queued in self.futures))
+        samples = np.full(100 * (index + 1), 0.2 if index % 2 == 0 else -0.2, dtype=np.float32)
+        threading.Timer(0.01 * (6 - index), self.finish, [future, samples]).start()
+        return future
+
+    @staticmethod
+    def finish(future, samples):
+        if future.set_running_or_notify_cancel():
+            future.set_result((samples, SAMPLE_RATE))
+
+    def on_segment(self, done, total):
+        with self.lock:
+            self.consumed = done
+
+
+@pytest.fixture
+def tts(monkeypatch):
+    scripted = ScriptedTTS()
+    monkeypatch.setattr(backend, 'tts_generate_async', scripted)
+    monkeypatch.setattr(backend, 'TTS_LONGFORM_CROSSFADE_MS', 0)
+    monkeypatch.setattr(backend, 'TTS_LONGFORM_SEGMENT_CHARS', 40)
+    return scripted
+
+
+TEXT = ' '.join(f'Sentence number {index} of the long text.' for index in range(6))
+
+
+def test_segments_are_stitched_in_order_with_a_bounded_number_in_flight(tts):
+    audio, sample_rate = backend.synthesize_longform(TEXT, 'en', PARAMS, on_segment=tts.on_segment, in_flight=2)
+    assert sample_rate == SAMPLE_RATE
+    assert tts.texts == [f'Sentence number {index} of the long text.' for index in range(6)]
+    assert tts.most_outstanding == 2
+
+    # One run of samples per segment, in segment order
+    boundaries = np.flatnonzero(np.diff(np.sign(audio))) + 1
+    runs = np.diff(np.concatenate([[0], boundaries, [len(audio)]]))
+    assert runs.tolist() == [100 * (index + 1) for index in range(6)]
+    assert audio[0] > 0
+
+
+def test_should_stop_cancels_the_queued_segments(tts):
+    with pytest.raises(backend.JobCancelled):
+        backend.synthesize_longform(TEXT, 'en', PARAMS, should_stop=lambda: tts.consumed >= 1, on_segment=tts.on_segment, in_flight=2)
+    assert len(tts.texts) == 3
+    assert tts.futures[2].cancelled()
+
+
+def test_trim_silence_keeps_a_little_of_the_edges():
+    audio = np.concatenate([np.zeros(1000), np.full(500, 0.5), np.zeros(1000)]).astype(np.float32)
+    trimmed = backend.trim_silence(audio, SAMPLE_RATE, keep_ms=40)
+    assert len(trimmed) == 40 + 500 + 40
+    assert np.all(trimmed[40:540] == 0.5)
+
+
+def test_stitch_crossfades_neighbours_and_inserts_pauses():
+    first, second = np.ones(200, dtype=np.float32), np.ones(200, dtype=np.float32)
+
+    crossfaded = backend.stitch_segments([first, second], [0.0, 0.0], SAMPLE_RATE, crossfade_ms=20)
+    assert len(crossfaded) == 400 - 20
+    assert np.all(crossfaded[:180] == 1.0) and np.all(crossfaded[200:] == 1.0)
+    # Equal-power fade: never quieter than either side at the overlap
+    assert np.all(crossfaded[180:200] >= 0.99)
+
+    paused = backend.stitch_segments([first, second], [100.0, 0.0], SAMPLE_RATE, crossfade_ms=20)
+    assert len(paused) == 400 + 100
+    assert np.all(paused[200:300] == 0.0)
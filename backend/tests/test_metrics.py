@@ -0,0 +1,39 @@
+import re
+import time
+
+import app as backend
+
+
+def request_count(endpoint):
+    match = re.search(
+        r'vaani_http_request_duration_seconds_count\{endpoint="%s",method="POST",status="200"\} (\S+)' % re.escape(endpoint),
+        backend.render_metrics()
+    )
+    return float(match.group(1)) if match else 0.0
+
+
+def wait_for_count(endpoint, expected, timeout=2.0):
+    # The server closes the response just after the client has read the last byte
+    deadline = time.monotonic() + timeout
+    while request_count(endpoint) < expected and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return request_count(endpoint)
+
+
+def test_audio_responses_are_measured_once_written(models, http):
+    before = request_count('/api/tts/generate')
+
+    response = http.post('/api/tts/generate', data={'text': 'Hello there.'})
+
+    assert response.status_code == 200
+    assert response.content[:4] == b'RIFF'
+    assert wait_for_count('/api/tts/generate', before + 1) == before + 1
+
+
+def test_streamed_responses_are_measured(models, http):
+    before = request_count('/api/tts/stream')
+
+    response = http.post('/api/tts/stream', data={'text': 'One sentence. And another one.'})
+
+    assert response.status_code == 200
+    assert wait_for_count('/api/tts/stream', before + 1) == before + 1
@@ -0,0 +1,104 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+import pytest
+
+import app as backend
+
+AUTHKEY = b'test-model-server'
+
+
+def serve(address):
+    """A stand-in model server: 'echo' tasks are answered, 'hang' tasks never are."""
+    tasks = queue.Queue()
+    replies = {}
+
+    class Manager(backend.ModelServerManager):
+        pass
+
+    Manager.register('get_task_queue', callable=lambda: tasks)
+    Manager.register('get_reply_queue', callable=lambda client_id: replies.setdefault(client_id, queue.Queue()))
+    server = Manager(address=address, authkey=AUTHKEY).get_server()
+
+    def answer():
+        while True:
+            client_id, task_id, kind, args = tasks.get()
+            if kind == 'echo':
+                replies.setdefault(client_id, queue.Queue()).put((task_id, True, args))
+
+    threading.Thread(target=answer, daemon=True).start()
+    server.serve_forever()
+
+
+@pytest.fixture
+def server_address(tmp_path):
+    address = str(tmp_path / 'models.sock')
+    processes = []
+
+    def start():
+        # A killed server leaves its socket behind
+        (tmp_path / 'models.sock').unlink(missing_ok=True)
+        process = multiprocessing.get_context('fork').Process(target=serve, args=(address,), daemon=True)
+        process.start()
+        for _ in range(100):
+            try:
+                backend.ModelServerManager(address=address, authkey=AUTHKEY).connect()
+                break
+            except OSError:
+                time.sleep(0.05)
+        processes.append(process)
+        return process
+
+    yield address, start
+    for process in processes:
+        process.kill()
+
+
+def test_call_returns_the_reply(server_address):
+    address, start = server_address
+    start()
+    client = backend.ModelServerClient(address, AUTHKEY, timeout=5, poll_seconds=0.1)
+    assert client.call('echo', 1, 2) == (1, 2)
+
+
+def test_unanswered_task_times_out(server_address):
+    address, start = server_address
+    start()
+    client = backend.ModelServerClient(address, AUTHKEY, timeout=0.5, poll_seconds=0.1)
+    with pytest.raises(TimeoutError):
+        client.call('hang')
+    assert client.stats()['pending'] == 0
+
+
+def test_lost_connection_fails_pending_tasks_and_reconnects(server_address):
+    address, start = server_address
+    process = start()
+    client = backend.ModelServerClient(address, AUTHKEY, timeout=30, poll_seconds=0.1)
+    future = client.submit('hang')
+    process.kill()
+    process.join()
+
+    with pytest.raises(ConnectionError):
+        future.result(timeout=5)
+
+    start()
+    assert client.call('echo', 'again') == ('again',)
+
+
+def test_tcp_address_requires_an_explicit_key(monkeypatch):
+    monkeypatch.setattr(backend, 'MODEL_SERVER_AUTHKEY', None)
+    with pytest.raises(RuntimeError):
+        backend.model_server_authkey('0.0.0.0:5100', create=True)
+
+
+def test_unix_socket_gets_a_private_generated_key(monkeypatch, tmp_path):
+    monkeypatch.setattr(backend, 'MODEL_SERVER_AUTHKEY', None)
+    address = str(tmp_path / 'models.sock')
+    key = backend.model_server_authkey(address, create=True)
+
+    assert len(key) == 64
+    assert backend.model_server_authkey(address) == key
+    assert (tmp_path / 'models.sock.key').stat().st_mode & 0o077 == 0
+    assert backend.model_server_authkey(address, create=True) != key
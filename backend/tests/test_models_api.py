@@ -0,0 +1,28 @@
+import app as backend
+
+
+def test_stream_uses_the_sample_rate_of_the_language_engine(models, client, monkeypatch):
+    monkeypatch.setattr(backend, 'TTS_ENGINE_ROUTING', 'auto')
+    monkeypatch.setattr(models['tts_multilingual'], 'sr', 22050)
+    engine = backend.tts_engine_info('fr')
+    assert engine['sample_rate'] == 22050
+    response = client.post('/api/tts/stream', data={'text': 'Bonjour.', 'language': 'fr'})
+    assert response.status_code == 200
+    assert response.headers['X-Sample-Rate'] == '22050'
+
+
+def test_model_eviction_is_disabled_without_a_token(models, client, monkeypatch):
+    monkeypatch.setattr(backend, 'MODEL_ADMIN_TOKEN', None)
+    assert client.delete('/api/models/vc').status_code == 403
+    assert backend.model_registry.peek('vc') is models['vc']
+
+
+def test_model_eviction_needs_the_admin_token(models, client, monkeypatch):
+    monkeypatch.setattr(backend, 'MODEL_ADMIN_TOKEN', 'secret')
+    assert client.delete('/api/models/vc').status_code == 401
+    assert client.delete('/api/models/vc', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert backend.model_registry.peek('vc') is models['vc']
+
+    response = client.delete('/api/models/vc', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert backend.model_registry.peek('vc') is None
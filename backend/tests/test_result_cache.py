@@ -0,0 +1,46 @@
+import app as backend
+
+
+def generate(client, text, **headers):
+    with client.post('/api/tts/generate', data={'text': text, 'language': 'en', 'seed': '11'}, headers=headers) as response:
+        return response.status_code, dict(response.headers), response.get_data()
+
+
+def test_seeded_generation_is_served_from_the_cache_and_honours_if_none_match(models, client):
+    status, headers, body = generate(client, 'Cache me once, please.')
+    assert status == 200 and headers['X-Cache'] == 'MISS'
+    etag = headers['ETag']
+
+    status, headers, cached = generate(client, 'Cache me once, please.')
+    assert status == 200 and headers['X-Cache'] == 'HIT'
+    assert headers['ETag'] == etag and cached == body
+
+    status, headers, empty = generate(client, 'Cache me once, please.', **{'If-None-Match': etag})
+    assert status == 304 and empty == b''
+    assert headers['ETag'] == etag
+    assert len(models['tts_original'].calls) == 1
+
+
+def test_disk_hits_are_promoted_into_memory(tmp_path):
+    cache = backend.TTSResultCache(1024, tmp_path, 1024)
+    cache.put('key', b'audio')
+    cache.memory.pop('key')
+
+    assert cache.get('key') == b'audio'
+    assert cache.memory.get('key') == b'audio'
+    assert cache.stats()['disk']['hits'] == 1
+
+
+def test_key_names_the_model_build():
+    args = ('ChatterboxTTS', 'Hello.', 'en', None, {}, 7)
+    fp32 = backend.TTSResultCache.make_key(args[0], {'checkpoint': 'a', 'cpu_inference_mode': 'fp32'}, *args[1:])
+    int8 = backend.TTSResultCache.make_key(args[0], {'checkpoint': 'a', 'cpu_inference_mode': 'int8'}, *args[1:])
+    newer = backend.TTSResultCache.make_key(args[0], {'checkpoint': 'b', 'cpu_inference_mode': 'fp32'}, *args[1:])
+    assert len({fp32, int8, newer}) == 3
+
+
+def test_engine_build_reports_the_cpu_inference_mode(models):
+    build = backend.tts_engine_info('en')['build']
+    # The fakes have no S3Gen to optimize, so they always run as loaded
+    assert build['cpu_inference_mode'] == 'fp32'
+    assert set(build) == {'package', 'checkpoint', 'cpu_inference_mode'}
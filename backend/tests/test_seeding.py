@@ -0,0 +1,40 @@
+import threading
+
+import torch
+
+import app as backend
+from conftest import FakeTTS
+
+PARAMS = backend.parse_tts_params({})
+
+
+def test_same_seed_gives_the_same_audio():
+    model = FakeTTS()
+    first = backend.synthesize_tts(model, 'Hello.', 'en', None, PARAMS, seed=7)
+    second = backend.synthesize_tts(model, 'Hello.', 'en', None, PARAMS, seed=7)
+    other = backend.synthesize_tts(model, 'Hello.', 'en', None, PARAMS, seed=8)
+    assert torch.equal(first, second)
+    assert not torch.equal(first, other)
+
+
+def test_seeded_output_is_unaffected_by_another_model_sampling_at_once():
+    # The pause between reseeding and sampling is where another model's draws would land
+    seeded_model = FakeTTS(delay=0.01)
+    other_model = FakeTTS(seconds=0.01)
+    expected = backend.synthesize_tts(seeded_model, 'Hello.', 'en', None, PARAMS, seed=7)
+
+    stop = threading.Event()
+
+    def sample_elsewhere():
+        while not stop.is_set():
+            backend.synthesize_tts(other_model, 'Noise.', 'en', None, PARAMS)
+
+    noise = threading.Thread(target=sample_elsewhere)
+    noise.start()
+    try:
+        results = [backend.synthesize_tts(seeded_model, 'Hello.', 'en', None, PARAMS, seed=7) for _ in range(20)]
+    finally:
+        stop.set()
+        noise.join()
+    assert other_model.calls
+    assert all(torch.equal(result, expected) for result in results)
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+import pytest
+
+import app as backend
+
+
+def fake_whisper(audio, tier=None, **kwargs):
+    info = {'language': 'en', 'language_probability': 0.98, 'duration': len(audio) / backend.STT_SAMPLE_RATE}
+    if tier == 'draft':
+        segments = [
+            {'start': 0.0, 'end': 1.0, 'text': 'sure', 'avg_log_prob': -0.1, 'no_speech_prob': 0.01},
+            {'start': 1.0, 'end': 2.0, 'text': 'unsure', 'avg_log_prob': -1.5, 'no_speech_prob': 0.01},
+        ]
+    else:
+        segments = [{'start': 0.0, 'end': 1.0, 'text': 'refined', 'avg_log_prob': -0.2, 'no_speech_prob': 0.01}]
+    return iter(segments), info
+
+
+def test_tiered_refines_unsure_segments_without_claiming_a_speedup(monkeypatch):
+    monkeypatch.setattr(backend, 'whisper_transcribe', fake_whisper)
+    result = backend.transcribe_tiered(np.zeros(2 * backend.STT_SAMPLE_RATE, dtype=np.float32))
+    assert result['text'] == 'sure refined'
+    assert result['tiered']['segments_refined'] == 1
+    # Nothing was decoded with the full model alone, so there is nothing to compare against
+    assert 'speedup' not in result['tiered']
+
+
+def test_compare_measures_the_full_model_on_the_same_audio(monkeypatch):
+    audio = np.zeros(2 * backend.STT_SAMPLE_RATE, dtype=np.float32)
+    full_decodes = []
+
+    def slow_full_model(clip, tier=None, **kwargs):
+        if tier == 'draft':
+            time.sleep(0.05)
+        elif len(clip) == len(audio):
+            full_decodes.append(kwargs)
+            time.sleep(0.2)
+        return fake_whisper(clip, tier=tier, **kwargs)
+
+    monkeypatch.setattr(backend, 'whisper_transcribe', slow_full_model)
+    result = backend.transcribe_tiered(audio, language='en', compare=True)
+    tiered = result['tiered']
+    assert result['text'] == 'sure refined'
+    assert full_decodes == [{'vad_filter': True, 'beam_size': 5, 'language': 'en', 'task': 'transcribe'}]
+    assert tiered['full_model_seconds'] >= 0.2
+    assert tiered['speedup'] == pytest.approx(tiered['full_model_seconds'] / tiered['total_seconds'], rel=0.05)
+    assert tiered['speedup'] > 1
+    assert tiered['full_model_text'] == 'refined'
@@ -0,0 +1,27 @@
+from text_chunking import split_text_for_tts
+
+
+def test_sentences_are_split_and_short_ones_merged():
+    text = 'Hello there. This is the first full sentence of the text. And this is the second one, a bit longer.'
+    assert split_text_for_tts(text, 'en', max_chars=80, min_chars=20) == [
+        'Hello there. This is the first full sentence of the text.',
+        'And this is the second one, a bit longer.',
+    ]
+
+
+def test_decimals_and_abbreviations_inside_words_do_not_split():
+    assert split_text_for_tts('Version 3.5 is out now, and it is faster than before.', 'en') == [
+        'Version 3.5 is out now, and it is faster than before.'
+    ]
+
+
+def test_languages_without_spaces_split_on_their_own_terminators():
+    chunks = split_text_for_tts('今日は晴れです。明日は雨が降るでしょう。', 'ja', max_chars=12, min_chars=1)
+    assert chunks == ['今日は晴れです。', '明日は雨が降るでしょう。']
+
+
+def test_oversized_sentences_break_at_clauses_then_words():
+    sentence = 'one two three four five, six seven eight nine ten eleven twelve thirteen'
+    chunks = split_text_for_tts(sentence, 'en', max_chars=30, min_chars=1)
+    assert all(len(chunk) <= 30 for chunk in chunks)
+    assert ' '.join(chunks) == sentence
@@ -0,0 +1,109 @@
+import io
+import json
+import threading
+import zipfile
+
+import pytest
+
+import app as backend
+from conftest import wait_until
+
+LINES = ['The first line renders.', 'The second line breaks.', 'The third line renders too.']
+
+
+@pytest.fixture
+def tts(models, monkeypatch):
+    """The English fake TTS, failing on any text in tts.failing and holding any text in tts.held until released."""
+    model = models['tts_original']
+    generate = model.generate
+    model.failing = set()
+    model.held = {}
+
+    def flaky_generate(text, *args, **kwargs):
+        if text in model.failing:
+            raise RuntimeError('model fell over')
+        if text in model.held:
+            model.held[text].wait(10)
+        return generate(text, *args, **kwargs)
+
+    monkeypatch.setattr(model, 'generate', flaky_generate)
+    return model
+
+
+def submit(client, lines):
+    response = client.post('/api/jobs/tts/batch', json={'items': [{'text': line, 'name': f'line{index}'} for index, line in enumerate(lines)], 'language': 'en'})
+    assert response.status_code == 202
+    return backend.job_manager.get(response.get_json()['id'])
+
+
+def rendered_texts(model):
+    return [call[0] for call in model.calls]
+
+
+def test_a_failed_item_does_not_fail_the_batch_and_is_the_only_one_retried(tts, client):
+    tts.failing.add(LINES[1])
+    job = submit(client, LINES)
+    assert wait_until(lambda: job.finished, timeout=10)
+    assert job.status == 'succeeded'
+
+    items = client.get(f'/api/jobs/{job.id}/items').get_json()['items']
+    assert [item['status'] for item in items] == ['succeeded', 'failed', 'succeeded']
+    assert items[1]['error'] == 'model fell over'
+
+    tts.failing.clear()
+    tts.calls.clear()
+    response = client.post(f'/api/jobs/{job.id}/retry')
+    assert response.status_code == 202
+    retry = backend.job_manager.get(response.get_json()['id'])
+    assert wait_until(lambda: retry.finished, timeout=10)
+    assert retry.status == 'succeeded'
+    assert rendered_texts(tts) == [LINES[1]]
+
+    with client.get(f'/api/jobs/{retry.id}/result') as response:
+        archive = zipfile.ZipFile(io.BytesIO(response.get_data()))
+    manifest = json.loads(archive.read('manifest.json'))
+    assert [item['status'] for item in manifest] == ['succeeded'] * 3
+    assert sorted(archive.namelist()) == ['00001-line0.wav', '00002-line1.wav', '00003-line2.wav', 'manifest.json']
+
+    # Everything rendered already: nothing left to retry
+    assert client.post(f'/api/jobs/{retry.id}/retry').status_code == 409
+
+
+def test_finished_items_are_listed_and_downloadable_while_the_rest_render(tts, client, monkeypatch):
+    monkeypatch.setattr(backend, 'TTS_BULK_IN_FLIGHT', 1)
+    release = threading.Event()
+    tts.held[LINES[2]] = release
+    job = submit(client, LINES)
+    try:
+        assert wait_until(lambda: client.get(f'/api/jobs/{job.id}/items').get_json()['items'][1]['status'] == 'succeeded')
+        listing = client.get(f'/api/jobs/{job.id}/items').get_json()
+        assert listing['job']['status'] == 'running'
+        assert [item['status'] for item in listing['items']] == ['succeeded', 'succeeded', 'running']
+        assert listing['items'][0]['url'] == f'/api/jobs/{job.id}/items/0'
+
+        with client.get(listing['items'][0]['url']) as response:
+            assert response.status_code == 200
+            assert response.get_data()[:4] == b'RIFF'
+        with client.get(f'/api/jobs/{job.id}/items/2') as response:
+            assert response.status_code == 409
+        with client.get(f'/api/jobs/{job.id}/result') as response:
+            assert response.status_code == 409
+    finally:
+        release.set()
+    assert wait_until(lambda: job.finished, timeout=10)
+    with client.get(f'/api/jobs/{job.id}/result') as response:
+        assert zipfile.ZipFile(io.BytesIO(response.get_data())).namelist()[0] == 'manifest.json'
+
+
+def test_items_are_stitched_like_long_form_requests(tts, client, monkeypatch):
+    monkeypatch.setattr(backend, 'TTS_LONGFORM_SEGMENT_CHARS', 40)
+    text = 'A first sentence for the stitcher. A second sentence for the stitcher.'
+    stitched = []
+    original_stitch = backend.stitch_segments
+    monkeypatch.setattr(backend, 'stitch_segments', lambda pieces, *args, **kwargs: stitched.append(len(pieces)) or original_stitch(pieces, *args, **kwargs))
+
+    job = submit(client, [text])
+    assert wait_until(lambda: job.finished, timeout=10)
+    assert job.status == 'succeeded'
+    assert rendered_texts(tts) == ['A first sentence for the stitcher.', 'A second sentence for the stitcher.']
+    assert stitched == [2]
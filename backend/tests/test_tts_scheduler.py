@@ -0,0 +1,58 @@
+import time
+
+import app as backend
+
+
+def test_each_model_has_its_own_scheduler(models):
+    params = backend.parse_tts_params({})
+    models['tts_multilingual'].delay = 1.0
+
+    slow = backend.submit_tts(models['tts_multilingual'], 'नमस्ते', 'hi', params)
+    started = time.perf_counter()
+    backend.submit_tts(models['tts_original'], 'Hello.', 'en', params).result(timeout=5)
+
+    assert time.perf_counter() - started < 0.5
+    assert not slow.done()
+    slow.result(timeout=5)
+    assert backend.tts_scheduler_for(models['tts_original']) is not backend.tts_scheduler_for(models['tts_multilingual'])
+
+
+def test_idle_scheduler_starts_at_once(models, monkeypatch):
+    monkeypatch.setattr(backend, 'TTS_BATCHING_ENABLED', True)
+    params = backend.parse_tts_params({})
+
+    started = time.perf_counter()
+    backend.submit_tts(models['tts_original'], 'Hello.', 'en', params).result(timeout=5)
+
+    assert time.perf_counter() - started < 0.5
+
+
+def test_identical_seeded_requests_share_a_generation(models):
+    model = models['tts_original']
+    model.delay = 0.3
+    params = backend.parse_tts_params({})
+    # The first request occupies the model while the others queue up behind it
+    first = backend.submit_tts(model, 'Warm up.', 'en', params)
+    futures = [backend.submit_tts(model, 'Same line.', 'en', params, seed=7) for _ in range(3)]
+    first.result(timeout=5)
+    results = [future.result(timeout=5) for future in futures]
+
+    assert all(result is results[0] for result in results)
+    assert [call[0] for call in model.calls].count('Same line.') == 1
+
+
+def test_cancelled_requests_are_not_generated_or_counted(models):
+    model = models['tts_original']
+    model.delay = 0.3
+    params = backend.parse_tts_params({})
+    scheduler = backend.tts_scheduler_for(model)
+    counted = scheduler.items
+    first = backend.submit_tts(model, 'Warm up.', 'en', params)
+    cancelled = backend.submit_tts(model, 'Never mind.', 'en', params)
+    kept = backend.submit_tts(model, 'Keep this.', 'en', params)
+    assert cancelled.cancel()
+    first.result(timeout=5)
+    kept.result(timeout=5)
+
+    assert 'Never mind.' not in [call[0] for call in model.calls]
+    assert scheduler.items - counted == 2
@@ -0,0 +1,32 @@
+import struct
+
+
+def test_stream_sends_a_wav_header_then_audio_per_sentence(models, http):
+    text = 'This is the first sentence of the stream. And here is the second sentence of it.'
+    with http.stream('POST', '/api/tts/stream', data={'text': text, 'language': 'en'}) as response:
+        assert response.status_code == 200
+        assert response.headers['content-type'] == 'audio/wav'
+        body = b''.join(response.iter_bytes())
+
+    assert body[:4] == b'RIFF' and body[8:12] == b'WAVE'
+    # A streamed WAV does not know its length up front
+    assert struct.unpack('<I', body[40:44])[0] == 0xFFFFFFFF
+    model = models['tts_original'] if models['tts_original'].calls else models['tts_multilingual']
+    assert [call[0] for call in model.calls] == [
+        'This is the first sentence of the stream.', 'And here is the second sentence of it.'
+    ]
+    samples = (len(body) - 44) // 2
+    assert samples == 2 * int(model.sr * model.seconds)
+
+
+def test_stream_pcm_format(models, http):
+    response = http.post('/api/tts/stream', data={'text': 'Just one sentence here.', 'format': 'pcm'})
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('audio/L16')
+    assert len(response.content) % 2 == 0 and len(response.content) > 0
+
+
+def test_stream_rejects_missing_text(client):
+    # Closed like a server would, so the admission slot is released
+    with client.post('/api/tts/stream', data={'text': '  '}) as response:
+        assert response.status_code == 400
@@ -0,0 +1,73 @@
+import io
+
+import torch
+
+import app as backend
+from conftest import wait_until, wav_upload
+
+
+class FakeS3Gen:
+    def __init__(self):
+        self.embedded = 0
+
+    def tokenizer(self, audio):
+        return torch.zeros(1, 10, dtype=torch.long), None
+
+    def embed_ref(self, audio, sample_rate, device=None):
+        self.embedded += 1
+        return {'embedding': torch.ones(1, 4), 'prompt_feat': torch.zeros(1, 3, 2), 'prompt_token': None}
+
+    def inference(self, speech_tokens, ref_dict):
+        assert torch.equal(ref_dict['embedding'], torch.ones(1, 4))
+        return torch.zeros(1, 1200), None
+
+
+class FakeWatermarker:
+    def apply_watermark(self, wav, sample_rate):
+        return wav
+
+
+class FakeArrayVC:
+    """A VC model driven with arrays like ChatterboxVC, counting target-encoder runs."""
+
+    sr = 24000
+    ref_dict = None
+
+    def __init__(self):
+        self.device = 'cpu'
+        self.s3gen = FakeS3Gen()
+        self.watermarker = FakeWatermarker()
+
+
+def test_saved_voice_embedding_is_precomputed_reused_and_deleted(models, client, monkeypatch):
+    model = FakeArrayVC()
+    backend.model_registry.put('vc', model)
+    # Only the stored embedding may serve the conversion, not the in-memory copy
+    monkeypatch.setattr(backend, 'vc_target_cache', backend.LRUCache(0))
+
+    response = client.post('/api/voices', data={'voice': (io.BytesIO(wav_upload()), 'speaker.wav'), 'name': 'Speaker'})
+    assert response.status_code == 201
+    voice_id = response.get_json()['id']
+    sidecar = backend.vc_embedding_path(voice_id)
+    assert wait_until(sidecar.exists)
+    assert model.s3gen.embedded == 1
+
+    data = {'source_audio': (io.BytesIO(wav_upload()), 'source.wav'), 'target_voice_id': voice_id}
+    with client.post('/api/vc/generate', data=data) as response:
+        assert response.status_code == 200
+    assert model.s3gen.embedded == 1
+
+    response = client.delete(f'/api/voices/{voice_id}')
+    assert response.status_code == 200
+    assert not sidecar.exists()
+    assert not (backend.VOICE_LIB_DIR / response.get_json()['filename']).exists()
+    assert backend.find_voice_sample(voice_id) is None
+    assert client.delete(f'/api/voices/{voice_id}').status_code == 404
+
+
+def test_embedding_from_another_vc_model_is_ignored(tmp_path):
+    path = tmp_path / 'voice.vc.npz'
+    backend.save_vc_embedding(path, 'ChatterboxVC', {'embedding': torch.ones(1, 4).numpy(), 'prompt_token': None})
+    assert backend.load_vc_embedding(path, 'OtherVC') is None
+    ref = backend.load_vc_embedding(path, 'ChatterboxVC')
+    assert ref['prompt_token'] is None and ref['embedding'].shape == (1, 4)
@@ -0,0 +1,17 @@
+import app as backend
+from conftest import wav_upload
+
+
+def test_stream_vc_converts_every_window(models, http, monkeypatch):
+    monkeypatch.setattr(backend, 'VC_WINDOW_SECONDS', 0.5)
+    monkeypatch.setattr(backend, 'VC_WINDOW_OVERLAP_SECONDS', 0.1)
+    response = http.post('/api/vc/stream', files={'source_audio': ('source.wav', wav_upload(seconds=2.0), 'audio/wav')})
+    assert response.status_code == 200
+    # More than one window of the fake converter (half a second at 24 kHz) after the 44-byte header
+    assert len(response.content) > 44 + 2 * 24000
+
+
+def test_stream_vc_reports_undecodable_source_as_an_error(models, http):
+    response = http.post('/api/vc/stream', files={'source_audio': ('source.wav', b'not audio at all', 'audio/wav')})
+    assert response.status_code == 500
+    assert 'error' in response.json()
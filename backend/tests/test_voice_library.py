@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+import app as backend
+
+mongomock = pytest.importorskip('mongomock')
+
+
+def sample(voice_id, created_at):
+    return {'id': voice_id, 'name': voice_id, 'filename': f'{voice_id}.wav', 'createdAt': created_at}
+
+
+class StaticLibrary:
+    def __init__(self, samples):
+        self.samples = samples
+
+    def list(self, offset=0, limit=None):
+        return list(self.samples), len(self.samples)
+
+
+def test_workers_seeding_together_keep_every_voice_once():
+    db = mongomock.MongoClient().vaani
+    seed = StaticLibrary([sample(f'voice-{index}', f'2024-01-{index + 1:02d}') for index in range(20)])
+    workers = [threading.Thread(target=backend.MongoVoiceLibrary, args=(db, seed)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    samples, total = backend.MongoVoiceLibrary(db).list()
+    assert total == 20
+    assert sorted(item['id'] for item in samples) == sorted(item['id'] for item in seed.samples)
+
+
+def test_seeding_never_overwrites_or_deletes_existing_voices():
+    db = mongomock.MongoClient().vaani
+    library = backend.MongoVoiceLibrary(db)
+    library.add({**sample('kept', '2024-01-01'), 'name': 'Renamed'})
+    library.add(sample('mongo-only', '2024-01-02'))
+
+    library.seed([sample('kept', '2024-01-01'), sample('from-json', '2024-01-03')])
+
+    assert library.get('kept')['name'] == 'Renamed'
+    assert library.get('mongo-only') is not None
+    assert library.get('from-json') is not None
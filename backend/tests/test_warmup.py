@@ -0,0 +1,27 @@
+import os
+import runpy
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import app as backend
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def test_import_does_not_start_warmup():
+    env = dict(os.environ, MODEL_WARMUP='true')
+    probe = 'import app; print(app.model_warmup._pid)'
+    result = subprocess.run([sys.executable, '-c', probe], cwd=BACKEND, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == 'None'
+
+
+def test_gunicorn_worker_hook_starts_warmup(monkeypatch):
+    started = []
+    monkeypatch.setattr(backend, 'start_model_warmup', lambda: started.append(os.getpid()))
+    hooks = runpy.run_path(str(BACKEND / 'gunicorn.conf.py'))
+    hooks['post_worker_init'](SimpleNamespace(app=SimpleNamespace(app_uri='app:app')))
+    assert started == [os.getpid()]
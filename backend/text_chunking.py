@@ -0,0 +1,89 @@
+"""Splitting text into sentence and clause sized chunks for TTS, per language."""
+import os
+import re
+
+TTS_STREAM_MAX_CHUNK_CHARS = int(os.environ.get('TTS_STREAM_MAX_CHUNK_CHARS', 250))
+TTS_STREAM_MIN_CHUNK_CHARS = int(os.environ.get('TTS_STREAM_MIN_CHUNK_CHARS', 20))
+
+# Sentence terminators and clause separators per language, used to cut text
+# into pieces that can be synthesized (and streamed) one after another.
+SENTENCE_TERMINATORS = {
+    'default': '.!?…',
+    'hi': '।॥.!?…',
+    'zh': '。！？!?…',
+    'ja': '。！？!?…',
+    'ko': '.!?。！？…',
+    'ar': '.!?؟۔…',
+    'el': '.!;;…',
+}
+CLAUSE_SEPARATORS = {
+    'default': ',;:—',
+    'zh': '，、；：,;:',
+    'ja': '、，；：,;:',
+    'ar': '،؛,;:',
+}
+# Languages written without spaces between words/sentences
+NO_SPACE_LANGUAGES = {'zh', 'ja'}
+
+def _split_keep_delimiters(text, delimiters, spaced=True):
+    """Split text after runs of delimiters, keeping them (and closing quotes) attached.
+
+    For space-separated scripts a delimiter only ends a piece when followed by
+    whitespace, so numbers like "3.5" and abbreviations inside words survive.
+    """
+    delims = re.escape(delimiters)
+    closers = '["\'”’»)\\]]*'
+    if spaced:
+        pattern = r'.+?(?:[' + delims + ']+' + closers + r'(?=\s|$)|$)'
+    else:
+        pattern = '[^' + delims + ']+(?:[' + delims + ']+' + closers + ')?|[' + delims + ']+'
+    return [piece.strip() for piece in re.findall(pattern, text) if piece.strip()]
+
+def _split_oversized(piece, language, max_chars):
+    """Break a piece longer than max_chars at clause separators, then words, then hard cuts."""
+    if len(piece) <= max_chars:
+        return [piece]
+    separators = CLAUSE_SEPARATORS.get(language, CLAUSE_SEPARATORS['default'])
+    parts = _split_keep_delimiters(piece, separators, spaced=language not in NO_SPACE_LANGUAGES)
+    if len(parts) <= 1:
+        parts = piece.split() if language not in NO_SPACE_LANGUAGES else [piece]
+    elif language not in NO_SPACE_LANGUAGES:
+        # A clause that is still too long is broken at words, not mid-word
+        parts = [word for part in parts for word in (part.split() if len(part) > max_chars else [part])]
+    joiner = '' if language in NO_SPACE_LANGUAGES else ' '
+    pieces, current = [], ''
+    for part in parts:
+        candidate = f"{current}{joiner}{part}" if current else part
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        while len(part) > max_chars:
+            pieces.append(part[:max_chars])
+            part = part[max_chars:]
+        current = part
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_text_for_tts(text, language='en', max_chars=TTS_STREAM_MAX_CHUNK_CHARS, min_chars=TTS_STREAM_MIN_CHUNK_CHARS):
+    """Split text into sentence/clause sized chunks suited to the language."""
+    language = (language or 'en').split('-')[0].lower()
+    terminators = SENTENCE_TERMINATORS.get(language, SENTENCE_TERMINATORS['default'])
+    joiner = '' if language in NO_SPACE_LANGUAGES else ' '
+
+    chunks = []
+    for line in text.splitlines():
+        for sentence in _split_keep_delimiters(line, terminators, spaced=language not in NO_SPACE_LANGUAGES):
+            chunks.extend(_split_oversized(sentence, language, max_chars))
+
+    # Merge fragments that are too short to synthesize naturally on their own
+    merged = []
+    for chunk in chunks:
+        if merged and (len(merged[-1]) < min_chars or len(chunk) < min_chars) \
+                and len(merged[-1]) + len(joiner) + len(chunk) <= max_chars:
+            merged[-1] = f"{merged[-1]}{joiner}{chunk}"
+        else:
+            merged.append(chunk)
+    return merged or [text.strip()]
@@ -66,8 +66,8 @@ const TTSSection = () => {
       return
     }
 
-    if (text.length > 10000) {
-      alert('Text too long (max 10000 characters)')
+    if (text.length > 50000) {
+      alert('Text too long (max 50000 characters)')
       return
     }
 
@@ -222,12 +222,12 @@ const TTSSection = () => {
           </CardHeader>
           <CardContent className="flex-1 flex flex-col gap-6">
             <Textarea
-              label="Text to synthesize (max chars 10000)"
+              label="Text to synthesize (max chars 50000)"
               value={text}
               onChange={(e) => setText(e.target.value)}
               rows={5}
-              maxLength={10000}
-              helperText={`${text.length}/10000 characters`}
+              maxLength={50000}
+              helperText={`${text.length}/50000 characters`}
               className="flex-1 min-h-[120px]"
             />
 
@@ -159,7 +159,12 @@ export const AudioSampleProvider = ({ children }) => {
 
   const deleteSample = useCallback((id) => {
     setSamples((prev) => prev.filter((sample) => sample.id !== id))
-  }, [])
+    if (serverReady) {
+      fetch(`${API_BASE}/${encodeURIComponent(id)}`, { method: 'DELETE' }).catch((error) => {
+        console.warn('Could not delete voice on server', error)
+      })
+    }
+  }, [serverReady])
 
   const getSampleFile = useCallback(async (id) => {
     const sample = samples.find((item) => item.id === id)
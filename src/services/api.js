@@ -43,7 +43,9 @@ export const generateVC = async (params) => {
   
   formData.append('source_audio', params.sourceAudio)
   
-  if (params.targetVoice) {
+  if (params.targetVoiceId) {
+    formData.append('target_voice_id', params.targetVoiceId)
+  } else if (params.targetVoice) {
     formData.append('target_voice', params.targetVoice)
   }
 